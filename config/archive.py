@@ -0,0 +1,101 @@
+"""
+تقسيم التوهجات إلى جدول ساخن (حديث) وجدول أرشيف (قديم)
+
+- أمر archive_flares ينقل الصفوف الأقدم من FLARE_ARCHIVE_AFTER_DAYS إلى جدول
+  الأرشيف بنفس الـ id
+- لكل تطبيق database view (UNION ALL للجدولين) كـ Model غير مُدار للقراءة
+- partition() تختار الجدول الساخن وحده إذا كانت الفترة المطلوبة كلها أحدث من
+  أحدث صف مؤرشف، وإلا الـ view، فالاستعلامات الحديثة لا تلمس الأرشيف أبداً
+"""
+from datetime import datetime, time
+
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .caching import bump_version
+
+
+def parse_start(value):
+    """start_date من query params إلى datetime (None إذا لم يمكن تحليله)"""
+    if value is None or isinstance(value, datetime):
+        return value
+
+    parsed = parse_datetime(value)
+    if parsed is None:
+        day = parse_date(value)
+        if day is None:
+            return None
+        parsed = datetime.combine(day, time.min)
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def history_view_sql(view, hot_table, archive_table, columns):
+    """SQL لإنشاء الـ view الذي يجمع الجدولين (يُستخدم في الـ migrations)"""
+    column_list = ', '.join(columns)
+    return (
+        f'CREATE VIEW {view} AS '
+        f'SELECT {column_list} FROM {hot_table} '
+        f'UNION ALL '
+        f'SELECT {column_list} FROM {archive_table}'
+    )
+
+
+def newest_archived(archive_model):
+    """begin_time لأحدث صف مؤرشف (MAX على index)"""
+    return archive_model.objects.aggregate(newest=Max('begin_time'))['newest']
+
+
+def partition(hot_model, archive_model, history_model, start=None):
+    """
+    queryset مناسب لفترة تبدأ من start
+
+    start=None (بدون حد أدنى) أو start قبل أحدث صف مؤرشف: الـ view (الجدولين)،
+    وإلا الجدول الساخن وحده.
+    """
+    start = parse_start(start)
+    if start is not None:
+        newest = newest_archived(archive_model)
+        if newest is None or start > newest:
+            return hot_model.objects.all()
+    return history_model.objects.all()
+
+
+def archive_rows(queryset, archive_model, batch_size=1000, unique_field='flare_id'):
+    """
+    نقل صفوف queryset إلى archive_model على دفعات (نسخ ثم حذف في transaction)
+
+    صف موجود في الأرشيف بنفس unique_field (أُدخل مرة أخرى في الجدول الساخن)
+    يُحدَّث في الأرشيف بقيم الصف الساخن ويحتفظ بالـ id المؤرشف.
+    ترجع عدد الصفوف المنقولة.
+    """
+    hot_model = queryset.model
+    fields = [field.attname for field in archive_model._meta.concrete_fields if field.attname != 'archived_at']
+    moved = 0
+
+    while True:
+        with transaction.atomic():
+            rows = list(queryset.order_by('pk').values(*fields)[:batch_size])
+            if not rows:
+                break
+            existing = set(archive_model.objects.filter(
+                **{f'{unique_field}__in': [row[unique_field] for row in rows]}
+            ).values_list(unique_field, flat=True))
+
+            for row in rows:
+                if row[unique_field] in existing:
+                    values = {field: value for field, value in row.items() if field not in ('id', unique_field)}
+                    archive_model.objects.filter(**{unique_field: row[unique_field]}).update(**values)
+            archive_model.objects.bulk_create(
+                [archive_model(**row) for row in rows if row[unique_field] not in existing]
+            )
+            hot_model.objects.filter(pk__in=[row['id'] for row in rows]).delete()
+        moved += len(rows)
+
+    if moved:
+        bump_version(hot_model)
+        bump_version(archive_model)
+    return moved
@@ -0,0 +1,187 @@
+"""
+Cache لنتائج الاستعلامات مع إبطال دقيق حسب إصدار البيانات
+
+لكل Model رقم إصدار (data version) محفوظ في الـ Django cache، ويزيد مع كل
+post_save / post_delete. مفتاح النتيجة يتكون من اسم الـ endpoint + الـ params
+بعد توحيدها + إصدارات الـ Models التي يعتمد عليها، لذلك أي كتابة تجعل النتائج
+القديمة غير قابلة للوصول فوراً، وبين الكتابات تكلفة القراءة هي cache.get_many
+واحدة وبحث في dict.
+
+الإصدارات مشتركة بين العمليات فقط مع backend مشترك (Redis / Memcached /
+database cache). مع LocMemCache (الافتراضي للتطوير) الإبطال داخل العملية فقط:
+كتابة في worker آخر أو ingestion_worker أو run_scheduler تظهر بعد
+QUERY_CACHE_TTL. لذلك check --deploy يفشل (config.E001) مع cache غير مشترك، إلا
+إذا كانت عملية واحدة فقط (CACHE_SINGLE_PROCESS).
+
+النتائج نفسها في LRU داخل العملية مع TTL (للنوافذ الزمنية مثل "آخر 7 أيام").
+"""
+import functools
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core import checks
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from rest_framework.response import Response
+
+from .singleflight import response_payload, single_flight
+
+VERSION_KEY = 'data-version:{}'
+# backends لا تشارك القيم بين العمليات
+PER_PROCESS_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@checks.register(checks.Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    """الإصدارات تحتاج cache مشترك إذا كانت هناك أكثر من عملية"""
+    backend = settings.CACHES['default']['BACKEND']
+    if backend not in PER_PROCESS_BACKENDS or getattr(settings, 'CACHE_SINGLE_PROCESS', False):
+        return []
+    return [checks.Error(
+        f'{backend} keeps data versions per process, so writes in one process '
+        'do not invalidate cached results in the others.',
+        hint='Set CACHE_BACKEND to a shared backend (Redis, Memcached or the '
+             'database cache), or CACHE_SINGLE_PROCESS=True if only one process runs.',
+        id='config.E001',
+    )]
+
+
+def model_label(model):
+    return model._meta.label_lower
+
+
+def data_versions(*models):
+    """إصدارات البيانات الحالية لعدة Models (tuple بنفس الترتيب)"""
+    keys = [VERSION_KEY.format(model_label(model)) for model in models]
+    versions = cache.get_many(keys)
+
+    for key in keys:
+        if key not in versions:
+            # قيمة ابتدائية فريدة: إذا حُذف المفتاح من الـ cache لا يعود إصدار قديم
+            cache.add(key, time.time_ns(), timeout=None)
+            versions[key] = cache.get(key)
+
+    return tuple(versions[key] for key in keys)
+
+
+def bump_version(model):
+    """زيادة إصدار بيانات Model"""
+    key = VERSION_KEY.format(model_label(model))
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, time.time_ns(), timeout=None)
+
+
+def _on_change(sender, **kwargs):
+    bump_version(sender)
+    # زيادة ثانية بعد الـ commit حتى لا تُخزَّن نتيجة قُرئت قبل ظهور الكتابة
+    if transaction.get_connection(kwargs.get('using')).in_atomic_block:
+        transaction.on_commit(lambda: bump_version(sender), using=kwargs.get('using'))
+
+
+def track_data_version(*models):
+    """ربط post_save / post_delete لهذه الـ Models بزيادة الإصدار (من AppConfig.ready)"""
+    for model in models:
+        uid = f'data-version:{model_label(model)}'
+        post_save.connect(_on_change, sender=model, dispatch_uid=uid, weak=False)
+        post_delete.connect(_on_change, sender=model, dispatch_uid=uid, weak=False)
+
+
+class QueryCache:
+    """LRU + TTL داخل العملية"""
+
+    def __init__(self, max_entries=256, ttl=60):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self.entries[key]
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value):
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+query_cache = QueryCache(
+    max_entries=getattr(settings, 'QUERY_CACHE_MAX_ENTRIES', 256),
+    ttl=getattr(settings, 'QUERY_CACHE_TTL', 60),
+)
+
+
+def normalize_params(request, params):
+    """
+    params: {name: default} - القيم تُحوَّل لنوع الـ default وباقي الـ params تُهمل
+
+    ترجع None إذا كانت القيمة غير صالحة (لتتعامل معها الـ view نفسها).
+    """
+    normalized = []
+    for name, default in params.items():
+        value = request.GET.get(name)
+        if value is None:
+            value = default
+        elif default is not None:
+            try:
+                value = type(default)(value)
+            except (TypeError, ValueError):
+                return None
+        normalized.append((name, value))
+    return tuple(normalized)
+
+
+def versioned_cache(endpoint, models, params=None):
+    """
+    Decorator لـ view ترجع Response: يخزن response.data للاستجابات 200
+
+    يوضع تحت @api_view، أو عبر method_decorator على actions الـ ViewSets.
+    عند عدم وجود النتيجة تُحسب عبر single_flight فلا تتكرر للطلبات المتزامنة.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if not getattr(settings, 'QUERY_CACHE_ENABLED', True):
+                return view(request, *args, **kwargs)
+
+            normalized = normalize_params(request, params or {})
+            if normalized is None:
+                return view(request, *args, **kwargs)
+
+            key = (endpoint, normalized, data_versions(*models))
+            data = query_cache.get(key)
+            if data is not None:
+                return Response(data)
+
+            status_code, data = single_flight(
+                key, lambda: response_payload(view(request, *args, **kwargs))
+            )
+            if status_code == 200:
+                query_cache.set(key, data)
+            return Response(data, status=status_code)
+        return wrapper
+    return decorator
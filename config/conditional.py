@@ -0,0 +1,46 @@
+"""
+Conditional GET (ETag / Last-Modified)
+
+الـ ETag يُحسب من بصمة رخيصة للبيانات (count / max(pk) / max(updated_at))
+قبل تشغيل الـ view، فإذا طابق If-None-Match ترجع 304 مباشرة دون أي
+serialization أو render للاستجابة.
+"""
+import hashlib
+
+from django.db.models import Count, Max
+from django.views.decorators.http import condition
+
+
+def queryset_fingerprint(queryset, timestamp_field='updated_at'):
+    """(count, max pk, max timestamp) لـ queryset باستعلام aggregate واحد"""
+    aggregates = {'count': Count('pk'), 'max_pk': Max('pk')}
+    if timestamp_field:
+        aggregates['max_timestamp'] = Max(timestamp_field)
+    return tuple(queryset.order_by().aggregate(**aggregates).values())
+
+
+def make_etag(request, *parts):
+    """
+    ETag من أجزاء البصمة
+
+    يشمل المسار و query params و Accept لأن لكل صيغة (JSON / MessagePack / HTML)
+    تمثيلاً مختلفاً لنفس البيانات.
+    """
+    digest = hashlib.sha1()
+    for part in (request.path, sorted(request.GET.lists()), request.META.get('HTTP_ACCEPT', ''), *parts):
+        digest.update(repr(part).encode())
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def conditional(fingerprint_func, last_modified_func=None):
+    """
+    مثل django.views.decorators.http.condition لكن fingerprint_func ترجع
+    أي قيمة قابلة للـ repr ويتم تحويلها إلى ETag عبر make_etag.
+
+    يعمل مع @api_view (يوضع تحته) ومع actions عبر method_decorator.
+    """
+    def etag_func(request, *args, **kwargs):
+        return make_etag(request, fingerprint_func(request, *args, **kwargs))
+
+    return condition(etag_func=etag_func, last_modified_func=last_modified_func)
@@ -0,0 +1,26 @@
+"""
+SQLite backend مع إعدادات أداء تُطبق على كل اتصال جديد
+
+DATABASES['default'] = {
+    'ENGINE': 'config.db.sqlite3',
+    'PRAGMAS': {'journal_mode': 'wal', 'synchronous': 'normal', ...},
+    'TRANSACTION_MODE': 'IMMEDIATE',
+}
+
+TRANSACTION_MODE='IMMEDIATE' يجعل كل transaction تأخذ قفل الكتابة من البداية
+(BEGIN IMMEDIATE)، فينتظر الكاتب الثاني busy_timeout بدلاً من فشل "database is
+locked" عند محاولة ترقية قفل القراءة إلى كتابة في منتصف الـ transaction.
+"""
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.settings_dict.get('PRAGMAS', {}).items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        mode = self.settings_dict.get('TRANSACTION_MODE')
+        self.cursor().execute(f'BEGIN {mode}' if mode else 'BEGIN')
@@ -0,0 +1,73 @@
+"""
+توجيه القراءة إلى replicas والكتابة إلى الـ primary
+
+- الكتابة دائماً على 'default'
+- القراءة على replica فقط داخل طلب HTTP آمن (GET/HEAD) لم يكتب بعد، أما
+  خارج الطلبات (أوامر الإدارة، الـ shell) فكل شيء على الـ primary
+- read-your-writes: بعد أي كتابة في الطلب تنتقل قراءاته إلى الـ primary، و
+  PrimaryPinningMiddleware يضع cookie لمدة REPLICA_PIN_SECONDS حتى ترى طلبات
+  نفس العميل التالية ما كتبه (تأخر النسخ إلى الـ replicas)
+"""
+import contextvars
+import random
+from contextlib import contextmanager
+
+from django.conf import settings
+
+
+class RoutingState:
+    def __init__(self, use_primary=False):
+        self.use_primary = use_primary
+        self.wrote = False
+
+
+_state = contextvars.ContextVar('db_routing_state', default=None)
+
+
+def replicas():
+    return getattr(settings, 'DATABASE_REPLICAS', [])
+
+
+def begin_request(use_primary):
+    """بداية طلب: replicas مسموحة إلا إذا use_primary"""
+    return _state.set(RoutingState(use_primary))
+
+
+def end_request(token):
+    """نهاية طلب: ترجع True إذا كتب الطلب شيئاً"""
+    state = _state.get()
+    _state.reset(token)
+    return state is not None and state.wrote
+
+
+@contextmanager
+def use_primary():
+    """قراءة من الـ primary داخل هذا الـ block"""
+    token = _state.set(RoutingState(use_primary=True))
+    try:
+        yield
+    finally:
+        _state.reset(token)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        available = replicas()
+        if state is None or state.use_primary or state.wrote or not available:
+            return 'default'
+        return random.choice(available)
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # كل قواعد البيانات نسخ من نفس البيانات
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # الـ replicas تأخذ الـ schema عبر النسخ من الـ primary
+        return db not in replicas()
@@ -0,0 +1,106 @@
+"""
+Serializers سريعة للقراءة فقط
+
+بدلاً من إنشاء كائن Model وتمريره على حقول ModelSerializer لكل صف،
+نقرأ الأعمدة مباشرة بـ queryset.values_list() ونحوّل كل صف (tuple) إلى dict
+بدالة تُبنى مرة واحدة لكل serializer. الناتج مطابق لناتج الـ ModelSerializer.
+"""
+from django.conf import settings
+from rest_framework import serializers
+from rest_framework.response import Response
+
+from .timing import timed
+
+# تحويلات بنفس منطق حقول DRF
+datetime_field = serializers.DateTimeField().to_representation
+
+
+def display(choices):
+    """تحويل قيمة choices إلى النص المعروض (مثل get_FOO_display)"""
+    labels = dict(choices)
+    return lambda value: labels.get(value, value)
+
+
+def compile_mapper(fields):
+    """
+    بناء دالة row -> dict من قائمة (key, source, convert)
+
+    الدالة تُولَّد كـ dict literal واحد، وهو أسرع من حلقة على الحقول لكل صف.
+    """
+    namespace = {}
+    items = []
+
+    for index, (key, _, convert) in enumerate(fields):
+        if convert is None:
+            items.append(f'{key!r}: row[{index}]')
+        else:
+            namespace[f'convert_{index}'] = convert
+            items.append(f'{key!r}: convert_{index}(row[{index}])')
+
+    source = 'def mapper(row):\n    return {' + ', '.join(items) + '}\n'
+    exec(compile(source, '<fast-serializer>', 'exec'), namespace)
+    return namespace['mapper']
+
+
+class ValuesSerializerMeta(type):
+    def __new__(mcs, name, bases, attrs):
+        cls = super().__new__(mcs, name, bases, attrs)
+        if cls.fields:
+            cls.sources = [source for _, source, _ in cls.fields]
+            cls.mapper = staticmethod(compile_mapper(cls.fields))
+        return cls
+
+
+class ValuesSerializer(metaclass=ValuesSerializerMeta):
+    """
+    الأساس للـ serializers السريعة
+
+    fields: قائمة (key, source, convert) حيث source هو اسم العمود في values_list
+    (يمكن أن يكون عبر علاقة مثل player__name) و convert دالة أو None.
+    """
+
+    fields = ()
+
+    @classmethod
+    def rows(cls, queryset):
+        """queryset من tuples بنفس ترتيب fields (يمكن تقسيمه إلى صفحات)"""
+        return queryset.values_list(*cls.sources)
+
+    @classmethod
+    def serialize(cls, rows):
+        """تحويل صفوف values_list إلى قائمة dicts"""
+        mapper = cls.mapper
+        with timed('serialize'):
+            return [mapper(row) for row in rows]
+
+    @classmethod
+    def many(cls, queryset):
+        return cls.serialize(cls.rows(queryset))
+
+
+def fast_serializers_enabled():
+    return getattr(settings, 'FAST_LIST_SERIALIZERS', True)
+
+
+class FastListMixin:
+    """
+    Mixin لـ ViewSets: list() تستخدم fast_serializer_class إذا كانت مفعلة
+
+    الاستجابة (مع الـ pagination) مطابقة لنسخة serializer_class العادية.
+    """
+
+    fast_serializer_class = None
+
+    def list(self, request, *args, **kwargs):
+        if self.fast_serializer_class is None or not fast_serializers_enabled():
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        rows = self.fast_serializer_class.rows(queryset)
+
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(self.fast_serializer_class.serialize(page))
+
+        return Response(self.fast_serializer_class.serialize(rows))
+
@@ -0,0 +1,58 @@
+"""
+فحوصات الصحة للـ orchestrator
+
+- liveness: العملية تستجيب (بدون I/O)
+- readiness: SELECT 1 على الـ primary (عمر آخر جلب من NASA في weather_api.jobs.ingestion_age)
+- التفاصيل: أعداد الصفوف تقديرية (estimated_count) بدلاً من COUNT(*) في كل فحص
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, connections, router
+
+from .caching import data_versions, model_label
+
+ESTIMATE_KEY = 'row-estimate:{}:{}'
+
+
+def database_ready(alias='default'):
+    """ping للقاعدة: True إذا نجح SELECT 1"""
+    try:
+        with connections[alias].cursor() as cursor:
+            cursor.execute('SELECT 1')
+            cursor.fetchone()
+    except DatabaseError:
+        return False
+    return True
+
+
+def _count(model):
+    alias = router.db_for_read(model)
+    connection = connections[alias]
+
+    if connection.vendor == 'postgresql':
+        # من إحصائيات ANALYZE بدون مسح الجدول (-1 إذا لم يُحلل الجدول بعد)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+                [model._meta.db_table],
+            )
+            row = cursor.fetchone()
+        if row and row[0] >= 0:
+            return row[0]
+
+    return model.objects.using(alias).count()
+
+
+def estimated_count(model):
+    """
+    عدد صفوف Model بدون COUNT(*) في كل طلب
+
+    القيمة مخزنة في الـ cache حسب إصدار بيانات الـ Model (انظر config.caching)
+    فتبقى صحيحة حتى أول كتابة، ولمدة ROW_ESTIMATE_TTL على الأكثر.
+    """
+    key = ESTIMATE_KEY.format(model_label(model), data_versions(model)[0])
+    count = cache.get(key)
+    if count is None:
+        count = _count(model)
+        cache.set(key, count, timeout=getattr(settings, 'ROW_ESTIMATE_TTL', 300))
+    return count
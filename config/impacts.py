@@ -0,0 +1,87 @@
+"""
+جدول تأثيرات التوهجات الشمسية المشترك
+
+كل القيم تُبنى مرة واحدة عند تحميل الـ module وتُشارك بين كل الطلبات،
+لذلك تسلسل آلاف التوهجات لا يُنشئ dict جديد لكل صف.
+القواميس الداخلية مشتركة وللقراءة فقط (FrozenDict)، انسخها بـ dict() إذا
+احتجت تغييرها.
+"""
+from types import MappingProxyType
+
+DEFAULT_CATEGORY = 'B'
+
+
+class FrozenDict(dict):
+    """
+    dict للقراءة فقط
+
+    ليس MappingProxyType لأن القيم تدخل في response.data المخزن في الكاش
+    (pickle) وفي JSON / MessagePack كأي dict.
+    """
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError(f'{type(self).__name__} is read-only')
+
+    __setitem__ = __delitem__ = __ior__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+
+    def __reduce__(self):
+        return (FrozenDict, (dict(self),))
+
+# تأثير التوهج على أنظمة اللعبة (solar_defender)
+FLARE_IMPACTS = MappingProxyType({
+    'A': FrozenDict({'power': 0, 'satellites': 0, 'comm': 0, 'message': "Minimal impact"}),
+    'B': FrozenDict({'power': 5, 'satellites': 3, 'comm': 8, 'message': "Minor radio interference"}),
+    'C': FrozenDict({'power': 15, 'satellites': 10, 'comm': 20, 'message': "GPS and radio disruption"}),
+    'M': FrozenDict({'power': 30, 'satellites': 25, 'comm': 40, 'message': "Potential power grid fluctuations"}),
+    'X': FrozenDict({'power': 50, 'satellites': 40, 'comm': 60, 'message': "Critical infrastructure at risk!"})
+})
+
+# مستوى الخطورة المخزَّن مع كل توهج (weather_api)
+FLARE_RISKS = MappingProxyType({
+    'A': FrozenDict({'risk': 'LOW', 'color': '#00FF00', 'effects': ('Minimal impact',)}),
+    'B': FrozenDict({'risk': 'LOW-MEDIUM', 'color': '#7CFC00', 'effects': ('Radio static',)}),
+    'C': FrozenDict({'risk': 'MEDIUM', 'color': '#FFD700', 'effects': ('GPS errors', 'Radio blackouts')}),
+    'M': FrozenDict({'risk': 'HIGH', 'color': '#FF8C00', 'effects': ('Power grid fluctuations', 'Astronaut risk')}),
+    'X': FrozenDict({'risk': 'EXTREME', 'color': '#FF0000', 'effects': ('Satellite damage', 'Global blackouts')})
+})
+
+# نفس الخطورة مع أيقونات للعرض في لوحات التحكم
+FLARE_RISKS_WITH_FLAIR = MappingProxyType({
+    'A': FrozenDict({'risk': '🌱 LOW', 'color': '#00FF00', 'effects': FLARE_RISKS['A']['effects'], 'icon': '🌤️'}),
+    'B': FrozenDict({'risk': '💚 LOW-MEDIUM', 'color': '#7CFC00', 'effects': FLARE_RISKS['B']['effects'], 'icon': '📻'}),
+    'C': FrozenDict({'risk': '🟡 MEDIUM', 'color': '#FFD700', 'effects': FLARE_RISKS['C']['effects'], 'icon': '📡'}),
+    'M': FrozenDict({'risk': '🟠 HIGH', 'color': '#FF8C00', 'effects': FLARE_RISKS['M']['effects'], 'icon': '⚡'}),
+    'X': FrozenDict({'risk': '🔴 EXTREME', 'color': '#FF0000', 'effects': FLARE_RISKS['X']['effects'], 'icon': '💥'})
+})
+
+CATEGORY_COLORS = MappingProxyType({
+    category: risk['color'] for category, risk in FLARE_RISKS.items()
+})
+
+CATEGORY_RISKS = MappingProxyType({
+    category: risk['risk'] for category, risk in FLARE_RISKS.items()
+})
+
+
+def flare_category(class_type):
+    """فئة التوهج من نوعه (مثلاً M2.1 -> M)"""
+    return class_type[0] if class_type else DEFAULT_CATEGORY
+
+
+def game_impact(flare_class):
+    """تأثير التوهج على أنظمة اللعبة"""
+    return FLARE_IMPACTS.get(flare_class) or FLARE_IMPACTS[DEFAULT_CATEGORY]
+
+
+def risk_profile(class_type):
+    """الخطورة واللون والتأثيرات حسب نوع التوهج"""
+    return FLARE_RISKS.get(flare_category(class_type)) or FLARE_RISKS[DEFAULT_CATEGORY]
+
+
+def risk_profile_with_flair(class_type):
+    """نفس risk_profile مع الأيقونات"""
+    return (
+        FLARE_RISKS_WITH_FLAIR.get(flare_category(class_type))
+        or FLARE_RISKS_WITH_FLAIR[DEFAULT_CATEGORY]
+    )
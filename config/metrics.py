@@ -0,0 +1,376 @@
+"""
+Metrics بصيغة Prometheus (نص exposition 0.0.4) على /metrics
+
+Registry داخل العملية: Counter و Histogram مع labels. مع عدة gunicorn workers
+يُضبط METRICS_DIR (مجلد مشترك): كل عملية تكتب حالتها إلى metrics-<pid>.json
+و /metrics تجمع كل الملفات، فالقيم مجموع كل الـ workers بما فيها التي أُعيد
+تشغيلها. الكتابة من thread في الخلفية كل METRICS_FLUSH_INTERVAL ثانية (إذا تغير
+شيء) وعند خروج العملية، فتُحسب أيضاً العمليات بدون طلبات HTTP (ingestion_worker،
+run_scheduler) وآخر تحديثات worker توقف عن استقبال الطلبات.
+عملية جديدة بنفس pid عملية سابقة تكمل من ملفها حتى لا تنقص العدادات.
+
+/metrics مسموحة فقط من METRICS_ALLOWED_IPS (الافتراضي localhost)، أو بترويسة
+"Authorization: Bearer <METRICS_TOKEN>" إذا ضُبط.
+"""
+import atexit
+import glob
+import hmac
+import ipaddress
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core import checks
+from django.http import HttpResponse, HttpResponseForbidden
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+def format_labels(names, values):
+    if not names:
+        return ''
+    pairs = []
+    for name, value in zip(names, values):
+        escaped = str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+        pairs.append(f'{name}="{escaped}"')
+    return '{' + ','.join(pairs) + '}'
+
+
+class Metric:
+    type = None
+
+    def __init__(self, name, documentation, labelnames=(), registry=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+        self.registry = registry or REGISTRY
+        self.registry.register(self)
+
+    def key(self, labels):
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def describe(self):
+        return {'type': self.type, 'help': self.documentation, 'labelnames': list(self.labelnames)}
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self.key(labels)
+        with self.registry.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+        self.registry.changed()
+
+    def value(self, **labels):
+        return self.values.get(self.key(labels), 0)
+
+    @staticmethod
+    def copy(value):
+        return value
+
+    @staticmethod
+    def merge(current, other):
+        return current + other
+
+    @staticmethod
+    def samples(name, labelnames, key, value, buckets):
+        yield name, format_labels(labelnames, key), value
+
+
+class Histogram(Metric):
+    """value لكل labels: [عدد لكل bucket (غير تراكمي، آخرها +Inf), sum]"""
+
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS, registry=None):
+        self.buckets = tuple(buckets) + (float('inf'),)
+        super().__init__(name, documentation, labelnames, registry)
+
+    def observe(self, amount, **labels):
+        key = self.key(labels)
+        index = next(i for i, bound in enumerate(self.buckets) if amount <= bound)
+        with self.registry.lock:
+            value = self.values.get(key)
+            if value is None:
+                value = self.values[key] = [[0] * len(self.buckets), 0.0]
+            value[0][index] += 1
+            value[1] += amount
+        self.registry.changed()
+
+    @contextmanager
+    def time(self, **labels):
+        """مدة الـ block (context manager أو decorator)"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels):
+        value = self.values.get(self.key(labels))
+        return sum(value[0]) if value else 0
+
+    def describe(self):
+        return dict(super().describe(), buckets=[format_value(bound) for bound in self.buckets])
+
+    @staticmethod
+    def copy(value):
+        return [list(value[0]), value[1]]
+
+    @staticmethod
+    def merge(current, other):
+        return [[a + b for a, b in zip(current[0], other[0])], current[1] + other[1]]
+
+    @staticmethod
+    def samples(name, labelnames, key, value, buckets):
+        cumulative = 0
+        for bound, count in zip(buckets, value[0]):
+            cumulative += count
+            yield f'{name}_bucket', format_labels(labelnames + ['le'], list(key) + [bound]), cumulative
+        yield f'{name}_sum', format_labels(labelnames, key), value[1]
+        yield f'{name}_count', format_labels(labelnames, key), cumulative
+
+
+KINDS = {'counter': Counter, 'histogram': Histogram}
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = {}
+        self.lock = threading.Lock()
+        self.flusher_lock = threading.Lock()
+        self.flusher = None
+        self.dirty = False
+        self.resumed_pid = None
+        os.register_at_fork(after_in_child=self.reset_after_fork)
+        atexit.register(self.flush_at_exit)
+
+    def reset_after_fork(self):
+        """القيم الموروثة من العملية الأم تخصها (ومحسوبة في ملفها)"""
+        self.lock = threading.Lock()
+        self.flusher_lock = threading.Lock()
+        # الـ threads لا تنتقل مع fork
+        self.flusher = None
+        for metric in self.metrics.values():
+            metric.values = {}
+        self.dirty = False
+        self.resumed_pid = None
+
+    def register(self, metric):
+        self.metrics[metric.name] = metric
+
+    def directory(self):
+        return getattr(settings, 'METRICS_DIR', None)
+
+    def path(self, directory, pid=None):
+        return os.path.join(directory, f'metrics-{pid or os.getpid()}.json')
+
+    def state(self):
+        """الحالة القابلة للكتابة في ملف: {name: {type, help, labelnames, values}}"""
+        with self.lock:
+            return {
+                name: dict(
+                    metric.describe(),
+                    values=[[list(key), metric.copy(value)] for key, value in metric.values.items()],
+                )
+                for name, metric in self.metrics.items()
+            }
+
+    def resume(self, directory):
+        """عملية جديدة بنفس pid عملية منتهية: نكمل من ملفها إن وجد"""
+        pid = os.getpid()
+        if self.resumed_pid == pid:
+            return
+        self.resumed_pid = pid
+        try:
+            with open(self.path(directory, pid)) as handle:
+                previous = json.load(handle)
+        except (OSError, ValueError):
+            return
+        with self.lock:
+            for name, entry in previous.items():
+                metric = self.metrics.get(name)
+                if metric is None:
+                    continue
+                for key, value in entry['values']:
+                    key = tuple(key)
+                    metric.values[key] = metric.merge(metric.values[key], value) if key in metric.values else value
+
+    def flush(self):
+        directory = self.directory()
+        if not directory:
+            return
+        os.makedirs(directory, exist_ok=True)
+        self.resume(directory)
+
+        # قبل أخذ الحالة: أي تحديث بعدها يُكتب في المرة التالية
+        self.dirty = False
+        handle, temp_path = tempfile.mkstemp(dir=directory, prefix='.metrics-')
+        with os.fdopen(handle, 'w') as temp:
+            json.dump(self.state(), temp)
+        os.replace(temp_path, self.path(directory))
+
+    def changed(self):
+        """بعد كل تحديث: تشغيل thread الكتابة (مرة لكل عملية، فقط مع METRICS_DIR)"""
+        self.dirty = True
+        if self.flusher is None and self.directory():
+            with self.flusher_lock:
+                if self.flusher is None:
+                    self.flusher = threading.Thread(
+                        target=self.flush_periodically, name='metrics-flush', daemon=True
+                    )
+                    self.flusher.start()
+
+    def flush_periodically(self):
+        while True:
+            time.sleep(getattr(settings, 'METRICS_FLUSH_INTERVAL', 1.0))
+            if not self.dirty:
+                continue
+            try:
+                self.flush()
+            except OSError:
+                logger.exception('Could not write metrics to %s', self.directory())
+
+    def flush_at_exit(self):
+        if self.dirty:
+            try:
+                self.flush()
+            except OSError:
+                pass
+
+    def states(self):
+        directory = self.directory()
+        if not directory:
+            return [self.state()]
+
+        self.flush()
+        states = []
+        for path in sorted(glob.glob(os.path.join(directory, 'metrics-*.json'))):
+            try:
+                with open(path) as handle:
+                    states.append(json.load(handle))
+            except (OSError, ValueError):
+                continue
+        return states
+
+    def collect(self):
+        """دمج الحالات: {name: (description, {labels: value})}"""
+        merged = {}
+        for state in self.states():
+            for name, entry in state.items():
+                kind = KINDS[entry['type']]
+                description, values = merged.setdefault(name, (entry, {}))
+                for key, value in entry['values']:
+                    key = tuple(key)
+                    values[key] = kind.merge(values[key], value) if key in values else value
+        return merged
+
+    def exposition(self):
+        lines = []
+        for name, (description, values) in sorted(self.collect().items()):
+            kind = KINDS[description['type']]
+            lines.append(f'# HELP {name} {description["help"]}')
+            lines.append(f'# TYPE {name} {description["type"]}')
+            for key, value in sorted(values.items()):
+                for sample, labels, sample_value in kind.samples(
+                    name, description['labelnames'], key, value, description.get('buckets')
+                ):
+                    lines.append(f'{sample}{labels} {format_value(sample_value)}')
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+
+def scrape_allowed(request):
+    """
+    METRICS_TOKEN (Bearer) إذا ضُبط، وإلا (في DEBUG فقط) عنوان الطلب ضمن METRICS_ALLOWED_IPS
+
+    خلف reverse proxy على نفس الجهاز يكون REMOTE_ADDR لكل العملاء 127.0.0.1،
+    فالعنوان وحده لا يكفي في الإنتاج (انظر check_metrics_token).
+    """
+    token = getattr(settings, 'METRICS_TOKEN', None)
+    if token:
+        header = request.META.get('HTTP_AUTHORIZATION', '')
+        return hmac.compare_digest(header.encode(), f'Bearer {token}'.encode())
+    if not settings.DEBUG:
+        return False
+
+    try:
+        address = ipaddress.ip_address(request.META.get('REMOTE_ADDR', ''))
+    except ValueError:
+        return False
+    return any(
+        address in ipaddress.ip_network(network, strict=False)
+        for network in getattr(settings, 'METRICS_ALLOWED_IPS', ['127.0.0.1', '::1'])
+    )
+
+
+@checks.register(checks.Tags.security, deploy=True)
+def check_metrics_token(app_configs, **kwargs):
+    """/metrics مغلق تماماً في الإنتاج بدون METRICS_TOKEN"""
+    if getattr(settings, 'METRICS_TOKEN', None) or settings.DEBUG:
+        return []
+    return [checks.Error(
+        '/metrics rejects every scrape because METRICS_TOKEN is not set.',
+        hint='Set METRICS_TOKEN and send it as a Bearer token from the scraper.',
+        id='config.E002',
+    )]
+
+
+def metrics_view(request):
+    """GET /metrics"""
+    if not scrape_allowed(request):
+        return HttpResponseForbidden()
+    return HttpResponse(REGISTRY.exposition(), content_type=CONTENT_TYPE)
+
+
+# ====================================================================
+# Metrics المشروع
+# ====================================================================
+
+HTTP_REQUEST_SECONDS = Histogram(
+    'http_request_duration_seconds', 'API request latency by route', ['route', 'method'],
+)
+HTTP_REQUESTS = Counter(
+    'http_requests_total', 'API requests by route and status', ['route', 'method', 'status'],
+)
+CHART_RENDER_SECONDS = Histogram(
+    'chart_render_duration_seconds', 'Chart render time by chart type', ['chart'],
+)
+NASA_FETCH_SECONDS = Histogram(
+    'nasa_fetch_duration_seconds', 'NASA DONKI request latency', ['service'],
+)
+NASA_FETCH_ERRORS = Counter(
+    'nasa_fetch_errors_total', 'Failed NASA DONKI requests', ['service', 'reason'],
+)
+INGESTION_ROWS = Counter(
+    'ingestion_rows_total', 'Flares saved by ingestion (rate() gives rows per second)', ['source'],
+)
+INGESTION_SECONDS = Histogram(
+    'ingestion_duration_seconds', 'Time spent saving ingested flares', ['source'],
+)
+INGESTION_JOBS = Counter(
+    'ingestion_jobs_total', 'Ingestion jobs by source and state reached', ['source', 'status'],
+)
+LEADERBOARD_REBUILD_SECONDS = Histogram(
+    'leaderboard_rebuild_duration_seconds', 'Leaderboard rebuild time',
+)
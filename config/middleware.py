@@ -0,0 +1,525 @@
+"""
+Middleware مشتركة للمشروع
+"""
+import abc
+import json
+import logging
+import random
+import threading
+import time
+import zlib
+from collections import Counter
+
+from importlib import import_module
+from types import SimpleNamespace
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib import auth
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.exceptions import AuthenticationFailed
+
+from . import db_routers, metrics, profiling, timing
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+timing_logger = logging.getLogger('config.timing')
+
+
+class SyncAsyncMiddleware(abc.ABC):
+    """
+    أساس middleware تعمل مع WSGI و ASGI
+
+    تحت ASGI مع view غير متزامنة (async def) تبقى السلسلة كلها على الـ event loop
+    بدلاً من تشغيل كل middleware متزامنة في thread.
+
+    الصنف الفرعي يعرّف handle و __acall__ معاً (abstract)، فنسيان أحدهما يفشل
+    عند تحميل الـ middleware وليس في أول طلب بهذا النوع.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return self.handle(request)
+
+    @abc.abstractmethod
+    def handle(self, request):
+        """مسار WSGI / view متزامنة"""
+
+    @abc.abstractmethod
+    async def __acall__(self, request):
+        """مسار ASGI مع view غير متزامنة"""
+
+
+# ====================================================================
+# Compression
+# ====================================================================
+
+class GzipCodec:
+    name = 'gzip'
+
+    def compress(self, data, level):
+        compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+        return compressor.compress(data) + compressor.flush()
+
+    def stream(self, level):
+        compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+        return (
+            lambda chunk: compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH),
+            compressor.flush,
+        )
+
+
+class BrotliCodec:
+    name = 'br'
+
+    def compress(self, data, level):
+        return brotli.compress(data, quality=level)
+
+    def stream(self, level):
+        compressor = brotli.Compressor(quality=level)
+        return (
+            lambda chunk: compressor.process(chunk) + compressor.flush(),
+            compressor.finish,
+        )
+
+
+class ZstdCodec:
+    name = 'zstd'
+
+    def compress(self, data, level):
+        return zstandard.ZstdCompressor(level=level).compress(data)
+
+    def stream(self, level):
+        compressor = zstandard.ZstdCompressor(level=level).compressobj()
+        return (
+            lambda chunk: compressor.compress(chunk) + compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK),
+            compressor.flush,
+        )
+
+
+CODECS = {'gzip': GzipCodec()}
+if brotli is not None:
+    CODECS['br'] = BrotliCodec()
+if zstandard is not None:
+    CODECS['zstd'] = ZstdCodec()
+
+
+def parse_accept_encoding(header):
+    """Accept-Encoding -> {encoding: q}"""
+    accepted = {}
+    for part in header.split(','):
+        name, _, params = part.strip().partition(';')
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name.strip().lower()] = q
+    return accepted
+
+
+class CPUBudget:
+    """
+    ميزانية CPU للضغط (token bucket)
+
+    budget: نسبة من CPU واحد مسموح صرفها على الضغط (0.25 = 250ms كل ثانية).
+    عند انخفاض الرصيد نستخدم مستوى ضغط أسرع، وعند نفاده نرسل بدون ضغط.
+    """
+
+    def __init__(self, budget, burst_seconds=1.0):
+        self.rate = budget
+        self.capacity = budget * burst_seconds
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def available(self):
+        """الرصيد المتبقي كنسبة من السعة"""
+        with self.lock:
+            self._refill()
+            return self.tokens / self.capacity if self.capacity else 0.0
+
+    def spend(self, seconds):
+        with self.lock:
+            self._refill()
+            self.tokens -= seconds
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """
+    ضغط الاستجابات حسب Accept-Encoding (zstd / br / gzip)
+
+    - لا تُضغط الاستجابات الأصغر من COMPRESSION_MIN_SIZE
+    - لا يُعاد ضغط المحتوى المضغوط أصلاً (PNG و ZIP ...) أو ما له Content-Encoding
+    - لا تُضغط text/html افتراضياً (BREACH): صفحات الـ admin والـ browsable API
+      فيها CSRF token بجانب مدخلات المستخدم، ولا يوجد padding عشوائي مثل
+      GZipMiddleware في Django لـ br / zstd
+    - الاستجابات المتدفقة (StreamingHttpResponse) تُضغط قطعة بقطعة
+    - COMPRESSION_CPU_BUDGET يحدد أقصى وقت CPU للضغط في الثانية
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.min_size = getattr(settings, 'COMPRESSION_MIN_SIZE', 1024)
+        self.preference = [
+            name for name in getattr(settings, 'COMPRESSION_ALGORITHMS', ['zstd', 'br', 'gzip'])
+            if name in CODECS
+        ]
+        self.levels = {'zstd': 3, 'br': 4, 'gzip': 6, **getattr(settings, 'COMPRESSION_LEVELS', {})}
+        self.fast_levels = {'zstd': 1, 'br': 1, 'gzip': 1, **getattr(settings, 'COMPRESSION_FAST_LEVELS', {})}
+        self.excluded_types = tuple(getattr(settings, 'COMPRESSION_EXCLUDED_CONTENT_TYPES', (
+            'text/html', 'image/', 'video/', 'audio/', 'font/woff',
+            'application/zip', 'application/gzip', 'application/x-gzip',
+            'application/zstd', 'application/pdf', 'application/octet-stream',
+        )))
+        self.budget = CPUBudget(getattr(settings, 'COMPRESSION_CPU_BUDGET', 0.5))
+
+    def choose_codec(self, request):
+        accepted = parse_accept_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        wildcard = accepted.get('*', 0)
+        for name in self.preference:
+            if accepted.get(name, wildcard) > 0:
+                return CODECS[name]
+        return None
+
+    def choose_level(self, codec):
+        available = self.budget.available()
+        if available <= 0:
+            return None
+        if available < 0.5:
+            return self.fast_levels[codec.name]
+        return self.levels[codec.name]
+
+    def is_compressible(self, response):
+        content_type = response.get('Content-Type', '').split(';')[0].strip().lower()
+        return not content_type.startswith(self.excluded_types) or content_type == 'image/svg+xml'
+
+    def process_response(self, request, response):
+        if not getattr(settings, 'COMPRESSION_ENABLED', True):
+            return response
+
+        if not response.streaming and len(response.content) < self.min_size:
+            return response
+
+        if response.has_header('Content-Encoding') or not self.is_compressible(response):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+
+        codec = self.choose_codec(request)
+        if codec is None:
+            return response
+
+        level = self.choose_level(codec)
+        if level is None:
+            return response
+
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = self._compress_async(
+                    response.streaming_content, codec, level
+                )
+            else:
+                response.streaming_content = self._compress_sequence(
+                    response.streaming_content, codec, level
+                )
+            del response.headers['Content-Length']
+        else:
+            start = time.thread_time()
+            compressed = codec.compress(response.content, level)
+            self.budget.spend(time.thread_time() - start)
+
+            if len(compressed) >= len(response.content):
+                return response
+
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = codec.name
+
+        return response
+
+    def _compress_sequence(self, sequence, codec, level):
+        compress, finish = codec.stream(level)
+        for chunk in sequence:
+            start = time.thread_time()
+            data = compress(chunk)
+            self.budget.spend(time.thread_time() - start)
+            if data:
+                yield data
+        yield finish()
+
+    async def _compress_async(self, sequence, codec, level):
+        compress, finish = codec.stream(level)
+        async for chunk in sequence:
+            start = time.thread_time()
+            data = compress(chunk)
+            self.budget.spend(time.thread_time() - start)
+            if data:
+                yield data
+        yield finish()
+
+
+# ====================================================================
+# Read replicas
+# ====================================================================
+
+class PrimaryPinningMiddleware(SyncAsyncMiddleware):
+    """
+    توجيه قراءات الطلب (انظر config.db_routers)
+
+    الطلبات غير الآمنة (POST/PUT/PATCH/DELETE) والطلبات التي تحمل cookie
+    الـ pin تقرأ من الـ primary. إذا كتب الطلب شيئاً نضع الـ cookie لمدة
+    REPLICA_PIN_SECONDS.
+    """
+
+    COOKIE_NAME = 'db_primary_pin'
+
+    def use_primary(self, request):
+        return (
+            request.method not in ('GET', 'HEAD', 'OPTIONS')
+            or self.COOKIE_NAME in request.COOKIES
+        )
+
+    def handle(self, request):
+        token = db_routers.begin_request(self.use_primary(request))
+        try:
+            response = self.get_response(request)
+        finally:
+            wrote = db_routers.end_request(token)
+        return self.pin(response, wrote)
+
+    async def __acall__(self, request):
+        token = db_routers.begin_request(self.use_primary(request))
+        try:
+            response = await self.get_response(request)
+        finally:
+            wrote = db_routers.end_request(token)
+        return self.pin(response, wrote)
+
+    def pin(self, response, wrote):
+        if wrote and db_routers.replicas():
+            response.set_cookie(
+                self.COOKIE_NAME, '1',
+                max_age=getattr(settings, 'REPLICA_PIN_SECONDS', 5),
+                httponly=True, samesite='Lax',
+            )
+        return response
+
+
+# ====================================================================
+# Server-Timing
+# ====================================================================
+
+def request_user(request):
+    """
+    المستخدم قبل AuthenticationMiddleware (من الـ session أو DRF Token)
+
+    للترويسات التي تفعّل عملاً إضافياً (توقيت / profile) ويجب فحص صلاحيتها قبل
+    تشغيل الطلب. تُستدعى فقط للطلبات التي تحمل هذه الترويسات.
+    """
+    user = getattr(request, 'user', None)
+    if user is not None:
+        return user
+
+    session_key = request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+    if session_key:
+        session = import_module(settings.SESSION_ENGINE).SessionStore(session_key)
+        user = auth.get_user(SimpleNamespace(session=session))
+        if user.is_authenticated:
+            return user
+
+    try:
+        authenticated = TokenAuthentication().authenticate(request)
+    except AuthenticationFailed:
+        return None
+    return authenticated[0] if authenticated else None
+
+
+def may_force(request):
+    """ترويسات الفرض مسموحة في DEBUG أو لمستخدم staff"""
+    if settings.DEBUG:
+        return True
+    user = request_user(request)
+    return bool(user is not None and user.is_staff)
+
+
+class ServerTimingMiddleware(SyncAsyncMiddleware):
+    """
+    توقيت الأقسام لعينة من الطلبات (انظر config.timing)
+
+    نسبة العينة TIMING_SAMPLE_RATE، ويمكن طلب التوقيت لطلب واحد بترويسة
+    X-Server-Timing (في DEBUG أو لمستخدم staff فقط). النتيجة في ترويسة
+    Server-Timing وسطر JSON على logger "config.timing".
+    """
+
+    FORCE_HEADER = 'HTTP_X_SERVER_TIMING'
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.sample_rate = getattr(settings, 'TIMING_SAMPLE_RATE', 0.01)
+
+    def sampled(self):
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def handle(self, request):
+        # الصلاحية تُفحص قبل التوقيت، فالطلبات غير المسموحة لا تدفع تكلفته
+        if not (self.sampled() or (self.FORCE_HEADER in request.META and may_force(request))):
+            return self.get_response(request)
+
+        with timing.collect() as timings:
+            response = self.get_response(request)
+        return self.finish(request, response, timings)
+
+    async def __acall__(self, request):
+        # may_force قد يقرأ الـ session من القاعدة
+        if not (self.sampled() or (self.FORCE_HEADER in request.META and await sync_to_async(may_force)(request))):
+            return await self.get_response(request)
+
+        with timing.collect() as timings:
+            response = await self.get_response(request)
+        return self.finish(request, response, timings)
+
+    def finish(self, request, response, timings):
+        response['Server-Timing'] = timings.header()
+        timing_logger.info(json.dumps(self.log_record(request, response, timings)))
+        return response
+
+    def log_record(self, request, response, timings):
+        match = getattr(request, 'resolver_match', None)
+        return {
+            'method': request.method,
+            'path': request.path,
+            'view': match.view_name if match else None,
+            'status': response.status_code,
+            'total_ms': round(timings.total() * 1000, 3),
+            'sections': timings.as_dict(),
+        }
+
+
+# ====================================================================
+# Metrics
+# ====================================================================
+
+class MetricsMiddleware(SyncAsyncMiddleware):
+    """زمن كل طلب حسب الـ route (اسم الـ URL) في config.metrics"""
+
+    def handle(self, request):
+        start = time.perf_counter()
+        response = self.get_response(request)
+        return self.observe(request, response, time.perf_counter() - start)
+
+    async def __acall__(self, request):
+        start = time.perf_counter()
+        response = await self.get_response(request)
+        return self.observe(request, response, time.perf_counter() - start)
+
+    def observe(self, request, response, elapsed):
+        match = getattr(request, 'resolver_match', None)
+        route = (match.view_name or match.route) if match else 'unmatched'
+        metrics.HTTP_REQUEST_SECONDS.observe(elapsed, route=route, method=request.method)
+        metrics.HTTP_REQUESTS.inc(route=route, method=request.method, status=response.status_code)
+        return response
+
+
+# ====================================================================
+# Profiling
+# ====================================================================
+
+class ProfilingMiddleware(SyncAsyncMiddleware):
+    """
+    profile تلقائي للطلبات البطيئة (انظر config.profiling)
+
+    مع PROFILER_ENABLED تُؤخذ عينات من كل طلب وتُحفظ فقط إذا تجاوز
+    PROFILER_SLOW_MS. الترويسة "X-Profile: cprofile|sample" تحفظ profile للطلب
+    مهما كانت مدته (في DEBUG أو لمستخدم staff فقط). الـ id في ترويسة X-Profile-Id.
+
+    الطلبات غير المتزامنة (ASGI) لا تُحلل: كلها تعمل على thread الـ event loop
+    نفسه فتختلط عيناتها.
+    """
+
+    FORCE_HEADER = 'HTTP_X_PROFILE'
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.enabled = getattr(settings, 'PROFILER_ENABLED', False)
+        self.slow_seconds = getattr(settings, 'PROFILER_SLOW_MS', 1000) / 1000
+        self.top_n = getattr(settings, 'PROFILER_TOP_N', 15)
+
+    async def __acall__(self, request):
+        return await self.get_response(request)
+
+    def handle(self, request):
+        mode = request.META.get(self.FORCE_HEADER, '').strip().lower()
+        # الصلاحية قبل cProfile: بدونها الطلب يُعامل كطلب عادي (عينات إذا كان مفعلاً)
+        forced = mode in ('cprofile', 'sample') and may_force(request)
+        if not forced:
+            mode = 'sample'
+            if not self.enabled:
+                return self.get_response(request)
+
+        profile = None
+        start = time.perf_counter()
+        if mode == 'cprofile':
+            with profiling.cprofiled() as profile:
+                response = self.get_response(request)
+        else:
+            with profiling.sampler().sample() as samples:
+                response = self.get_response(request)
+        elapsed = time.perf_counter() - start
+
+        if not forced and elapsed < self.slow_seconds:
+            return response
+
+        if profile is not None:
+            stacks = profiling.cprofile_stacks(profile)
+            top = profiling.cprofile_top(profile, self.top_n)
+        else:
+            # cprofile مع profiler آخر نشط: لا توجد عينات
+            stacks = Counter() if mode == 'cprofile' else samples
+            top = profiling.top_functions(stacks, self.top_n)
+
+        match = getattr(request, 'resolver_match', None)
+        response['X-Profile-Id'] = profiling.store({
+            'method': request.method,
+            'path': request.path,
+            'view': match.view_name if match else None,
+            'status': response.status_code,
+            'duration_ms': round(elapsed * 1000, 3),
+            'mode': 'cprofile' if profile is not None else 'sample',
+            'forced': forced,
+            'top': top,
+        }, stacks, profile)
+        return response
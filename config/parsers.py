@@ -0,0 +1,22 @@
+"""
+Parsers للـ API
+"""
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover
+    msgpack = None
+
+
+class MessagePackParser(BaseParser):
+    """قراءة الطلبات بصيغة MessagePack"""
+
+    media_type = 'application/msgpack'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return msgpack.unpackb(stream.read(), raw=False, strict_map_key=False)
+        except Exception as exc:
+            raise ParseError(f'MessagePack parse error - {exc}')
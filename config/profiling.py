@@ -0,0 +1,216 @@
+"""
+Profiling للطلبات البطيئة
+
+- sampling: thread خلفي يأخذ كل PROFILER_INTERVAL_MS مكدس (stack) كل طلب
+  جارٍ من sys._current_frames(). إذا تجاوز الطلب PROFILER_SLOW_MS تُحفظ العينات
+  بصيغة collapsed stacks (سطر لكل مكدس: "a;b;c <عدد>") الجاهزة لـ
+  flamegraph.pl و speedscope، وإلا تُهمل. التكلفة على الطلب تسجيل الـ thread فقط.
+- cProfile: لطلب واحد بترويسة "X-Profile: cprofile" (ملف .prof لـ pstats /
+  snakeviz) مع collapsed stacks تقريبية من علاقات caller -> callee.
+
+كل ملف يُسجَّل في index.json (الأحدث أولاً، أقصى PROFILER_MAX_PROFILES) مع أعلى
+PROFILER_TOP_N دوال، والأقدم يُحذف. أمر "manage.py profiles" يعرض الفهرس.
+"""
+import cProfile
+import json
+import os
+import pstats
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from itertools import count
+
+from django.conf import settings
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+INDEX_FILE = 'index.json'
+_sequence = count(1)
+
+
+def profiles_dir():
+    directory = getattr(settings, 'PROFILER_DIR', None) or os.path.join(
+        tempfile.gettempdir(), f'solar-defender-profiles-{os.getuid()}'
+    )
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+
+def frame_name(code):
+    """module:function (اسم الملف بدون المسار الكامل)"""
+    filename = code.co_filename
+    for root in sys.path:
+        if root and filename.startswith(root + os.sep):
+            filename = filename[len(root) + 1:]
+            break
+    return f'{filename}:{getattr(code, "co_qualname", code.co_name)}'
+
+
+def collapse(frame):
+    """مكدس frame من الجذر إلى الورقة مفصولاً بـ ;"""
+    names = []
+    while frame is not None:
+        names.append(frame_name(frame.f_code))
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+class Sampler:
+    """thread واحد يأخذ عينات من كل الطلبات المسجلة"""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.active = {}
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def ensure_running(self):
+        if self.thread is None or not self.thread.is_alive():
+            self.thread = threading.Thread(target=self.run, name='request-sampler', daemon=True)
+            self.thread.start()
+
+    def run(self):
+        while True:
+            time.sleep(self.interval)
+            with self.lock:
+                if not self.active:
+                    continue
+                frames = sys._current_frames()
+                for thread_id, samples in self.active.items():
+                    frame = frames.get(thread_id)
+                    if frame is not None:
+                        samples[collapse(frame)] += 1
+
+    @contextmanager
+    def sample(self):
+        """عينات الـ thread الحالي داخل هذا الـ block (Counter: مكدس -> عدد)"""
+        thread_id = threading.get_ident()
+        samples = Counter()
+        with self.lock:
+            self.active[thread_id] = samples
+        self.ensure_running()
+        try:
+            yield samples
+        finally:
+            with self.lock:
+                self.active.pop(thread_id, None)
+
+
+_sampler = None
+
+
+def sampler():
+    global _sampler
+    if _sampler is None:
+        _sampler = Sampler(getattr(settings, 'PROFILER_INTERVAL_MS', 10) / 1000)
+    return _sampler
+
+
+@contextmanager
+def cprofiled():
+    """cProfile للـ thread الحالي (None إذا كان profiler آخر يعمل)"""
+    profile = cProfile.Profile()
+    try:
+        profile.enable()
+    except ValueError:
+        yield None
+        return
+    try:
+        yield profile
+    finally:
+        profile.disable()
+
+
+def top_functions(samples, limit):
+    """أعلى الدوال حسب العينات التي كانت فيها الورقة (self time)"""
+    leaves = Counter()
+    for stack, hits in samples.items():
+        leaves[stack.rsplit(';', 1)[-1]] += hits
+    return leaves.most_common(limit)
+
+
+def cprofile_stacks(profile):
+    """collapsed stacks تقريبية من cProfile (كل caller -> callee بوقته الذاتي بالـ µs)"""
+    stats = pstats.Stats(profile).stats
+    names = {func: f'{os.path.basename(func[0])}:{func[2]}' for func in stats}
+    stacks = Counter()
+    for func, (_, _, tottime, _, callers) in stats.items():
+        micros = int(tottime * 1_000_000)
+        if not micros:
+            continue
+        if not callers:
+            stacks[names[func]] += micros
+            continue
+        total = sum(caller[3] for caller in callers.values()) or 1
+        for caller, caller_stats in callers.items():
+            stacks[f'{names.get(caller, caller[2])};{names[func]}'] += int(micros * caller_stats[3] / total)
+    return stacks
+
+
+def cprofile_top(profile, limit):
+    stats = pstats.Stats(profile).stats
+    ranked = sorted(stats.items(), key=lambda item: item[1][2], reverse=True)[:limit]
+    return [
+        (f'{os.path.basename(func[0])}:{func[2]}', round(values[2] * 1000, 3))
+        for func, values in ranked
+    ]
+
+
+@contextmanager
+def _locked_index(directory):
+    with open(os.path.join(directory, 'index.lock'), 'w') as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        yield os.path.join(directory, INDEX_FILE)
+
+
+def read_index(directory=None):
+    path = os.path.join(directory or profiles_dir(), INDEX_FILE)
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return []
+
+
+def store(meta, stacks, profile=None):
+    """
+    حفظ profile وإضافته إلى الفهرس، ترجع الـ id
+
+    meta: method / path / view / status / duration_ms / mode / top
+    stacks: {مكدس collapsed: عدد}
+    """
+    directory = profiles_dir()
+    view = (meta.get('view') or 'unmatched').replace(':', '-').replace('/', '-')
+    profile_id = f'{time.strftime("%Y%m%d-%H%M%S")}-{os.getpid()}-{next(_sequence)}-{view}'
+
+    with open(os.path.join(directory, f'{profile_id}.folded'), 'w') as f:
+        for stack, hits in sorted(stacks.items(), key=lambda item: item[1], reverse=True):
+            f.write(f'{stack} {hits}\n')
+    files = [f'{profile_id}.folded']
+    if profile is not None:
+        profile.dump_stats(os.path.join(directory, f'{profile_id}.prof'))
+        files.append(f'{profile_id}.prof')
+
+    entry = dict(meta, id=profile_id, files=files, created=time.time())
+    with _locked_index(directory) as index_path:
+        index = [entry] + read_index(directory)
+        keep = getattr(settings, 'PROFILER_MAX_PROFILES', 200)
+        for old in index[keep:]:
+            for name in old.get('files', []):
+                try:
+                    os.remove(os.path.join(directory, name))
+                except OSError:
+                    pass
+        temp_path = f'{index_path}.{os.getpid()}.{threading.get_ident()}'
+        with open(temp_path, 'w') as f:
+            json.dump(index[:keep], f, indent=1)
+        os.replace(temp_path, index_path)
+
+    return profile_id
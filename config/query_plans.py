@@ -0,0 +1,59 @@
+"""
+فحص خطط الاستعلام (EXPLAIN) للاستعلامات الساخنة
+
+full_scans(queryset) ترجع أسطر الخطة التي تقرأ الجدول كاملاً:
+- SQLite: "SCAN <table>" بدون index، أو "SCAN <table> USING INDEX" (المرور على
+  كل الصفوف بترتيب الـ index) إلا إذا كان للاستعلام LIMIT أو كان الـ index
+  جزئياً (partial index يحتوي الصفوف المطلوبة فقط)
+- PostgreSQL: "Seq Scan"
+مسح COVERING INDEX (مثلاً لـ GROUP BY) مسموح لأنه لا يقرأ صفوف الجدول.
+"""
+import re
+
+from django.db import connection
+
+SQLITE_FULL_SCAN = re.compile(r'\bSCAN (?!CONSTANT ROW)(?!.*\bUSING\b.*\bINDEX\b)')
+SQLITE_INDEX_SCAN = re.compile(r'\bSCAN (\S+) USING INDEX (\S+)')
+SQLITE_TEMP_SORT = re.compile(r'USE TEMP B-TREE FOR (?:RIGHT PART OF )?ORDER BY')
+POSTGRES_FULL_SCAN = re.compile(r'\bSeq Scan\b')
+
+
+def explain(queryset):
+    """نص خطة الاستعلام"""
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            # الجداول الصغيرة في الاختبارات تجعل Seq Scan أرخص دائماً
+            cursor.execute('SET LOCAL enable_seqscan = off')
+    return queryset.explain()
+
+
+def _is_partial_index(table, index):
+    with connection.cursor() as cursor:
+        cursor.execute(f'PRAGMA index_list({connection.ops.quote_name(table)})')
+        return any(row[1] == index and row[4] for row in cursor.fetchall())
+
+
+def _is_full_index_scan(line):
+    match = SQLITE_INDEX_SCAN.search(line)
+    return match is not None and not _is_partial_index(*match.groups())
+
+
+def full_scans(queryset):
+    """أسطر الخطة التي تمسح الجدول كاملاً"""
+    lines = explain(queryset).splitlines()
+
+    if connection.vendor == 'postgresql':
+        return [line for line in lines if POSTGRES_FULL_SCAN.search(line)]
+
+    check_index_scans = not queryset.query.is_sliced
+    return [
+        line for line in lines
+        if SQLITE_FULL_SCAN.search(line) or (check_index_scans and _is_full_index_scan(line))
+    ]
+
+
+def temp_sorts(queryset):
+    """أسطر الخطة التي تحتاج ترتيباً مؤقتاً بدلاً من ترتيب الـ index (SQLite فقط)"""
+    if connection.vendor != 'sqlite':
+        return []
+    return [line for line in explain(queryset).splitlines() if SQLITE_TEMP_SORT.search(line)]
@@ -0,0 +1,147 @@
+"""
+Renderers للـ API
+
+FastJSONRenderer: نفس ناتج rest_framework.renderers.JSONRenderer (compact + UTF-8)
+لكن الترميز يتم في C عبر orjson. يدعم datetime و Decimal و NumPy مباشرة. إذا لم
+يكن orjson مثبتاً أو طُلب indent (مثل الـ Browsable API) نرجع إلى الـ renderer الافتراضي.
+
+MessagePackRenderer: صيغة ثنائية مضغوطة لتطبيق Flutter، والصور (DataURI)
+تُرسل كبايتات خام بدلاً من base64.
+"""
+import base64
+import datetime
+import decimal
+
+from django.db.models.query import QuerySet
+from django.utils.encoding import force_str
+from django.utils.functional import Promise
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+from .timing import timed
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover
+    msgpack = None
+
+
+class DataURI(str):
+    """
+    ملف ثنائي (مثل صورة PNG) كنص data URI
+
+    في JSON يظهر كنص data:<mime>;base64,... كما هو، أما MessagePackRenderer
+    فيرسل البايتات الخام من .data مباشرة.
+    """
+
+    def __new__(cls, data, mime_type='image/png'):
+        obj = super().__new__(cls, f'data:{mime_type};base64,{base64.b64encode(data).decode()}')
+        obj.data = data
+        obj.mime_type = mime_type
+        return obj
+
+    def __reduce__(self):
+        return (DataURI, (self.data, self.mime_type))
+
+
+def default(obj):
+    """الأنواع التي لا يدعمها orjson مباشرة (بنفس منطق DRF JSONEncoder)"""
+    if isinstance(obj, Promise):
+        return force_str(obj)
+    elif isinstance(obj, decimal.Decimal):
+        return float(obj)
+    elif isinstance(obj, datetime.timedelta):
+        return str(obj.total_seconds())
+    elif isinstance(obj, QuerySet):
+        return list(obj)
+    elif isinstance(obj, bytes):
+        return obj.decode()
+    elif hasattr(obj, 'tolist'):
+        return obj.tolist()
+    elif hasattr(obj, '__getitem__'):
+        cls = list if isinstance(obj, (list, tuple)) else dict
+        try:
+            return cls(obj)
+        except Exception:
+            pass
+    elif hasattr(obj, '__iter__'):
+        return list(obj)
+    raise TypeError(f'Type is not JSON serializable: {type(obj).__name__}')
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer يستخدم orjson"""
+
+    if orjson is not None:
+        options = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z
+
+    @timed('render')
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        if data is None:
+            return b''
+
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        ret = orjson.dumps(data, default=default, option=self.options)
+
+        # مثل DRF: نفس escape لـ U+2028 و U+2029
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+
+def msgpack_default(obj):
+    """
+    الأنواع غير الأساسية في MessagePack
+
+    نستخدم strict_types لكي تصل DataURI إلى هنا (وليس كنص عادي)، لذلك
+    الأنواع الفرعية مثل OrderedDict و ReturnList تُحوَّل هنا أيضاً.
+    """
+    if isinstance(obj, DataURI):
+        return obj.data
+    elif isinstance(obj, str):
+        return str(obj)
+    elif isinstance(obj, dict):
+        return dict(obj)
+    elif isinstance(obj, (list, tuple)):
+        return list(obj)
+    elif isinstance(obj, bool):
+        return bool(obj)
+    elif isinstance(obj, int):
+        return int(obj)
+    elif isinstance(obj, float):
+        return float(obj)
+    elif isinstance(obj, datetime.datetime):
+        representation = obj.isoformat()
+        if representation.endswith('+00:00'):
+            representation = representation[:-6] + 'Z'
+        return representation
+    elif isinstance(obj, (datetime.date, datetime.time)):
+        return obj.isoformat()
+    return default(obj)
+
+
+class MessagePackRenderer(BaseRenderer):
+    """Renderer بصيغة MessagePack"""
+
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    @timed('render')
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        return msgpack.packb(
+            data, default=msgpack_default, use_bin_type=True, strict_types=True
+        )
@@ -12,7 +12,7 @@ https://docs.djangoproject.com/en/4.2/ref/settings/
 
 import os
 from pathlib import Path
-from decouple import config
+from decouple import Csv, config
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -72,8 +72,13 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'config.middleware.ServerTimingMiddleware',
+    'config.middleware.MetricsMiddleware',
+    'config.middleware.ProfilingMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'config.middleware.CompressionMiddleware',
+    'config.middleware.PrimaryPinningMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -82,6 +87,93 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Response compression (zstd/br are used when zstandard/brotli are installed)
+COMPRESSION_ENABLED = config('COMPRESSION_ENABLED', default=True, cast=bool)
+COMPRESSION_MIN_SIZE = config('COMPRESSION_MIN_SIZE', default=1024, cast=int)
+# Fraction of one CPU core that may be spent compressing (0.5 = 500ms/s)
+COMPRESSION_CPU_BUDGET = config('COMPRESSION_CPU_BUDGET', default=0.5, cast=float)
+COMPRESSION_ALGORITHMS = ['zstd', 'br', 'gzip']
+
+# LocMemCache للتطوير فقط: مع عدة عمليات (gunicorn workers، ingestion_worker،
+# run_scheduler) يجب cache مشترك، وإلا check --deploy يفشل (config.caching)
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='solar-defender'),
+    }
+}
+CACHE_SINGLE_PROCESS = config('CACHE_SINGLE_PROCESS', default=False, cast=bool)
+
+# Cache نتائج الـ endpoints التجميعية (يُبطل تلقائياً مع كل كتابة)
+QUERY_CACHE_ENABLED = config('QUERY_CACHE_ENABLED', default=True, cast=bool)
+QUERY_CACHE_MAX_ENTRIES = config('QUERY_CACHE_MAX_ENTRIES', default=256, cast=int)
+QUERY_CACHE_TTL = config('QUERY_CACHE_TTL', default=60, cast=int)
+
+# دمج الطلبات المتطابقة المتزامنة (single-flight) داخل العملية وبين الـ workers
+SINGLEFLIGHT_CROSS_PROCESS = config('SINGLEFLIGHT_CROSS_PROCESS', default=True, cast=bool)
+# مجلد خاص (ملك المستخدم، 0o700)؛ الافتراضي في tempdir ويُرفض إذا لم يكن خاصاً
+SINGLEFLIGHT_DIR = config('SINGLEFLIGHT_DIR', default='') or None
+SINGLEFLIGHT_TIMEOUT = config('SINGLEFLIGHT_TIMEOUT', default=30, cast=int)
+
+# Server-Timing لنسبة من الطلبات (db / serialize / render / chart / nasa) مع سطر
+# JSON على logger "config.timing"؛ 1.0 = كل الطلبات، 0 = فقط الطلبات التي تحمل
+# X-Server-Timing (في DEBUG أو لمستخدم staff)
+TIMING_SAMPLE_RATE = config('TIMING_SAMPLE_RATE', default=1.0 if DEBUG else 0.01, cast=float)
+
+# Prometheus metrics على /metrics؛ مع عدة gunicorn workers يُضبط METRICS_DIR
+# على مجلد مشترك (فارغ عند كل deploy) لتجميع كل العمليات
+METRICS_DIR = config('METRICS_DIR', default='') or None
+METRICS_FLUSH_INTERVAL = config('METRICS_FLUSH_INTERVAL', default=1.0, cast=float)
+# من يستطيع قراءة /metrics: Bearer token للـ scraper (مطلوب عندما DEBUG=False)،
+# أو في DEBUG فقط بدونه: عناوين / شبكات (CIDR)
+METRICS_ALLOWED_IPS = config('METRICS_ALLOWED_IPS', default='127.0.0.1,::1', cast=Csv())
+METRICS_TOKEN = config('METRICS_TOKEN', default='') or None
+
+# Probes: /api/health/live/ و /api/health/ready/؛ الـ readiness تفشل عند تأخر
+# آخر جلب من NASA أكثر من هذه المدة (ثوانٍ، 0 = للعرض فقط)
+READINESS_MAX_INGESTION_AGE = config('READINESS_MAX_INGESTION_AGE', default=0, cast=int)
+# مدة تخزين أعداد الصفوف التقديرية في /api/health/
+ROW_ESTIMATE_TTL = config('ROW_ESTIMATE_TTL', default=300, cast=int)
+
+# Profiles للطلبات الأبطأ من PROFILER_SLOW_MS (sampling كل PROFILER_INTERVAL_MS)
+# أو لطلب واحد بترويسة "X-Profile: cprofile|sample"؛ تُحفظ في PROFILER_DIR
+# (collapsed stacks لـ flamegraph + .prof) مع index.json، وتُعرض بأمر profiles
+PROFILER_ENABLED = config('PROFILER_ENABLED', default=True, cast=bool)
+PROFILER_SLOW_MS = config('PROFILER_SLOW_MS', default=1000, cast=int)
+PROFILER_INTERVAL_MS = config('PROFILER_INTERVAL_MS', default=10, cast=int)
+PROFILER_TOP_N = config('PROFILER_TOP_N', default=15, cast=int)
+PROFILER_MAX_PROFILES = config('PROFILER_MAX_PROFILES', default=200, cast=int)
+PROFILER_DIR = config('PROFILER_DIR', default='') or None
+
+# مهام الجلب من NASA (POST /api/ingestion-jobs/): "thread" = thread pool داخل
+# عملية الويب، "worker" = أمر ingestion_worker في عملية منفصلة
+INGESTION_EXECUTOR = config('INGESTION_EXECUTOR', default='thread')
+INGESTION_WORKERS = config('INGESTION_WORKERS', default=2, cast=int)
+# المهمة التي لم تنتهِ خلال هذه المدة (ثوانٍ) تُعلَّم فاشلة
+INGESTION_JOB_TIMEOUT = config('INGESTION_JOB_TIMEOUT', default=600, cast=int)
+# أقل مدة (ثوانٍ) بين آخر مهمة ناجحة ومهمة جديدة من الـ API لنفس المصدر
+INGESTION_MIN_INTERVAL = config('INGESTION_MIN_INTERVAL', default=300, cast=int)
+
+# المهام الدورية لأمر run_scheduler (ثوانٍ؛ interval 0 = معطلة). يمكن تشغيل الأمر
+# على عدة nodes: قفل في القاعدة لكل مهمة يمنع التنفيذ المتداخل
+SCHEDULER_TASKS = {
+    'ingest_nasa': {
+        'interval': config('SCHEDULE_INGEST_NASA', default=3600, cast=int),
+        'jitter': 300,
+    },
+    'update_leaderboard': {
+        'interval': config('SCHEDULE_UPDATE_LEADERBOARD', default=300, cast=int),
+        'jitter': 30,
+    },
+    'generate_report': {
+        'interval': config('SCHEDULE_GENERATE_REPORT', default=3600, cast=int),
+        'jitter': 120,
+    },
+}
+# القفل ينتهي بعد هذه المدة إذا مات الـ node أثناء التنفيذ
+SCHEDULER_LOCK_TIMEOUT = config('SCHEDULER_LOCK_TIMEOUT', default=900, cast=int)
+SCHEDULER_HISTORY_DAYS = config('SCHEDULER_HISTORY_DAYS', default=30, cast=int)
+
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
@@ -94,15 +186,34 @@ REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        'config.renderers.FastJSONRenderer',
+        'config.renderers.MessagePackRenderer',
+    ] + ([
         'rest_framework.renderers.BrowsableAPIRenderer',
+    ] if DEBUG else []),
+    'DEFAULT_PARSER_CLASSES': [
+        'rest_framework.parsers.JSONParser',
+        'config.parsers.MessagePackParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
     ],
     
 }
 
 
+# Read-only list endpoints serialize with values_list() mappers
+FAST_LIST_SERIALIZERS = config('FAST_LIST_SERIALIZERS', default=True, cast=bool)
+
+
 # NASA API
 NASA_API_KEY = config('NASA_API_KEY', default='DEMO_KEY')
+# يمكن توجيهه إلى الخادم المحلي البديل: python manage.py fake_donki
+NASA_DONKI_URL = config('NASA_DONKI_URL', default='https://api.nasa.gov/DONKI/FLR')
+
+# Simulation flare pool (served when there are no real flares)
+SIMULATION_POOL_SIZE = config('SIMULATION_POOL_SIZE', default=100, cast=int)
+SIMULATION_POOL_DIFFICULTY = config('SIMULATION_POOL_DIFFICULTY', default=0.5, cast=float)
+SIMULATION_POOL_ROTATION_SECONDS = config('SIMULATION_POOL_ROTATION_SECONDS', default=3600, cast=int)
 
 
 ROOT_URLCONF = 'config.urls'
@@ -129,13 +240,60 @@ WSGI_APPLICATION = 'config.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+# SQLite profile: WAL يسمح للقراءة أثناء الكتابة، و synchronous=NORMAL آمن مع WAL
+# (قد تضيع آخر transaction فقط عند انقطاع الكهرباء وليس عند توقف العملية)
+SQLITE_TUNING = config('SQLITE_TUNING', default=True, cast=bool)
+SQLITE_PRAGMAS = {
+    'journal_mode': config('SQLITE_JOURNAL_MODE', default='wal'),
+    'synchronous': config('SQLITE_SYNCHRONOUS', default='normal'),
+    'mmap_size': config('SQLITE_MMAP_SIZE', default=256 * 1024 * 1024, cast=int),
+    'cache_size': config('SQLITE_CACHE_SIZE', default=-64000, cast=int),  # سالب = KiB
+    'busy_timeout': config('SQLITE_BUSY_TIMEOUT', default=5000, cast=int),  # ms
+    'temp_store': 'memory',
 }
 
+# DB_ENGINE=postgresql لاستخدام PostgreSQL، مع DB_REPLICA_HOSTS (مفصولة بفواصل)
+# لتوجيه قراءات GET إلى الـ replicas (config.db_routers)
+DB_ENGINE = config('DB_ENGINE', default='sqlite')
+
+if DB_ENGINE == 'postgresql':
+    POSTGRES = {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': config('DB_NAME', default='solar_defender'),
+        'USER': config('DB_USER', default='postgres'),
+        'PASSWORD': config('DB_PASSWORD', default=''),
+        'HOST': config('DB_HOST', default='localhost'),
+        'PORT': config('DB_PORT', default='5432'),
+        'CONN_MAX_AGE': config('CONN_MAX_AGE', default=60, cast=int),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'connect_timeout': config('DB_CONNECT_TIMEOUT', default=5, cast=int),
+        },
+    }
+    DATABASES = {'default': POSTGRES}
+    for index, host in enumerate(config('DB_REPLICA_HOSTS', default='', cast=Csv()), start=1):
+        DATABASES[f'replica_{index}'] = {**POSTGRES, 'HOST': host, 'TEST': {'MIRROR': 'default'}}
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'config.db.sqlite3',
+            'NAME': BASE_DIR / 'db.sqlite3',
+            'PRAGMAS': SQLITE_PRAGMAS if SQLITE_TUNING else {},
+            'TRANSACTION_MODE': 'IMMEDIATE' if SQLITE_TUNING else None,
+            'CONN_MAX_AGE': config('CONN_MAX_AGE', default=60, cast=int),
+            'CONN_HEALTH_CHECKS': True,
+        }
+    }
+
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias.startswith('replica_')]
+DATABASE_ROUTERS = ['config.db_routers.ReplicaRouter']
+# مدة قراءة العميل من الـ primary بعد أي كتابة (أكبر من تأخر النسخ المتوقع)
+REPLICA_PIN_SECONDS = config('REPLICA_PIN_SECONDS', default=5, cast=int)
+
+
+# التوهجات الأقدم من هذا تُنقل إلى جداول الأرشيف (python manage.py archive_flares)
+FLARE_ARCHIVE_AFTER_DAYS = config('FLARE_ARCHIVE_AFTER_DAYS', default=90, cast=int)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
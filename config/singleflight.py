@@ -0,0 +1,243 @@
+"""
+Single-flight: دمج الطلبات المتطابقة المتزامنة
+
+أول طلب لمفتاح معين يحسب النتيجة، والطلبات المتطابقة التي تصل أثناء الحساب
+تنتظره وتأخذ نفس النتيجة بدلاً من تكرار العمل (thundering herd).
+
+- داخل العملية: threading.Event لكل مفتاح
+- بين العمليات (workers): file lock (fcntl.flock) لكل مفتاح، والنتيجة تُحفظ
+  كـ JSON ليقرأها من كان ينتظر القفل. لا تُقرأ إلا نتيجة كُتبت أثناء انتظارنا
+  (ملف جديد منذ بدأنا)، فليست cache: طلب يصل بعد انتهاء الحساب يحسب من جديد.
+  share(result) تحدد ما يُكتب (coalesce تكتب استجابات 2xx فقط).
+  على أنظمة بدون fcntl يعمل الدمج داخل العملية فقط.
+  المجلد يجب أن يكون ملك المستخدم الحالي وبصلاحيات 0o700 (وليس symlink)، وإلا
+  يعمل الدمج داخل العملية فقط: مجلد في /tmp يمكن أن ينشئه مستخدم آخر قبلنا.
+  النتائج التي لا تتحول إلى JSON لا تُشارك (المنتظرون يحسبونها بأنفسهم).
+
+المفتاح يجب أن يحدد النتيجة بالكامل، وأن يكون نفسه في كل العمليات: من مدخلات
+الطلب، وليس قيماً خاصة بالعملية (مثل إصدارات البيانات مع LocMemCache).
+"""
+import base64
+import functools
+import hashlib
+import json
+import logging
+import os
+import stat
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from rest_framework.response import Response
+
+from .renderers import DataURI
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class _Call:
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+_calls = {}
+_calls_lock = threading.Lock()
+_last_prune = 0.0
+
+
+def single_flight(key, func, share=None):
+    """تنفيذ func مرة واحدة لكل مجموعة طلبات متزامنة بنفس المفتاح"""
+    timeout = getattr(settings, 'SINGLEFLIGHT_TIMEOUT', 30)
+
+    with _calls_lock:
+        call = _calls.get(key)
+        leader = call is None
+        if leader:
+            call = _calls[key] = _Call()
+
+    if not leader:
+        if not call.event.wait(timeout):
+            return func()
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    try:
+        call.result = _across_processes(key, func, timeout, share)
+        return call.result
+    except Exception as exc:
+        call.error = exc
+        raise
+    finally:
+        with _calls_lock:
+            del _calls[key]
+        call.event.set()
+
+
+def _directory():
+    """مجلد الأقفال والنتائج، أو None إذا لم يكن خاصاً بالمستخدم الحالي"""
+    directory = getattr(settings, 'SINGLEFLIGHT_DIR', None) or os.path.join(
+        tempfile.gettempdir(), f'solar-defender-singleflight-{os.getuid()}'
+    )
+    try:
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        info = os.lstat(directory)
+    except OSError:
+        return None
+
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid() or stat.S_IMODE(info.st_mode) & 0o077:
+        logger.warning('Single-flight directory %s is not private (owner %s, mode %o), '
+                       'coalescing within the process only', directory, info.st_uid, stat.S_IMODE(info.st_mode))
+        return None
+    return directory
+
+
+def _acquire(lock_file, timeout):
+    """flock مع مهلة (إذا تعلّق صاحب القفل نحسب بأنفسنا)"""
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except BlockingIOError:
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+
+
+def _encode(value):
+    """JSON لا يميز DataURI (str) ولا tuple، فنحفظهما بعلامة"""
+    if isinstance(value, DataURI):
+        return {'__datauri__': [value.mime_type, base64.b64encode(value.data).decode()]}
+    if isinstance(value, dict):
+        return {key: _encode(item) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return {'__tuple__': [_encode(item) for item in value]}
+    if isinstance(value, list):
+        return [_encode(item) for item in value]
+    return value
+
+
+def _decode(value):
+    if '__datauri__' in value:
+        mime_type, data = value['__datauri__']
+        return DataURI(base64.b64decode(data), mime_type)
+    if '__tuple__' in value:
+        return tuple(value['__tuple__'])
+    return value
+
+
+def _identity(path):
+    """هوية ملف النتيجة (os.replace ينشئ inode جديداً لكل نتيجة)، أو None"""
+    try:
+        info = os.stat(path)
+    except OSError:
+        return None
+    return info.st_ino, info.st_mtime_ns
+
+
+def _read_result(path):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f, object_hook=_decode)
+    except (OSError, ValueError):
+        return _MISSING
+
+
+def _write_result(path, result):
+    temp_path = f'{path}.{os.getpid()}.{threading.get_ident()}'
+    try:
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(_encode(result), f)
+        os.replace(temp_path, path)
+    except (OSError, TypeError, ValueError):
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def _prune(directory, max_age):
+    """حذف ملفات المفاتيح القديمة (مرة كل دقيقة على الأكثر)"""
+    global _last_prune
+    now = time.time()
+    if now - _last_prune < 60:
+        return
+    _last_prune = now
+
+    for entry in os.scandir(directory):
+        try:
+            if now - entry.stat().st_mtime > max_age:
+                os.remove(entry.path)
+        except OSError:
+            pass
+
+
+def _across_processes(key, func, timeout, share):
+    if fcntl is None or not getattr(settings, 'SINGLEFLIGHT_CROSS_PROCESS', True):
+        return func()
+
+    directory = _directory()
+    if directory is None:
+        return func()
+
+    digest = hashlib.sha1(repr(key).encode()).hexdigest()
+    result_path = os.path.join(directory, f'{digest}.json')
+    # النتيجة الموجودة قبل الانتظار قديمة (من حساب سابق)، لا تُستخدم
+    previous = _identity(result_path)
+
+    with open(os.path.join(directory, f'{digest}.lock'), 'a+b') as lock_file:
+        if not _acquire(lock_file, timeout):
+            return func()
+        try:
+            result = _MISSING
+            if _identity(result_path) not in (None, previous):
+                result = _read_result(result_path)
+            if result is _MISSING:
+                result = func()
+                if share is None or share(result):
+                    _write_result(result_path, result)
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    _prune(directory, 60)
+    return result
+
+
+def response_payload(response):
+    """(status, data) من Response لمشاركته بين الطلبات"""
+    return response.status_code, response.data
+
+
+def successful(payload):
+    return 200 <= payload[0] < 300
+
+
+def coalesce(key_func):
+    """
+    Decorator لـ view ترجع Response: الطلبات المتزامنة بنفس المفتاح تتشارك النتيجة
+
+    key_func(request, *args, **kwargs) ترجع المفتاح، أو None لتخطي الدمج.
+    الاستجابات غير 2xx لا تُشارك بين العمليات.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            key = key_func(request, *args, **kwargs)
+            if key is None:
+                return view(request, *args, **kwargs)
+
+            status_code, data = single_flight(
+                key, lambda: response_payload(view(request, *args, **kwargs)), share=successful
+            )
+            return Response(data, status=status_code)
+        return wrapper
+    return decorator
@@ -0,0 +1,134 @@
+"""
+توقيت أقسام الطلب (Server-Timing)
+
+ServerTimingMiddleware تفتح RequestTimings لعينة من الطلبات (TIMING_SAMPLE_RATE)
+وتجمع فيها:
+- db: عدد الاستعلامات ووقتها (connection.execute_wrapper)
+- serialize: serializers المشروع (TimedSerializerMixin) والـ serializers السريعة
+- render: تحويل الاستجابة إلى JSON / MessagePack
+- chart: رسوم matplotlib
+- nasa: طلبات HTTP إلى NASA
+
+الأقسام قد تتداخل (مثلاً queryset يُقرأ داخل serializer يُحسب في db و serialize).
+خارج العينة _current فارغ وكل hook مجرد ContextVar.get().
+"""
+import contextvars
+import time
+from contextlib import contextmanager
+
+from django.db import connections
+from rest_framework import serializers
+
+SECTIONS = ('db', 'serialize', 'render', 'chart', 'nasa')
+
+
+class RequestTimings:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.sections = {}
+        self.active = set()
+
+    def add(self, section, seconds):
+        entry = self.sections.setdefault(section, [0, 0.0])
+        entry[0] += 1
+        entry[1] += seconds
+
+    def total(self):
+        return time.perf_counter() - self.started
+
+    def sql_wrapper(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.add('db', time.perf_counter() - start)
+
+    def as_dict(self):
+        """{section: {'count': n, 'ms': ...}} بالترتيب الثابت لـ SECTIONS"""
+        return {
+            section: {'count': self.sections[section][0], 'ms': round(self.sections[section][1] * 1000, 3)}
+            for section in SECTIONS
+            if section in self.sections
+        }
+
+    def header(self):
+        """قيمة ترويسة Server-Timing"""
+        metrics = []
+        for section, values in self.as_dict().items():
+            unit = 'queries' if section == 'db' else 'calls'
+            metrics.append(f'{section};dur={values["ms"]};desc="{values["count"]} {unit}"')
+        metrics.append(f'total;dur={round(self.total() * 1000, 3)}')
+        return ', '.join(metrics)
+
+
+_current = contextvars.ContextVar('request_timings', default=None)
+
+
+def current():
+    return _current.get()
+
+
+@contextmanager
+def collect():
+    """جمع التوقيتات داخل هذا الـ block (كل قواعد البيانات في هذا الـ thread)"""
+    timings = RequestTimings()
+    token = _current.set(timings)
+    wrappers = [connection.execute_wrapper(timings.sql_wrapper) for connection in connections.all()]
+    for wrapper in wrappers:
+        wrapper.__enter__()
+    try:
+        yield timings
+    finally:
+        for wrapper in reversed(wrappers):
+            wrapper.__exit__(None, None, None)
+        _current.reset(token)
+
+
+@contextmanager
+def timed(section):
+    """
+    توقيت قسم (context manager أو decorator)
+
+    الاستدعاءات المتداخلة لنفس القسم تُحسب مرة واحدة (الخارجية فقط).
+    """
+    timings = _current.get()
+    if timings is None or section in timings.active:
+        yield
+        return
+
+    timings.active.add(section)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.active.discard(section)
+        timings.add(section, time.perf_counter() - start)
+
+
+class TimedListSerializer(serializers.ListSerializer):
+    @property
+    def data(self):
+        with timed('serialize'):
+            return super().data
+
+
+class TimedSerializerMixin:
+    """
+    توقيت serializer.data في قسم serialize
+
+    يُضاف صراحة لـ serializers القراءة في مسارات القوائم / التفاصيل (التوهجات،
+    التقارير، الجلسات، لوحة المتصدرين ...) بدلاً من تعديل BaseSerializer.data
+    لكل serializers الـ DRF. serializers الإنشاء والتحديث لا تحتاجه.
+    """
+
+    @property
+    def data(self):
+        with timed('serialize'):
+            return super().data
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_serializer = super().many_init(*args, **kwargs)
+        if type(list_serializer) is serializers.ListSerializer:
+            list_serializer.__class__ = TimedListSerializer
+        return list_serializer
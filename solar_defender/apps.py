@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class SolarDefenderConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'solar_defender'
+
+    def ready(self):
+        from config.caching import track_data_version
+        from .models import GameSession, Mission, Player, SolarFlare
+
+        track_data_version(SolarFlare, GameSession, Mission, Player)
@@ -0,0 +1,452 @@
+"""
+مجموعات قياس الأداء (تُشغَّل بأمر: python manage.py benchmark)
+
+كل مجموعة تعمل داخل قاعدة بيانات اختبار مؤقتة ولا تلمس البيانات الحقيقية،
+وترجع قائمة نتائج (dict لكل حالة) يمكن حفظها كـ JSON ومقارنتها لاحقاً
+(compare_results: أعمدة *_ms أقل أفضل، و *_per_s أعلى أفضل).
+"""
+import os
+import shutil
+import statistics
+import tempfile
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import OperationalError, connection, connections, transaction
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient, APIRequestFactory
+
+from config import timing
+from config.renderers import FastJSONRenderer
+from weather_api import views as weather_views
+from weather_api.models import SolarFlare as WeatherSolarFlare
+from weather_api.serializers import (
+    SolarFlareFastSerializer as WeatherSolarFlareFastSerializer,
+    SolarFlareSerializer as WeatherSolarFlareSerializer,
+)
+from weather_api.services import NASASpaceWeatherService
+
+from .models import GameSession, Leaderboard, Mission, Player, SolarFlare
+from .serializers import (
+    LeaderboardFastSerializer, LeaderboardSerializer,
+    SolarFlareFastSerializer, SolarFlareSerializer,
+)
+from .synthetic import SyntheticDataGenerator, scale_counts
+from .views import UnifiedDataView
+
+FLARE_CLASSES = ['A', 'B', 'C', 'M', 'X']
+
+
+@contextmanager
+def test_database():
+    """قاعدة بيانات مؤقتة للقياس"""
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+def measure(func, repeat=5):
+    """تشغيل func عدة مرات وإرجاع (الأفضل، الوسيط) بالمللي ثانية"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return min(timings), statistics.median(timings)
+
+
+def seed_flares(rows):
+    """إنشاء توهجات في التطبيقين"""
+    now = timezone.now()
+    SolarFlare.objects.bulk_create([
+        SolarFlare(
+            flare_id=f'BENCH-{i}',
+            class_type=f'{FLARE_CLASSES[i % 5]}{1 + i % 9}.{i % 10}',
+            flare_class=FLARE_CLASSES[i % 5],
+            intensity=1 + i % 9 + (i % 10) / 10,
+            begin_time=now - timedelta(minutes=i),
+            is_simulation=bool(i % 2),
+        )
+        for i in range(rows)
+    ], batch_size=1000)
+    WeatherSolarFlare.objects.bulk_create([
+        WeatherSolarFlare(
+            flare_id=f'BENCH-{i}',
+            class_type=f'{FLARE_CLASSES[i % 5]}{1 + i % 9}.{i % 10}',
+            flare_class=FLARE_CLASSES[i % 5],
+            intensity=1 + i % 9 + (i % 10) / 10,
+            begin_time=now - timedelta(minutes=i),
+            peak_time=now - timedelta(minutes=i) if i % 2 else None,
+            risk_level='HIGH',
+            risk_color='#FF8C00',
+            impact_effects=['Power grid fluctuations', 'Astronaut risk'],
+        )
+        for i in range(rows)
+    ], batch_size=1000)
+
+
+def seed_leaderboard(rows):
+    players = Player.objects.bulk_create(
+        [Player(name=f'Bench Player {i}') for i in range(rows)], batch_size=1000
+    )
+    sessions = GameSession.objects.bulk_create([
+        GameSession(player=player, score=i % 100, rank='CADET', completed=True)
+        for i, player in enumerate(players)
+    ], batch_size=1000)
+    Leaderboard.objects.bulk_create([
+        Leaderboard(player=session.player, session=session, rank_position=i + 1)
+        for i, session in enumerate(sessions)
+    ], batch_size=1000)
+
+
+def seed_completed_session(phases=7):
+    """جلسة مكتملة مع مهماتها (لازمة للرسوم البيانية)"""
+    player = Player.objects.create(name='Bench Commander')
+    session = GameSession.objects.create(
+        player=player, score=72, rank='COMMANDER', completed=True, completed_at=timezone.now()
+    )
+    flares = SolarFlare.objects.order_by('id')[:phases]
+    Mission.objects.bulk_create([
+        Mission(
+            session=session, flare=flare, defense_choice=1 + i % 4, phase_number=i + 1,
+            power_grid_after=90 - i * 5, satellites_after=85 - i * 4,
+            communications_after=80 - i * 6, earth_health_after=85 - i * 5, points_earned=10,
+        )
+        for i, flare in enumerate(flares)
+    ])
+    return session
+
+
+def measure_memory(func):
+    """ذروة الذاكرة المخصصة أثناء func بالكيلوبايت"""
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 1024
+
+
+def bench_serializers(rows=10000, repeat=5, **options):
+    """ModelSerializer مقابل ValuesSerializer على نفس الـ queryset"""
+    seed_flares(rows)
+    seed_leaderboard(rows)
+
+    cases = [
+        ('solar_defender.SolarFlare', SolarFlare.objects.all(),
+         SolarFlareSerializer, SolarFlareFastSerializer),
+        ('solar_defender.Leaderboard', Leaderboard.objects.all(),
+         LeaderboardSerializer, LeaderboardFastSerializer),
+        ('weather_api.SolarFlare', WeatherSolarFlare.objects.all(),
+         WeatherSolarFlareSerializer, WeatherSolarFlareFastSerializer),
+    ]
+    results = []
+
+    for name, queryset, model_serializer, fast_serializer in cases:
+        model_best, model_median = measure(
+            lambda: model_serializer(queryset.all(), many=True).data, repeat
+        )
+        fast_best, fast_median = measure(
+            lambda: fast_serializer.many(queryset.all()), repeat
+        )
+        results.append({
+            'suite': 'serializers',
+            'case': name,
+            'rows': rows,
+            'model_serializer_ms': round(model_median, 2),
+            'fast_serializer_ms': round(fast_median, 2),
+            'speedup': round(model_median / fast_median, 2) if fast_median else None,
+        })
+
+    return results
+
+
+def bench_renderers(rows=10000, repeat=5, **options):
+    """زمن الترميز وذروة الذاكرة: DRF JSONRenderer مقابل FastJSONRenderer"""
+    seed_flares(rows)
+    seed_leaderboard(min(rows, 1000))
+    seed_completed_session()
+
+    factory = APIRequestFactory()
+    payloads = [
+        ('full-visualization-data',
+         weather_views.full_visualization_data(factory.get('/api/full-visualization-data/')).data),
+        ('unified', UnifiedDataView.as_view()(factory.get('/api_game/unified/')).data),
+    ]
+    renderers = [('drf_json', JSONRenderer()), ('fast_json', FastJSONRenderer())]
+    results = []
+
+    for name, data in payloads:
+        result = {'suite': 'renderers', 'case': name, 'rows': rows}
+
+        for label, renderer in renderers:
+            _, median = measure(lambda: renderer.render(data), repeat)
+            result[f'{label}_ms'] = round(median, 2)
+            result[f'{label}_peak_kb'] = round(measure_memory(lambda: renderer.render(data)), 1)
+
+        result['size_kb'] = round(len(FastJSONRenderer().render(data)) / 1024, 1)
+        result['speedup'] = round(result['drf_json_ms'] / result['fast_json_ms'], 2)
+        results.append(result)
+
+    return results
+
+
+SQLITE_PROFILES = [
+    # (الاسم، PRAGMAS، TRANSACTION_MODE، اتصال جديد لكل عملية كأن CONN_MAX_AGE=0)
+    ('default', {}, None, True),
+    ('tuned', settings.SQLITE_PRAGMAS, 'IMMEDIATE', True),
+    ('tuned_persistent', settings.SQLITE_PRAGMAS, 'IMMEDIATE', False),
+]
+
+
+def _sqlite_worker(alias, kind, reconnect, stop, counts, lock):
+    """كاتب (insert + update داخل transaction مثل إنشاء Mission) أو قارئ"""
+    done = errors = 0
+    while not stop.is_set():
+        try:
+            if kind == 'write':
+                with transaction.atomic(using=alias):
+                    with connections[alias].cursor() as cursor:
+                        cursor.execute(
+                            'INSERT INTO bench_event (session_id, points, payload) VALUES (%s, %s, %s)',
+                            [done % 50, done % 30, 'x' * 200]
+                        )
+                        cursor.execute('UPDATE bench_session SET score = score + 1 WHERE id = %s', [done % 50])
+            else:
+                with connections[alias].cursor() as cursor:
+                    cursor.execute('SELECT COUNT(*), MAX(points) FROM bench_event WHERE session_id = %s', [done % 50])
+                    cursor.fetchall()
+            done += 1
+        except OperationalError:
+            errors += 1
+        if reconnect:
+            connections[alias].close()
+
+    connections[alias].close()
+    with lock:
+        counts[kind] += done
+        counts[f'{kind}_errors'] += errors
+
+
+def bench_sqlite(rows=10000, repeat=5, duration=2.0, writers=4, readers=8, **options):
+    """كتّاب وقرّاء متزامنون على ملف SQLite: الإعداد الافتراضي مقابل SQLITE_PRAGMAS"""
+    results = []
+    directory = tempfile.mkdtemp(prefix='sqlite-bench-')
+
+    for name, pragmas, transaction_mode, reconnect in SQLITE_PROFILES:
+        alias = f'bench-{name}'
+        connections.settings[alias] = {
+            **connections['default'].settings_dict,
+            'NAME': os.path.join(directory, f'{name}.sqlite3'),
+            'PRAGMAS': pragmas,
+            'TRANSACTION_MODE': transaction_mode,
+            'CONN_MAX_AGE': None,
+            'TEST': {},
+        }
+        try:
+            with connections[alias].cursor() as cursor:
+                cursor.execute('CREATE TABLE bench_session (id INTEGER PRIMARY KEY, score INTEGER)')
+                cursor.execute(
+                    'CREATE TABLE bench_event (id INTEGER PRIMARY KEY, session_id INTEGER, '
+                    'points INTEGER, payload TEXT)'
+                )
+                cursor.execute('CREATE INDEX bench_event_session ON bench_event (session_id)')
+                cursor.executemany('INSERT INTO bench_session (id, score) VALUES (%s, 0)', [[i] for i in range(50)])
+                cursor.executemany(
+                    'INSERT INTO bench_event (session_id, points, payload) VALUES (%s, %s, %s)',
+                    [[i % 50, i % 30, 'x' * 200] for i in range(rows)]
+                )
+            connections[alias].close()
+
+            stop = threading.Event()
+            lock = threading.Lock()
+            counts = {'write': 0, 'read': 0, 'write_errors': 0, 'read_errors': 0}
+            threads = [
+                threading.Thread(target=_sqlite_worker, args=(alias, kind, reconnect, stop, counts, lock))
+                for kind in ['write'] * writers + ['read'] * readers
+            ]
+            for thread in threads:
+                thread.start()
+            time.sleep(duration)
+            stop.set()
+            for thread in threads:
+                thread.join()
+
+            results.append({
+                'suite': 'sqlite',
+                'case': name,
+                'writers': writers,
+                'readers': readers,
+                'writes_per_s': round(counts['write'] / duration, 1),
+                'reads_per_s': round(counts['read'] / duration, 1),
+                'locked_errors': counts['write_errors'] + counts['read_errors'],
+            })
+        finally:
+            connections[alias].close()
+            del connections.settings[alias]
+
+    shutil.rmtree(directory, ignore_errors=True)
+    return results
+
+
+class EndpointState:
+    """البيانات التي تحتاجها حالات endpoints (جلسة مكتملة، جلسات مفتوحة، ...)"""
+
+    def __init__(self, repeat):
+        self.session_id = GameSession.objects.filter(completed=True, missions__isnull=False).values_list(
+            'id', flat=True
+        ).first()
+        self.flare_id = SolarFlare.objects.values_list('id', flat=True).first()
+
+        player = Player.objects.create(name='Bench Commander')
+        self.open_sessions = iter([
+            GameSession.objects.create(player=player).id for _ in range(repeat + 1)
+        ])
+        self.mission_session_id = GameSession.objects.create(player=player).id
+        self.ingested = 0
+
+    def nasa_payload(self):
+        """7 توهجات جديدة بصيغة DONKI (مثل جلب أسبوع)"""
+        payload = []
+        for _ in range(7):
+            self.ingested += 1
+            begin = timezone.now() - timedelta(hours=self.ingested % 24)
+            payload.append({
+                'flareID': f'BENCH-INGEST-{self.ingested}',
+                'classType': f'{FLARE_CLASSES[self.ingested % 5]}{1 + self.ingested % 9}.0',
+                'beginTime': begin.isoformat(),
+                'peakTime': (begin + timedelta(minutes=10)).isoformat(),
+                'endTime': (begin + timedelta(minutes=40)).isoformat(),
+            })
+        return payload
+
+
+def ingest(client, state):
+    service = NASASpaceWeatherService()
+    service.save_flares_to_db(state.nasa_payload())
+    service.generate_report()
+
+
+# (الاسم، الدالة، أكبر حجم) - unified ترجع كل الجداول كاملة فحجمها يكبر مع كل صف
+ENDPOINT_CASES = [
+    ('unified', lambda client, state: client.get('/api_game/unified/'), 100_000),
+    ('full-visualization-data', lambda client, state: client.get('/api/full-visualization-data/'), None),
+    ('charts-session', lambda client, state: client.get(f'/api_game/charts/session/{state.session_id}/'), None),
+    ('chart-single', lambda client, state: client.get(
+        f'/api_game/charts/session/{state.session_id}/systems_status/'
+    ), None),
+    ('global_stats', lambda client, state: client.get('/api_game/stats/global_stats/'), None),
+    ('complete', lambda client, state: client.post(
+        f'/api_game/sessions/{next(state.open_sessions)}/complete/'
+    ), None),
+    ('mission-create', lambda client, state: client.post('/api_game/missions/', {
+        'session': state.mission_session_id, 'flare': state.flare_id, 'defense_choice': 4,
+        'phase_number': 1, 'power_grid_after': 90, 'satellites_after': 90,
+        'communications_after': 90, 'earth_health_after': 90, 'points_earned': 10,
+    }, format='json'), None),
+    ('ingestion', ingest, None),
+]
+
+
+def run_endpoint_case(name, case, client, state, repeat):
+    """تشغيل تمهيدي (عدد الاستعلامات ووقتها) ثم القياس"""
+    def call():
+        response = case(client, state)
+        if response is not None and response.status_code >= 400:
+            raise RuntimeError(f'{name} returned {response.status_code}')
+
+    with timing.collect() as timings:
+        call()
+    queries = timings.as_dict().get('db', {'count': 0, 'ms': 0})
+    best, median = measure(call, repeat)
+    return {
+        'best_ms': round(best, 2), 'median_ms': round(median, 2),
+        'queries': queries['count'], 'first_call_db_ms': queries['ms'],
+    }
+
+
+def bench_endpoints(rows=10000, repeat=5, scales=None, **options):
+    """
+    الـ endpoints الساخنة عبر كل الـ middleware على بيانات synthetic
+
+    لكل حجم في scales (أو rows) تُولَّد البيانات من جديد. الـ query cache معطل
+    حتى يُقاس الحساب الفعلي وليس قراءة النتيجة المخزنة.
+    """
+    results = []
+
+    with override_settings(
+        ALLOWED_HOSTS=['testserver'], QUERY_CACHE_ENABLED=False,
+        SINGLEFLIGHT_CROSS_PROCESS=False, TIMING_SAMPLE_RATE=0,
+    ):
+        for scale in scales or [rows]:
+            call_command('flush', interactive=False, verbosity=0)
+            cache.clear()
+            SyntheticDataGenerator().generate(**scale_counts(scale))
+
+            client = APIClient()
+            client.force_authenticate(User.objects.create_user('bench'))
+            state = EndpointState(repeat)
+
+            for name, case, max_rows in ENDPOINT_CASES:
+                result = {'suite': 'endpoints', 'case': name, 'rows': scale}
+                if max_rows is not None and scale > max_rows:
+                    result['skipped'] = f'payload grows with every row (max {max_rows})'
+                else:
+                    result.update(run_endpoint_case(name, case, client, state, repeat))
+                results.append(result)
+
+    return results
+
+
+SUITES = {
+    'serializers': bench_serializers,
+    'renderers': bench_renderers,
+    'sqlite': bench_sqlite,
+    'endpoints': bench_endpoints,
+}
+
+
+def result_key(result):
+    return result['suite'], result['case'], result.get('rows')
+
+
+def compare_results(results, baseline, threshold=0.2):
+    """
+    مقارنة النتائج بنتائج سابقة (نفس suite و case و rows)
+
+    ترجع قائمة (key, metric, baseline, current, change) لكل تراجع أكبر من threshold.
+    """
+    previous = {result_key(result): result for result in baseline}
+    regressions = []
+
+    for result in results:
+        old = previous.get(result_key(result))
+        if old is None:
+            continue
+        for metric, value in result.items():
+            old_value = old.get(metric)
+            if not isinstance(value, (int, float)) or not isinstance(old_value, (int, float)) or not old_value:
+                continue
+            if metric.endswith('_ms'):
+                change = (value - old_value) / old_value
+            elif metric.endswith('_per_s'):
+                change = (old_value - value) / old_value
+            else:
+                continue
+            if change > threshold:
+                regressions.append((result_key(result), metric, old_value, value, change))
+
+    return regressions
@@ -0,0 +1,161 @@
+"""
+خادم محلي بديل لـ NASA DONKI FLR (لاختبارات الحمل والجلب بدون إنترنت)
+
+يعيد تشغيل توهجات مسجلة (loadtest_data/donki_flr.json) بنفس صيغة
+api.nasa.gov/DONKI/FLR مع فلترة startDate / endDate، ويمكنه حقن:
+- تأخير (latency + jitter بالمللي ثانية)
+- أخطاء 500 بنسبة error_rate
+- حد للطلبات في الدقيقة (429 OVER_RATE_LIMIT مثل api.nasa.gov)
+
+بشكل افتراضي تُزاح التواريخ حتى يكون أحدث توهج قبل ساعة، فتعيد فترة
+"آخر 7 أيام" بيانات دائماً. يُستخدم بـ NASA_DONKI_URL=http://127.0.0.1:8765/DONKI/FLR
+"""
+import json
+import os
+import random
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'loadtest_data', 'donki_flr.json')
+TIME_FORMAT = '%Y-%m-%dT%H:%MZ'
+TIME_FIELDS = ('beginTime', 'peakTime', 'endTime', 'submissionTime')
+
+
+def parse_time(value):
+    return datetime.strptime(value, TIME_FORMAT).replace(tzinfo=timezone.utc)
+
+
+def load_fixtures(path=FIXTURES):
+    with open(path) as f:
+        return json.load(f)
+
+
+def shift_records(records, now=None):
+    """نقل التواريخ (مع الحفاظ على الفروق) حتى يكون أحدث توهج قبل ساعة من now"""
+    now = now or datetime.now(timezone.utc)
+    newest = max(parse_time(record['beginTime']) for record in records)
+    offset = now - timedelta(hours=1) - newest
+    offset -= timedelta(seconds=offset.total_seconds() % 60)
+
+    shifted = []
+    for record in records:
+        record = dict(record)
+        for field in TIME_FIELDS:
+            if record.get(field):
+                record[field] = (parse_time(record[field]) + offset).strftime(TIME_FORMAT)
+        record['flrID'] = f'{record["beginTime"][:-1]}:00-FLR-001'
+        shifted.append(record)
+    return shifted
+
+
+class FakeDonki:
+    """منطق الاستجابة (بدون sockets)"""
+
+    def __init__(self, records=None, latency=0, jitter=0, error_rate=0.0, rate_limit=0, shift=True, seed=None):
+        records = load_fixtures() if records is None else records
+        self.records = shift_records(records) if shift else records
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.window = []
+        self.stats = {'requests': 0, 'errors': 0, 'rate_limited': 0}
+
+    def delay(self):
+        seconds = (self.latency + self.rng.uniform(0, self.jitter)) / 1000
+        if seconds > 0:
+            time.sleep(seconds)
+
+    def over_limit(self):
+        """نافذة منزلقة لمدة دقيقة"""
+        if not self.rate_limit:
+            return False, None
+        with self.lock:
+            now = time.monotonic()
+            self.window = [moment for moment in self.window if now - moment < 60]
+            if len(self.window) >= self.rate_limit:
+                return True, 0
+            self.window.append(now)
+            return False, self.rate_limit - len(self.window)
+
+    def select(self, start_date=None, end_date=None):
+        """التوهجات التي تبدأ بين startDate و endDate (أيام كاملة)"""
+        selected = []
+        for record in self.records:
+            day = record['beginTime'][:10]
+            if (start_date and day < start_date) or (end_date and day > end_date):
+                continue
+            selected.append(record)
+        return selected
+
+    def respond(self, path, params):
+        """(status, headers, body bytes)"""
+        with self.lock:
+            self.stats['requests'] += 1
+
+        if not path.rstrip('/').endswith('/FLR'):
+            return 404, {}, b'{"error": "not found"}'
+
+        limited, remaining = self.over_limit()
+        headers = {}
+        if self.rate_limit:
+            headers = {'X-RateLimit-Limit': str(self.rate_limit), 'X-RateLimit-Remaining': str(remaining)}
+        if limited:
+            with self.lock:
+                self.stats['rate_limited'] += 1
+            body = {'error': {'code': 'OVER_RATE_LIMIT', 'message': 'You have exceeded your rate limit.'}}
+            return 429, dict(headers, **{'Retry-After': '60'}), json.dumps(body).encode()
+
+        self.delay()
+
+        if self.error_rate and self.rng.random() < self.error_rate:
+            with self.lock:
+                self.stats['errors'] += 1
+            return 500, headers, b'Internal Server Error'
+
+        records = self.select(params.get('startDate'), params.get('endDate'))
+        return 200, headers, json.dumps(records).encode()
+
+
+class FakeDonkiHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        status, headers, body = self.server.donki.respond(url.path, params)
+
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class FakeDonkiServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, donki, host='127.0.0.1', port=0, verbose=False):
+        super().__init__((host, port), FakeDonkiHandler)
+        self.donki = donki
+        self.verbose = verbose
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}/DONKI/FLR'
+
+    def start(self):
+        """تشغيل في thread خلفي (للاختبارات وأمر loadtest)"""
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return thread
@@ -0,0 +1,338 @@
+"""
+اختبار الحمل: مستخدمون افتراضيون متزامنون يكررون سيناريو كامل
+
+الأهداف:
+- wsgi: config.wsgi.application مباشرة (threads، بدون شبكة)
+- asgi: config.asgi.application مباشرة (asyncio، مثل uvicorn)
+- http://host:port: خادم يعمل فعلاً (threads + requests)
+
+السيناريوهات تُكتب كـ generators: كل yield طلب (الاسم، method، path، body)
+ويُرسل إليها JSON الاستجابة، فنفس السيناريو يعمل مع كل الأهداف.
+النتيجة: p50 / p95 / p99 لكل خطوة وعدد الطلبات في الثانية.
+"""
+import asyncio
+import io
+import json
+import math
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+import requests
+from django.db import connection
+
+from .benchmarks import test_database
+
+
+# ====================================================================
+# السيناريوهات
+# ====================================================================
+
+def game_loop(user, iteration):
+    """لاعب جديد -> جلسة -> 7 مهمات -> إنهاء -> الرسوم -> لوحة المتصدرين"""
+    flares = yield 'recent_flares', 'GET', '/api_game/flares/recent/', None
+    player = yield 'create_player', 'POST', '/api_game/players/', {'name': f'Load Pilot {user}-{iteration}'}
+    session = yield 'start_session', 'POST', '/api_game/sessions/', {'player_id': player['id']}
+
+    score, health = 0, 100
+    for phase, flare in enumerate(flares[:7], start=1):
+        points = 5 + (user + phase) % 10
+        score += points
+        health = max(0, health - 6)
+        yield 'submit_mission', 'POST', '/api_game/missions/', {
+            'session': session['id'], 'flare': flare['id'], 'defense_choice': 1 + phase % 4,
+            'phase_number': phase, 'power_grid_after': health, 'satellites_after': health,
+            'communications_after': health, 'earth_health_after': health,
+            'points_earned': points, 'session_score': score,
+        }
+
+    yield 'complete', 'POST', f'/api_game/sessions/{session["id"]}/complete/', None
+    yield 'charts', 'GET', f'/api_game/charts/session/{session["id"]}/', None
+    yield 'leaderboard', 'GET', '/api_game/leaderboard/top/', None
+
+
+def ingest(user, iteration):
+    """جدولة جلب من NASA (أو الخادم البديل fake_donki) ثم قراءة حالة المهمة"""
+    job = yield 'enqueue_ingestion', 'POST', '/api/ingestion-jobs/', {'source': 'weather_api'}
+    yield 'ingestion_status', 'GET', job['status_url'], None
+
+
+SCENARIOS = {
+    'game': game_loop,
+    'ingest': ingest,
+}
+
+
+class RequestFailed(Exception):
+    pass
+
+
+# ====================================================================
+# الإحصائيات
+# ====================================================================
+
+def percentile(sorted_values, fraction):
+    """nearest-rank"""
+    if not sorted_values:
+        return None
+    index = max(0, math.ceil(fraction * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+class LoadStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = {}
+        self.errors = {}
+        self.started = time.perf_counter()
+        self.finished = None
+
+    def record(self, step, seconds, ok):
+        with self.lock:
+            self.latencies.setdefault(step, []).append(seconds)
+            if not ok:
+                self.errors[step] = self.errors.get(step, 0) + 1
+
+    def finish(self):
+        self.finished = time.perf_counter()
+
+    def summary(self):
+        duration = (self.finished or time.perf_counter()) - self.started
+        rows = []
+        every = []
+
+        for step, values in list(self.latencies.items()) + [('all', None)]:
+            values = sorted(every if values is None else values)
+            if step != 'all':
+                every.extend(values)
+            rows.append({
+                'step': step,
+                'requests': len(values),
+                'errors': sum(self.errors.values()) if step == 'all' else self.errors.get(step, 0),
+                'p50_ms': round(percentile(values, 0.50) * 1000, 2) if values else None,
+                'p95_ms': round(percentile(values, 0.95) * 1000, 2) if values else None,
+                'p99_ms': round(percentile(values, 0.99) * 1000, 2) if values else None,
+            })
+
+        return {
+            'duration_s': round(duration, 2),
+            'requests': len(every),
+            'requests_per_s': round(len(every) / duration, 1) if duration else None,
+            'steps': rows,
+        }
+
+
+# ====================================================================
+# العملاء
+# ====================================================================
+
+def request_headers(token):
+    headers = {'Accept': 'application/json', 'Content-Type': 'application/json'}
+    if token:
+        headers['Authorization'] = f'Token {token}'
+    return headers
+
+
+def decode(status, body):
+    if status >= 400:
+        raise RequestFailed(status)
+    return json.loads(body) if body else None
+
+
+class WSGIClient:
+    """طلبات مباشرة إلى تطبيق WSGI"""
+
+    def __init__(self, application, token=None, host='localhost'):
+        self.application = application
+        self.headers = request_headers(token)
+        self.host = host
+
+    def request(self, method, path, data=None):
+        body = json.dumps(data).encode() if data is not None else b''
+        url = urlsplit(path)
+        environ = {
+            'REQUEST_METHOD': method,
+            'PATH_INFO': url.path,
+            'QUERY_STRING': url.query,
+            'SCRIPT_NAME': '',
+            'SERVER_NAME': self.host,
+            'SERVER_PORT': '80',
+            'SERVER_PROTOCOL': 'HTTP/1.1',
+            'REMOTE_ADDR': '127.0.0.1',
+            'HTTP_HOST': self.host,
+            'CONTENT_LENGTH': str(len(body)),
+            'CONTENT_TYPE': self.headers['Content-Type'],
+            'wsgi.input': io.BytesIO(body),
+            'wsgi.errors': sys.stderr,
+            'wsgi.url_scheme': 'http',
+            'wsgi.version': (1, 0),
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': False,
+            'wsgi.run_once': False,
+        }
+        for name, value in self.headers.items():
+            if name != 'Content-Type':
+                environ['HTTP_' + name.upper().replace('-', '_')] = value
+
+        status = []
+        result = self.application(environ, lambda status_line, headers, exc_info=None: status.append(status_line))
+        try:
+            content = b''.join(result)
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+        return decode(int(status[0].split()[0]), content)
+
+
+class ASGIClient:
+    """طلبات مباشرة إلى تطبيق ASGI"""
+
+    def __init__(self, application, token=None, host='localhost'):
+        self.application = application
+        self.headers = request_headers(token)
+        self.host = host
+
+    async def request(self, method, path, data=None):
+        body = json.dumps(data).encode() if data is not None else b''
+        url = urlsplit(path)
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': method,
+            'scheme': 'http',
+            'path': url.path,
+            'raw_path': url.path.encode(),
+            'query_string': url.query.encode(),
+            'root_path': '',
+            'headers': [(b'host', self.host.encode()), (b'content-length', str(len(body)).encode())] + [
+                (name.lower().encode(), value.encode()) for name, value in self.headers.items()
+            ],
+            'client': ('127.0.0.1', 0),
+            'server': (self.host, 80),
+        }
+        sent = False
+        done = asyncio.Event()
+        response = {'status': None, 'body': []}
+
+        async def receive():
+            nonlocal sent
+            if not sent:
+                sent = True
+                return {'type': 'http.request', 'body': body, 'more_body': False}
+            await done.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                response['status'] = message['status']
+            elif message['type'] == 'http.response.body':
+                response['body'].append(message.get('body', b''))
+                if not message.get('more_body'):
+                    done.set()
+
+        await self.application(scope, receive, send)
+        done.set()
+        return decode(response['status'], b''.join(response['body']))
+
+
+class HTTPClient:
+    """خادم حقيقي عبر requests (Session لكل مستخدم افتراضي)"""
+
+    def __init__(self, base_url, token=None):
+        self.base_url = base_url.rstrip('/')
+        self.session = requests.Session()
+        self.session.headers.update(request_headers(token))
+
+    def request(self, method, path, data=None):
+        response = self.session.request(
+            method, self.base_url + path, data=json.dumps(data) if data is not None else None, timeout=60
+        )
+        return decode(response.status_code, response.content)
+
+
+# ====================================================================
+# التشغيل
+# ====================================================================
+
+def run_sync(scenario, client_factory, users, iterations, stats, on_thread_exit=None):
+    """كل مستخدم افتراضي في thread مع client خاص به"""
+    def user_loop(user):
+        client = client_factory()
+        try:
+            for iteration in range(iterations):
+                steps = scenario(user, iteration)
+                response = None
+                try:
+                    while True:
+                        name, method, path, data = steps.send(response)
+                        start = time.perf_counter()
+                        try:
+                            response = client.request(method, path, data)
+                        except (RequestFailed, requests.RequestException):
+                            stats.record(name, time.perf_counter() - start, ok=False)
+                            break
+                        stats.record(name, time.perf_counter() - start, ok=True)
+                except StopIteration:
+                    pass
+        finally:
+            if on_thread_exit:
+                on_thread_exit()
+
+    threads = [threading.Thread(target=user_loop, args=(user,)) for user in range(users)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    stats.finish()
+
+
+async def run_async(scenario, client, users, iterations, stats):
+    """كل مستخدم افتراضي coroutine على نفس event loop"""
+    async def user_loop(user):
+        for iteration in range(iterations):
+            steps = scenario(user, iteration)
+            response = None
+            try:
+                while True:
+                    name, method, path, data = steps.send(response)
+                    start = time.perf_counter()
+                    try:
+                        response = await client.request(method, path, data)
+                    except RequestFailed:
+                        stats.record(name, time.perf_counter() - start, ok=False)
+                        break
+                    stats.record(name, time.perf_counter() - start, ok=True)
+            except StopIteration:
+                pass
+
+    await asyncio.gather(*(user_loop(user) for user in range(users)))
+    stats.finish()
+
+
+@contextmanager
+def loadtest_database():
+    """
+    قاعدة بيانات اختبار مؤقتة للأهداف داخل العملية
+
+    مع SQLite تكون في ملف (WAL) وليس في الذاكرة، لأن الكتابات المتزامنة من
+    عدة threads على قاعدة في الذاكرة تفشل بـ "table is locked".
+    """
+    test_settings = connection.settings_dict.setdefault('TEST', {})
+    old_name = test_settings.get('NAME')
+    directory = None
+    if connection.vendor == 'sqlite':
+        directory = tempfile.mkdtemp(prefix='loadtest-')
+        test_settings['NAME'] = os.path.join(directory, 'loadtest.sqlite3')
+    try:
+        with test_database():
+            yield
+    finally:
+        test_settings['NAME'] = old_name
+        if directory:
+            shutil.rmtree(directory, ignore_errors=True)
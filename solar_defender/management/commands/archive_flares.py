@@ -0,0 +1,49 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from config.archive import archive_rows
+from solar_defender.models import ArchivedSolarFlare, SolarFlare
+from weather_api.models import (
+    ArchivedSolarFlare as WeatherArchivedSolarFlare,
+    SolarFlare as WeatherSolarFlare,
+)
+
+class Command(BaseCommand):
+    help = 'Move flares older than FLARE_ARCHIVE_AFTER_DAYS from the hot tables to the archive tables'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=None,
+            help='Archive flares that began more than this many days ago (default: FLARE_ARCHIVE_AFTER_DAYS)'
+        )
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows moved per transaction')
+        parser.add_argument('--dry-run', action='store_true', help='Only count the rows that would move')
+    
+    def handle(self, *args, **options):
+        days = options['days'] or settings.FLARE_ARCHIVE_AFTER_DAYS
+        cutoff = timezone.now() - timedelta(days=days)
+        
+        # لا نؤرشف ما تشير إليه صفوف أخرى (المهمات والتقارير) ولا توهجات المحاكاة
+        candidates = [
+            ('weather_api', WeatherArchivedSolarFlare, WeatherSolarFlare.objects.filter(
+                begin_time__lt=cutoff, strongest_reports__isnull=True
+            )),
+            ('solar_defender', ArchivedSolarFlare, SolarFlare.objects.filter(
+                begin_time__lt=cutoff, is_simulation=False, mission__isnull=True
+            )),
+        ]
+        
+        self.stdout.write(self.style.WARNING(f'Archiving flares that began before {cutoff:%Y-%m-%d %H:%M}...'))
+        
+        for app_label, archive_model, queryset in candidates:
+            if options['dry_run']:
+                self.stdout.write(f'  {app_label}: {queryset.count()} flares would be archived')
+                continue
+            
+            moved = archive_rows(queryset, archive_model, batch_size=options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(f'  {app_label}: archived {moved} flares'))
@@ -0,0 +1,62 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from solar_defender.benchmarks import SUITES, compare_results, test_database
+
+class Command(BaseCommand):
+    help = 'Run performance benchmarks against a temporary test database'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'suites',
+            nargs='*',
+            help=f'Suites to run (default: all). Available: {", ".join(SUITES)}'
+        )
+        parser.add_argument('--rows', type=int, default=10000, help='Rows to generate per table')
+        parser.add_argument(
+            '--scales',
+            type=lambda value: [int(rows) for rows in value.split(',')],
+            help='Comma-separated dataset sizes for the endpoints suite (e.g. 1000,100000,1000000)'
+        )
+        parser.add_argument('--repeat', type=int, default=5, help='Repetitions per case')
+        parser.add_argument('--output', help='Write results as JSON to this file')
+        parser.add_argument('--compare', help='Compare with results from a previous --output file')
+        parser.add_argument(
+            '--threshold', type=float, default=0.2,
+            help='Relative slowdown reported as a regression with --compare (default 0.2 = 20%%)'
+        )
+
+    def handle(self, *args, **options):
+        suites = options['suites'] or list(SUITES)
+        unknown = [name for name in suites if name not in SUITES]
+        if unknown:
+            raise CommandError(f'Unknown suites: {", ".join(unknown)}')
+
+        results = []
+        for name in suites:
+            self.stdout.write(self.style.WARNING(f'Running {name} benchmark...'))
+
+            with test_database():
+                suite_results = SUITES[name](**options)
+
+            for result in suite_results:
+                self.stdout.write('  ' + ', '.join(f'{k}={v}' for k, v in result.items() if k != 'suite'))
+            results.extend(suite_results)
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(results, f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f'Results written to {options["output"]}'))
+
+        if options['compare']:
+            with open(options['compare']) as f:
+                baseline = json.load(f)
+
+            regressions = compare_results(results, baseline, options['threshold'])
+            for (suite, case, rows), metric, old, new, change in regressions:
+                self.stdout.write(self.style.ERROR(
+                    f'  {suite}/{case} rows={rows} {metric}: {old} -> {new} (+{change:.0%})'
+                ))
+            if regressions:
+                raise CommandError(f'{len(regressions)} regression(s) against {options["compare"]}')
+            self.stdout.write(self.style.SUCCESS(f'No regressions against {options["compare"]}'))
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from solar_defender.simulation_service import SimulationFlarePool
+
+class Command(BaseCommand):
+    help = 'Pre-generate the pool of simulation flare sets'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--size',
+            type=int,
+            default=None,
+            help='Total number of flare sets in the pool (default: SIMULATION_POOL_SIZE)'
+        )
+        parser.add_argument(
+            '--difficulty',
+            type=float,
+            default=None,
+            help='Target difficulty between 0 and 1 (default: SIMULATION_POOL_DIFFICULTY)'
+        )
+    
+    def handle(self, *args, **options):
+        pool = SimulationFlarePool()
+        size = options['size'] or pool.size
+        
+        self.stdout.write(self.style.WARNING(f'Building simulation pool of {size} sets...'))
+        
+        created = pool.build(size=size, difficulty=options['difficulty'])
+        
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Created {created} new sets ({pool.count_sets()} sets in pool)'
+            )
+        )
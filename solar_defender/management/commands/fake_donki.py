@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+from solar_defender.fake_donki import FIXTURES, FakeDonki, FakeDonkiServer, load_fixtures
+
+class Command(BaseCommand):
+    help = 'Serve recorded NASA DONKI FLR fixtures locally (with optional latency, errors and rate limits)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--fixtures', default=FIXTURES, help='JSON file with DONKI FLR records')
+        parser.add_argument('--latency', type=float, default=0, help='Added latency per request (ms)')
+        parser.add_argument('--jitter', type=float, default=0, help='Random extra latency up to this many ms')
+        parser.add_argument('--error-rate', type=float, default=0, help='Fraction of requests answered with 500')
+        parser.add_argument('--rate-limit', type=int, default=0, help='Requests per minute before 429 (0 = unlimited)')
+        parser.add_argument('--no-shift', action='store_true', help='Serve fixture dates as recorded')
+        parser.add_argument('--seed', type=int, help='Random seed for latency and errors')
+        parser.add_argument('--verbose', action='store_true', help='Log every request')
+
+    def handle(self, *args, **options):
+        donki = FakeDonki(
+            records=load_fixtures(options['fixtures']),
+            latency=options['latency'],
+            jitter=options['jitter'],
+            error_rate=options['error_rate'],
+            rate_limit=options['rate_limit'],
+            shift=not options['no_shift'],
+            seed=options['seed'],
+        )
+        server = FakeDonkiServer(donki, options['host'], options['port'], verbose=options['verbose'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Serving {len(donki.records)} flares at {server.url} (NASA_DONKI_URL={server.url})'
+        ))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            self.stdout.write(self.style.WARNING(
+                'Served ' + ', '.join(f'{name}={count}' for name, count in donki.stats.items())
+            ))
@@ -0,0 +1,47 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from solar_defender.synthetic import SyntheticDataGenerator, flare_ids_exist, scale_counts
+
+class Command(BaseCommand):
+    help = 'Generate realistic synthetic players, sessions, missions, flares and reports'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000, help='Scale: flares per app (other tables derive from it)')
+        parser.add_argument('--flares', type=int, help='Override flares per app')
+        parser.add_argument('--players', type=int, help='Override players')
+        parser.add_argument('--sessions', type=int, help='Override game sessions (80%% completed with 7 missions)')
+        parser.add_argument('--reports', type=int, help='Override hourly weather reports')
+        parser.add_argument('--days', type=int, default=365, help='Spread flares over the last N days')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed (same seed = same data)')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows per bulk insert')
+        parser.add_argument('--prefix', default='SYN', help='flare_id prefix for generated flares')
+
+    def handle(self, *args, **options):
+        counts = scale_counts(options['rows'])
+        for name in counts:
+            if options[name] is not None:
+                counts[name] = options[name]
+
+        if flare_ids_exist(options['prefix']):
+            raise CommandError(
+                f'Flares with prefix "{options["prefix"]}" already exist; use a different --prefix'
+            )
+
+        self.stdout.write(self.style.WARNING(
+            'Generating ' + ', '.join(f'{name}={count}' for name, count in counts.items()) + '...'
+        ))
+
+        start = time.perf_counter()
+        generator = SyntheticDataGenerator(
+            seed=options['seed'], days=options['days'],
+            batch_size=options['batch_size'], prefix=options['prefix'],
+        )
+        created = generator.generate(**counts)
+        elapsed = time.perf_counter() - start
+
+        for table, rows in created.items():
+            self.stdout.write(f'  {table}: {rows}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Generated {sum(created.values())} rows in {elapsed:.1f}s'
+        ))
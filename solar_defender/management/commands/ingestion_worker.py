@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from weather_api import jobs
+
+class Command(BaseCommand):
+    help = 'Run queued NASA ingestion jobs (use with INGESTION_EXECUTOR=worker; several workers may run at once)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Run the queued jobs and exit')
+        parser.add_argument('--poll-interval', type=float, default=1.0, help='Seconds between polls when idle')
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.WARNING('Waiting for ingestion jobs...'))
+
+        try:
+            while True:
+                count = jobs.run_pending()
+                if count:
+                    self.stdout.write(self.style.SUCCESS(f'Ran {count} ingestion job(s)'))
+                if options['once']:
+                    break
+                close_old_connections()
+                time.sleep(options['poll_interval'])
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,111 @@
+import asyncio
+import json
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import override_settings
+from rest_framework.authtoken.models import Token
+from solar_defender.fake_donki import FakeDonki, FakeDonkiServer
+from solar_defender.loadtest import (
+    SCENARIOS, ASGIClient, HTTPClient, LoadStats, WSGIClient, loadtest_database, run_async, run_sync,
+)
+from solar_defender.synthetic import SyntheticDataGenerator, scale_counts
+
+class Command(BaseCommand):
+    help = 'Run a concurrent load test against the WSGI or ASGI application or a running server'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--target', default='wsgi',
+            help='wsgi, asgi (in-process against a temporary database) or a server URL like http://127.0.0.1:8000'
+        )
+        parser.add_argument('--scenario', choices=list(SCENARIOS), default='game')
+        parser.add_argument('--users', type=int, default=10, help='Concurrent virtual users')
+        parser.add_argument('--iterations', type=int, default=5, help='Scenario runs per user')
+        parser.add_argument('--rows', type=int, default=1000, help='Synthetic rows seeded for in-process targets')
+        parser.add_argument('--token', help='API token for server URLs (completing a session needs a user)')
+        parser.add_argument('--fake-donki', action='store_true', help='Serve NASA DONKI locally for in-process targets')
+        parser.add_argument('--donki-latency', type=float, default=0, help='Fake DONKI latency (ms)')
+        parser.add_argument('--donki-error-rate', type=float, default=0, help='Fake DONKI 500 ratio')
+        parser.add_argument('--donki-rate-limit', type=int, default=0, help='Fake DONKI requests per minute')
+        parser.add_argument('--output', help='Write the summary as JSON to this file')
+
+    def handle(self, *args, **options):
+        target = options['target']
+        scenario = SCENARIOS[options['scenario']]
+        stats = LoadStats()
+
+        self.stdout.write(self.style.WARNING(
+            f'Running {options["scenario"]} scenario against {target}: '
+            f'{options["users"]} users x {options["iterations"]} iterations...'
+        ))
+
+        if target.startswith(('http://', 'https://')):
+            if options['scenario'] == 'game' and not options['token']:
+                raise CommandError('--token is required against a server (complete needs an authenticated user)')
+            run_sync(
+                scenario, lambda: HTTPClient(target, options['token']),
+                options['users'], options['iterations'], stats,
+            )
+        elif target in ('wsgi', 'asgi'):
+            self.run_in_process(target, scenario, stats, options)
+        else:
+            raise CommandError(f'Unknown target "{target}" (use wsgi, asgi or a URL)')
+
+        self.report(stats.summary(), options['output'])
+
+    def run_in_process(self, target, scenario, stats, options):
+        server = None
+        overrides = {'DEBUG': False, 'TIMING_SAMPLE_RATE': 0}
+        if options['fake_donki']:
+            server = FakeDonkiServer(FakeDonki(
+                latency=options['donki_latency'],
+                error_rate=options['donki_error_rate'],
+                rate_limit=options['donki_rate_limit'],
+            ))
+            server.start()
+            overrides['NASA_DONKI_URL'] = server.url
+
+        try:
+            with loadtest_database(), override_settings(**overrides):
+                SyntheticDataGenerator().generate(**scale_counts(options['rows']))
+                token = Token.objects.create(user=User.objects.create_user('loadtest')).key
+                connections.close_all()
+
+                if target == 'wsgi':
+                    from config.wsgi import application
+                    run_sync(
+                        scenario, lambda: WSGIClient(application, token),
+                        options['users'], options['iterations'], stats,
+                        on_thread_exit=connections.close_all,
+                    )
+                else:
+                    from config.asgi import application
+                    asyncio.run(run_async(
+                        scenario, ASGIClient(application, token), options['users'], options['iterations'], stats,
+                    ))
+                connections.close_all()
+        finally:
+            if server is not None:
+                server.shutdown()
+                server.server_close()
+                self.stdout.write('  fake DONKI: ' + ', '.join(
+                    f'{name}={count}' for name, count in server.donki.stats.items()
+                ))
+
+    def report(self, summary, output):
+        self.stdout.write(f'  {"step":<16} {"requests":>8} {"errors":>6} {"p50_ms":>9} {"p95_ms":>9} {"p99_ms":>9}')
+        for row in summary['steps']:
+            self.stdout.write(
+                f'  {row["step"]:<16} {row["requests"]:>8} {row["errors"]:>6} '
+                f'{row["p50_ms"] or "-":>9} {row["p95_ms"] or "-":>9} {row["p99_ms"] or "-":>9}'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'{summary["requests"]} requests in {summary["duration_s"]}s ({summary["requests_per_s"]} req/s)'
+        ))
+
+        if output:
+            with open(output, 'w') as f:
+                json.dump(summary, f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f'Summary written to {output}'))
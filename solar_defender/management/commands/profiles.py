@@ -0,0 +1,37 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand
+from config import profiling
+
+class Command(BaseCommand):
+    help = 'List stored request profiles (slowest first) with their top functions'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=20, help='Number of profiles to list')
+        parser.add_argument('--view', help='Only profiles of this view name')
+        parser.add_argument('--top', type=int, default=5, help='Top functions shown per profile')
+        parser.add_argument('--recent', action='store_true', help='Order by time instead of duration')
+
+    def handle(self, *args, **options):
+        directory = profiling.profiles_dir()
+        index = profiling.read_index(directory)
+        if options['view']:
+            index = [entry for entry in index if entry.get('view') == options['view']]
+        if not options['recent']:
+            index = sorted(index, key=lambda entry: entry['duration_ms'], reverse=True)
+
+        if not index:
+            self.stdout.write(self.style.WARNING(f'No profiles in {directory}'))
+            return
+
+        for entry in index[:options['limit']]:
+            created = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(entry['created']))
+            self.stdout.write(self.style.SUCCESS(
+                f'{entry["duration_ms"]:>10.1f}ms  {entry["method"]} {entry["path"]} '
+                f'[{entry["view"]}] {entry["mode"]} {created}'
+            ))
+            for name, value in entry['top'][:options['top']]:
+                self.stdout.write(f'    {value:>10}  {name}')
+            for name in entry['files']:
+                self.stdout.write(f'    {os.path.join(directory, name)}')
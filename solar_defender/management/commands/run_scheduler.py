@@ -0,0 +1,55 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from django.utils import timezone
+from weather_api.scheduler import TASKS, Scheduler, schedule
+
+class Command(BaseCommand):
+    help = 'Run periodic tasks (NASA ingestion, leaderboard, reports) on SCHEDULER_TASKS intervals; safe on several nodes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Run the tasks that are due and exit')
+        parser.add_argument('--task', choices=sorted(TASKS), help='Run this task now (still takes its lock) and exit')
+        parser.add_argument('--list', action='store_true', help='Show each task with its last and next run')
+
+    def handle(self, *args, **options):
+        scheduler = Scheduler()
+
+        if options['list']:
+            for name, task_options in schedule().items():
+                last = scheduler.last_run(name)
+                self.stdout.write(
+                    f'{name:<20} every {task_options["interval"]}s (+{task_options["jitter"]}s jitter)  '
+                    f'last: {last.isoformat() if last else "never"}  '
+                    f'next: {scheduler.next_due(name, task_options).isoformat()}'
+                )
+            return
+
+        if options['task']:
+            run = scheduler.run(options['task'], force=True)
+            if run is None:
+                raise CommandError(f'{options["task"]} is running on another node')
+            self.report(run)
+            return
+
+        self.stdout.write(self.style.WARNING(
+            f'Scheduler {scheduler.owner} running: {", ".join(schedule()) or "no tasks enabled"}'
+        ))
+        try:
+            while True:
+                for run in scheduler.run_due():
+                    self.report(run)
+                if options['once']:
+                    break
+                close_old_connections()
+                time.sleep(scheduler.seconds_until_next())
+        except KeyboardInterrupt:
+            pass
+
+    def report(self, run):
+        seconds = (run.finished_at - run.started_at).total_seconds()
+        if run.status == run.SUCCEEDED:
+            self.stdout.write(self.style.SUCCESS(f'{run.task} finished in {seconds:.2f}s: {run.result}'))
+        else:
+            self.stdout.write(self.style.ERROR(f'{run.task} failed after {seconds:.2f}s: {run.error}'))
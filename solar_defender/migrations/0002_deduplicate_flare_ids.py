@@ -0,0 +1,33 @@
+from django.db import migrations
+from django.db.models import Count, Min
+
+
+def deduplicate_flare_ids(apps, schema_editor):
+    """
+    قبل جعل flare_id فريداً: نُبقي أقدم توهج لكل flare_id
+    ونحوّل المهمات المرتبطة بالنسخ المكررة إليه ثم نحذف النسخ.
+    """
+    SolarFlare = apps.get_model('solar_defender', 'SolarFlare')
+    Mission = apps.get_model('solar_defender', 'Mission')
+
+    duplicates = (
+        SolarFlare.objects.values('flare_id')
+        .annotate(count=Count('id'), keep_id=Min('id'))
+        .filter(count__gt=1)
+    )
+
+    for duplicate in duplicates:
+        extra = SolarFlare.objects.filter(flare_id=duplicate['flare_id']).exclude(id=duplicate['keep_id'])
+        Mission.objects.filter(flare__in=extra).update(flare_id=duplicate['keep_id'])
+        extra.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('solar_defender', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(deduplicate_flare_ids, migrations.RunPython.noop),
+    ]
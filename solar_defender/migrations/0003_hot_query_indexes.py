@@ -0,0 +1,42 @@
+# Generated by Django 4.2.7 on 2026-10-19 07:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('solar_defender', '0002_deduplicate_flare_ids'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='solarflare',
+            name='flare_id',
+            field=models.CharField(max_length=100, unique=True),
+        ),
+        migrations.AddIndex(
+            model_name='gamesession',
+            index=models.Index(condition=models.Q(('completed', True)), fields=['-score'], name='sd_session_completed_score'),
+        ),
+        migrations.AddIndex(
+            model_name='leaderboard',
+            index=models.Index(fields=['rank_position'], name='sd_leaderboard_rank'),
+        ),
+        migrations.AddIndex(
+            model_name='mission',
+            index=models.Index(fields=['session', 'phase_number'], name='sd_mission_session_phase'),
+        ),
+        migrations.AddIndex(
+            model_name='solarflare',
+            index=models.Index(condition=models.Q(('is_simulation', False)), fields=['-begin_time'], name='sd_flare_real_begin'),
+        ),
+        migrations.AddIndex(
+            model_name='solarflare',
+            index=models.Index(fields=['-begin_time'], name='sd_flare_begin'),
+        ),
+        migrations.AddIndex(
+            model_name='solarflare',
+            index=models.Index(fields=['flare_class'], name='sd_flare_class'),
+        ),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 4.2.7 on 2026-10-19 07:17
+
+from django.db import migrations, models
+
+from config.archive import history_view_sql
+
+# أعمدة الـ view (مشتركة بين الجدول الساخن والأرشيف)
+COLUMNS = [
+    'id', 'flare_id', 'class_type', 'flare_class', 'intensity', 'begin_time',
+    'is_simulation', 'created_at',
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('solar_defender', '0003_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SolarFlareHistory',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('flare_id', models.CharField(max_length=100)),
+                ('class_type', models.CharField(max_length=10)),
+                ('flare_class', models.CharField(choices=[('A', 'A-Class'), ('B', 'B-Class'), ('C', 'C-Class'), ('M', 'M-Class'), ('X', 'X-Class')], max_length=1)),
+                ('intensity', models.FloatField()),
+                ('begin_time', models.DateTimeField()),
+                ('is_simulation', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField()),
+            ],
+            options={
+                'db_table': 'solar_defender_solarflare_history',
+                'ordering': ['-begin_time'],
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedSolarFlare',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('flare_id', models.CharField(max_length=100, unique=True)),
+                ('class_type', models.CharField(max_length=10)),
+                ('flare_class', models.CharField(choices=[('A', 'A-Class'), ('B', 'B-Class'), ('C', 'C-Class'), ('M', 'M-Class'), ('X', 'X-Class')], max_length=1)),
+                ('intensity', models.FloatField()),
+                ('begin_time', models.DateTimeField()),
+                ('is_simulation', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['-begin_time'],
+                'indexes': [models.Index(fields=['-begin_time'], name='sd_archive_begin')],
+            },
+        ),
+        migrations.RunSQL(
+            history_view_sql(
+                'solar_defender_solarflare_history', 'solar_defender_solarflare',
+                'solar_defender_archivedsolarflare', COLUMNS
+            ),
+            'DROP VIEW solar_defender_solarflare_history',
+        ),
+    ]
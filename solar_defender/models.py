@@ -1,6 +1,8 @@
 from django.db import models
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator, MaxValueValidator
+from config.impacts import game_impact
+from config.archive import partition
 
 class Player(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, null=True, blank=True)
@@ -45,6 +47,13 @@ class GameSession(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # لوحة المتصدرين والإحصائيات: completed=True مرتبة حسب score
+            # (partial index لأن SQLite يكتب الشرط WHERE "completed" فلا يستخدم index مركب)
+            models.Index(
+                fields=['-score'], condition=models.Q(completed=True), name='sd_session_completed_score'
+            ),
+        ]
     
     def calculate_rank(self):
         if self.score >= 80:
@@ -68,7 +77,7 @@ class SolarFlare(models.Model):
         ('X', 'X-Class'),
     ]
     
-    flare_id = models.CharField(max_length=100)
+    flare_id = models.CharField(max_length=100, unique=True)
     class_type = models.CharField(max_length=10)
     flare_class = models.CharField(max_length=1, choices=FLARE_CLASSES)
     intensity = models.FloatField()
@@ -78,16 +87,17 @@ class SolarFlare(models.Model):
     
     class Meta:
         ordering = ['-begin_time']
+        indexes = [
+            # recent: التوهجات الحقيقية فقط (is_simulation=False) مرتبة حسب الوقت
+            models.Index(
+                fields=['-begin_time'], condition=models.Q(is_simulation=False), name='sd_flare_real_begin'
+            ),
+            models.Index(fields=['-begin_time'], name='sd_flare_begin'),
+            models.Index(fields=['flare_class'], name='sd_flare_class'),
+        ]
     
     def calculate_impact(self):
-        impacts = {
-            'A': {'power': 0, 'satellites': 0, 'comm': 0, 'message': "Minimal impact"},
-            'B': {'power': 5, 'satellites': 3, 'comm': 8, 'message': "Minor radio interference"},
-            'C': {'power': 15, 'satellites': 10, 'comm': 20, 'message': "GPS and radio disruption"},
-            'M': {'power': 30, 'satellites': 25, 'comm': 40, 'message': "Potential power grid fluctuations"},
-            'X': {'power': 50, 'satellites': 40, 'comm': 60, 'message': "Critical infrastructure at risk!"}
-        }
-        return impacts.get(self.flare_class, impacts['B'])
+        return game_impact(self.flare_class)
     
     def __str__(self):
         return f"{self.class_type} - {self.begin_time}"
@@ -114,6 +124,9 @@ class Mission(models.Model):
     
     class Meta:
         ordering = ['phase_number']
+        indexes = [
+            models.Index(fields=['session', 'phase_number'], name='sd_mission_session_phase'),
+        ]
     
     def __str__(self):
         return f"Mission {self.phase_number} - {self.session.player.name}"
@@ -127,6 +140,54 @@ class Leaderboard(models.Model):
     class Meta:
         ordering = ['rank_position']
         unique_together = ['player', 'session']
+        indexes = [
+            models.Index(fields=['rank_position'], name='sd_leaderboard_rank'),
+        ]
     
     def __str__(self):
-        return f"{self.rank_position}. {self.player.name} - {self.session.score}"
\ No newline at end of file
+        return f"{self.rank_position}. {self.player.name} - {self.session.score}"
+
+
+class ArchivedSolarFlare(models.Model):
+    """توهجات قديمة نُقلت من SolarFlare بأمر archive_flares (نفس الأعمدة ونفس الـ id)"""
+    id = models.BigIntegerField(primary_key=True)
+    flare_id = models.CharField(max_length=100, unique=True)
+    class_type = models.CharField(max_length=10)
+    flare_class = models.CharField(max_length=1, choices=SolarFlare.FLARE_CLASSES)
+    intensity = models.FloatField()
+    begin_time = models.DateTimeField()
+    is_simulation = models.BooleanField(default=False)
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['-begin_time']
+        indexes = [
+            models.Index(fields=['-begin_time'], name='sd_archive_begin'),
+        ]
+
+class SolarFlareHistory(models.Model):
+    """كل التوهجات: SolarFlare + ArchivedSolarFlare (database view بـ UNION ALL، للقراءة فقط)"""
+    id = models.BigIntegerField(primary_key=True)
+    flare_id = models.CharField(max_length=100)
+    class_type = models.CharField(max_length=10)
+    flare_class = models.CharField(max_length=1, choices=SolarFlare.FLARE_CLASSES)
+    intensity = models.FloatField()
+    begin_time = models.DateTimeField()
+    is_simulation = models.BooleanField(default=False)
+    created_at = models.DateTimeField()
+    
+    class Meta:
+        managed = False
+        db_table = 'solar_defender_solarflare_history'
+        ordering = ['-begin_time']
+    
+    def calculate_impact(self):
+        return game_impact(self.flare_class)
+    
+    def __str__(self):
+        return f"{self.class_type} - {self.begin_time}"
+
+def flares_since(start=None):
+    """التوهجات من start (الجدول الساخن فقط إذا لم تصل الفترة إلى الأرشيف)"""
+    return partition(SolarFlare, ArchivedSolarFlare, SolarFlareHistory, start)
@@ -1,13 +1,16 @@
 from rest_framework import serializers
 from .models import Player, GameSession, SolarFlare, Mission, Leaderboard
 from django.contrib.auth.models import User
+from config.fast_serializers import ValuesSerializer, datetime_field, display
+from config.timing import TimedSerializerMixin
+from config.impacts import game_impact
 
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ['id', 'username', 'email']
 
-class PlayerSerializer(serializers.ModelSerializer):
+class PlayerSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
     
     class Meta:
@@ -18,9 +21,9 @@ class PlayerSerializer(serializers.ModelSerializer):
 class PlayerCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Player
-        fields = ['name']
+        fields = ['id', 'name']
 
-class SolarFlareSerializer(serializers.ModelSerializer):
+class SolarFlareSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     impact = serializers.SerializerMethodField()
     
     class Meta:
@@ -33,7 +36,7 @@ class SolarFlareSerializer(serializers.ModelSerializer):
     def get_impact(self, obj):
         return obj.calculate_impact()
 
-class MissionSerializer(serializers.ModelSerializer):
+class MissionSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     flare = SolarFlareSerializer(read_only=True)
     defense_strategy_name = serializers.CharField(source='get_defense_choice_display', read_only=True)
     
@@ -50,12 +53,12 @@ class MissionCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Mission
         fields = [
-            'flare', 'defense_choice', 'phase_number',
+            'session', 'flare', 'defense_choice', 'phase_number',
             'power_grid_after', 'satellites_after', 
             'communications_after', 'earth_health_after', 'points_earned'
         ]
 
-class GameSessionSerializer(serializers.ModelSerializer):
+class GameSessionSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     player = PlayerSerializer(read_only=True)
     missions = MissionSerializer(many=True, read_only=True)
     rank_name = serializers.CharField(source='get_rank_display', read_only=True)
@@ -79,7 +82,7 @@ class GameSessionCreateSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = GameSession
-        fields = ['player_id']
+        fields = ['id', 'player_id']
     
     def create(self, validated_data):
         player = Player.objects.get(id=validated_data['player_id'])
@@ -93,7 +96,7 @@ class GameSessionUpdateSerializer(serializers.ModelSerializer):
             'satellites', 'communications', 'completed'
         ]
 
-class LeaderboardSerializer(serializers.ModelSerializer):
+class LeaderboardSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     player_name = serializers.CharField(source='player.name', read_only=True)
     score = serializers.IntegerField(source='session.score', read_only=True)
     rank_display = serializers.CharField(source='session.get_rank_display', read_only=True)
@@ -138,4 +141,30 @@ class SingleChartResponseSerializer(serializers.Serializer):
     """Serializer لرسم بياني واحد"""
     session_id = serializers.IntegerField()
     chart_type = serializers.CharField()
-    chart = serializers.CharField(help_text="Base64 encoded image")
\ No newline at end of file
+    chart = serializers.CharField(help_text="Base64 encoded image")
+
+# ====================================================================
+# Fast read-only serializers (values_list) - نفس ناتج الـ serializers أعلاه
+# ====================================================================
+
+class SolarFlareFastSerializer(ValuesSerializer):
+    fields = (
+        ('id', 'id', None),
+        ('flare_id', 'flare_id', None),
+        ('class_type', 'class_type', None),
+        ('flare_class', 'flare_class', None),
+        ('intensity', 'intensity', float),
+        ('begin_time', 'begin_time', datetime_field),
+        ('is_simulation', 'is_simulation', None),
+        ('impact', 'flare_class', game_impact),
+    )
+
+class LeaderboardFastSerializer(ValuesSerializer):
+    fields = (
+        ('id', 'id', None),
+        ('rank_position', 'rank_position', None),
+        ('player_name', 'player__name', None),
+        ('score', 'session__score', None),
+        ('rank_display', 'session__rank', display(GameSession.RANK_CHOICES)),
+        ('updated_at', 'updated_at', datetime_field),
+    )
@@ -1,33 +1,51 @@
 import requests
 from datetime import datetime, timedelta
 from django.conf import settings
-from .models import SolarFlare
+from django.db import transaction
+from config.metrics import (
+    INGESTION_ROWS, INGESTION_SECONDS, LEADERBOARD_REBUILD_SECONDS, NASA_FETCH_ERRORS, NASA_FETCH_SECONDS,
+)
+from config.timing import timed
+from .models import ArchivedSolarFlare, GameSession, Leaderboard, SolarFlare
+from .simulation_service import SimulationFlarePool
 
 class NASAService:
     def __init__(self):
         self.api_key = getattr(settings, 'NASA_API_KEY', 'DEMO_KEY')
-        self.base_url = "https://api.nasa.gov/DONKI/FLR"
+        self.base_url = getattr(settings, 'NASA_DONKI_URL', 'https://api.nasa.gov/DONKI/FLR')
+        # True بعد استجابة ناجحة من NASA (انظر weather_api.jobs.ingestion_age)
+        self.nasa_ok = False
+    
+    def _params(self, days):
+        return {
+            'startDate': (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d'),
+            'endDate': datetime.now().strftime('%Y-%m-%d'),
+            'api_key': self.api_key
+        }
+    
+    def _handle_response(self, response):
+        """استجابة requests -> التوهجات المعالجة"""
+        if response.status_code == 200:
+            self.nasa_ok = True
+            data = response.json()
+            return self._process_nasa_data(data)
+        
+        NASA_FETCH_ERRORS.inc(service='solar_defender', reason=response.status_code)
+        return []
+    
+    def _handle_error(self, error):
+        NASA_FETCH_ERRORS.inc(service='solar_defender', reason=type(error).__name__)
+        print(f"Error fetching NASA data: {error}")
+        return []
     
     def fetch_flares(self, days=7):
         """جلب التوهجات من NASA API"""
         try:
-            params = {
-                'startDate': (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d'),
-                'endDate': datetime.now().strftime('%Y-%m-%d'),
-                'api_key': self.api_key
-            }
-            
-            response = requests.get(self.base_url, params=params, timeout=10)
-            
-            if response.status_code == 200:
-                data = response.json()
-                return self._process_nasa_data(data)
-            
-            return []
-        
+            with timed('nasa'), NASA_FETCH_SECONDS.time(service='solar_defender'):
+                response = requests.get(self.base_url, params=self._params(days), timeout=10)
+            return self._handle_response(response)
         except Exception as e:
-            print(f"Error fetching NASA data: {e}")
-            return []
+            return self._handle_error(e)
     
     def _process_nasa_data(self, data):
         """معالجة بيانات NASA"""
@@ -65,40 +83,53 @@ class NASAService:
         except:
             return datetime.now()
     
+    def archived(self, flares_data):
+        """flare_id للتوهجات المؤرشفة (لا تُدخل مرة أخرى في الجدول الساخن)"""
+        return ArchivedSolarFlare.objects.filter(
+            flare_id__in=[flare_data['flare_id'] for flare_data in flares_data]
+        ).order_by().values_list('flare_id', flat=True)
+    
     def fetch_and_save_flares(self):
         """جلب وحفظ التوهجات في قاعدة البيانات"""
         flares_data = self.fetch_flares()
         
         if not flares_data:
-            # إذا فشل الجلب، استخدم المحاكاة
-            return self.create_simulation_flares()
+            # إذا فشل الجلب، استخدم مجموعة المحاكاة الجاهزة
+            return SimulationFlarePool().current_set()
         
+        archived = set(self.archived(flares_data))
         flares = []
-        for flare_data in flares_data:
-            flare, created = SolarFlare.objects.get_or_create(
-                flare_id=flare_data['flare_id'],
-                defaults=flare_data
-            )
-            flares.append(flare)
+        with INGESTION_SECONDS.time(source='solar_defender'):
+            for flare_data in flares_data:
+                if flare_data['flare_id'] in archived:
+                    continue
+                flare, created = SolarFlare.objects.get_or_create(
+                    flare_id=flare_data['flare_id'],
+                    defaults=flare_data
+                )
+                flares.append(flare)
+        INGESTION_ROWS.inc(len(flares), source='solar_defender')
         
         return flares
     
-    def create_simulation_flares(self):
-        """إنشاء توهجات محاكاة"""
-        simulation_classes = ['B3.2', 'C1.5', 'M2.1', 'B7.8', 'X1.3', 'C5.6', 'M4.2']
-        flares = []
-        
-        for i, class_type in enumerate(simulation_classes):
-            flare_data = {
-                'flare_id': f'SIMULATION-FLARE-{datetime.now().timestamp()}-{i}',
-                'class_type': class_type,
-                'flare_class': class_type[0],
-                'intensity': float(class_type[1:]) if len(class_type) > 1 else 1.0,
-                'begin_time': datetime.now() - timedelta(hours=i * 6),
-                'is_simulation': True
-            }
+class LeaderboardService:
+    """إعادة بناء لوحة المتصدرين (من الـ API وأمر update_leaderboard)"""
+    
+    size = 100
+    
+    @LEADERBOARD_REBUILD_SECONDS.time()
+    def rebuild(self):
+        """أفضل الجلسات المكتملة بالترتيب (ترجع الإدخالات الجديدة)"""
+        with transaction.atomic():
+            top_sessions = GameSession.objects.filter(
+                completed=True
+            ).order_by('-score')[:self.size]
             
-            flare = SolarFlare.objects.create(**flare_data)
-            flares.append(flare)
-        
-        return flares
\ No newline at end of file
+            # حذف الإدخالات القديمة
+            Leaderboard.objects.all().delete()
+            
+            leaderboard_entries = [
+                Leaderboard(player_id=session.player_id, session=session, rank_position=position)
+                for position, session in enumerate(top_sessions, start=1)
+            ]
+            return Leaderboard.objects.bulk_create(leaderboard_entries)
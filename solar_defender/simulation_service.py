@@ -0,0 +1,246 @@
+import time
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from config.caching import bump_version
+from config.impacts import game_impact
+
+from .models import Mission, SolarFlare
+from .utils import DefenseCalculator
+
+
+class FlareSequenceGenerator:
+    """
+    توليد تسلسلات توهجات عشوائية بصعوبة محددة
+
+    الصعوبة تُقدَّر بمحاكاة Monte-Carlo: آلاف الجولات لكل تسلسل باستراتيجيات
+    عشوائية، والصعوبة = 1 - (متوسط النقاط / أقصى نقاط ممكنة).
+    كل الجولات لكل التسلسلات المرشحة تُحسب دفعة واحدة بـ numpy.
+    """
+
+    FLARE_CLASSES = [c for c, _ in SolarFlare.FLARE_CLASSES]
+    MAX_POINTS_PER_PHASE = 25
+
+    def __init__(self, phases=7, playthroughs=2000, tolerance=0.05, batch_size=64, seed=None):
+        self.phases = phases
+        self.playthroughs = playthroughs
+        self.tolerance = tolerance
+        self.batch_size = batch_size
+        self.rng = np.random.default_rng(seed)
+        self.strategies = np.array([choice for choice, _ in Mission.DEFENSE_STRATEGIES])
+
+        impacts = [game_impact(c) for c in self.FLARE_CLASSES]
+        self.impact_table = np.array(
+            [(i['power'], i['satellites'], i['comm']) for i in impacts]
+        )
+
+    def estimate_difficulty(self, sequences, playthroughs=None):
+        """
+        تقدير صعوبة كل تسلسل
+
+        Args:
+            sequences: مصفوفة (candidates, phases) بمؤشرات الفئات في FLARE_CLASSES
+
+        Returns:
+            مصفوفة صعوبات بين 0 و 1
+        """
+        sequences = np.atleast_2d(sequences)
+        playthroughs = playthroughs or self.playthroughs
+        candidates, phases = sequences.shape
+        shape = (candidates, playthroughs)
+
+        power_grid = np.full(shape, 100)
+        satellites = np.full(shape, 100)
+        communications = np.full(shape, 100)
+        score = np.zeros(shape, dtype=np.int64)
+
+        choices = self.rng.choice(self.strategies, size=(phases,) + shape)
+
+        for phase in range(phases):
+            impacts = self.impact_table[sequences[:, phase]][:, np.newaxis, :]
+            outcome = DefenseCalculator.calculate_defense_impact_batch(
+                choices[phase], impacts, power_grid, satellites, communications
+            )
+            score += DefenseCalculator.calculate_mission_points_batch(outcome)
+            power_grid = outcome['power_grid']
+            satellites = outcome['satellites']
+            communications = outcome['communications']
+
+        max_score = phases * self.MAX_POINTS_PER_PHASE
+        return 1 - score.mean(axis=1) / max_score
+
+    def difficulty_range(self):
+        """
+        (أقل، أعلى) صعوبة ممكنة: كل المراحل من أضعف فئة / أقوى فئة
+
+        الصعوبة المطلوبة خارج هذا المدى لا يمكن الوصول إليها (مثلاً 0 أو 1)
+        فتُقرَّب إلى أقرب حد بدلاً من البحث حتى max_batches ثم الفشل.
+        """
+        if not hasattr(self, '_difficulty_range'):
+            extremes = np.repeat(
+                np.array([[0], [len(self.FLARE_CLASSES) - 1]]), self.phases, axis=1
+            )
+            lowest, highest = self.estimate_difficulty(extremes)
+            self._difficulty_range = (float(lowest), float(highest))
+        return self._difficulty_range
+
+    def _class_weights(self, difficulty):
+        """توزيع الفئات: الصعوبة الأعلى تميل إلى M و X"""
+        severity = np.arange(len(self.FLARE_CLASSES))
+        center = difficulty * (len(severity) - 1)
+        weights = np.exp(-((severity - center) ** 2) / 2.0)
+        return weights / weights.sum()
+
+    def _sample(self, difficulty, size):
+        return self.rng.choice(
+            len(self.FLARE_CLASSES),
+            size=(size, self.phases),
+            p=self._class_weights(difficulty)
+        )
+
+    def _class_types(self, sequence):
+        intensities = self.rng.uniform(1.0, 9.9, size=len(sequence))
+        return [
+            f'{self.FLARE_CLASSES[index]}{intensity:.1f}'
+            for index, intensity in zip(sequence, intensities)
+        ]
+
+    def generate(self, difficulty, count=1, max_batches=200):
+        """
+        توليد count تسلسل بصعوبة قريبة من difficulty (± tolerance)
+
+        difficulty تُقرَّب إلى difficulty_range().
+
+        Returns:
+            list من dict: {'class_types': [...], 'difficulty': float}
+        """
+        difficulty = float(np.clip(difficulty, *self.difficulty_range()))
+        generated = []
+
+        for _ in range(max_batches):
+            candidates = self._sample(difficulty, self.batch_size)
+            estimates = self.estimate_difficulty(candidates)
+            accepted = np.abs(estimates - difficulty) <= self.tolerance
+
+            for sequence, estimate in zip(candidates[accepted], estimates[accepted]):
+                generated.append({
+                    'class_types': self._class_types(sequence),
+                    'difficulty': round(float(estimate), 4)
+                })
+                if len(generated) >= count:
+                    return generated
+
+        raise ValueError(
+            f'Could not generate {count} flare sequences at difficulty '
+            f'{difficulty} (got {len(generated)})'
+        )
+
+
+class SimulationFlarePool:
+    """
+    مجموعة ثابتة من مجموعات التوهجات المحاكاة تُولَّد مرة واحدة
+
+    بدلاً من إنشاء 7 صفوف جديدة في كل طلب، تُخزَّن المجموعات في قاعدة البيانات
+    مرة واحدة وتُقدَّم من الكاش، وتتبدل المجموعة الحالية كل فترة دوران.
+    """
+
+    FLARE_ID_PREFIX = 'SIMULATION-POOL'
+    CACHE_PREFIX = 'simulation-pool'
+    PHASES = 7
+
+    def __init__(self):
+        self.size = getattr(settings, 'SIMULATION_POOL_SIZE', 100)
+        self.difficulty = getattr(settings, 'SIMULATION_POOL_DIFFICULTY', 0.5)
+        self.rotation = getattr(settings, 'SIMULATION_POOL_ROTATION_SECONDS', 60 * 60)
+
+    def flare_ids(self, index):
+        """معرفات توهجات المجموعة رقم index"""
+        return [f'{self.FLARE_ID_PREFIX}-{index:05d}-{phase}' for phase in range(self.PHASES)]
+
+    def pool_flares(self):
+        # نطاق على flare_id بدلاً من startswith (LIKE) ليستخدم الـ unique index
+        return SolarFlare.objects.filter(
+            is_simulation=True,
+            flare_id__gte=f'{self.FLARE_ID_PREFIX}-',
+            flare_id__lt=f'{self.FLARE_ID_PREFIX}.'
+        )
+
+    def count_sets(self):
+        return self.pool_flares().count() // self.PHASES
+
+    def build(self, size=None, difficulty=None):
+        """
+        توليد المجموعات الناقصة حتى يصل حجم المجموعة إلى size
+
+        المجموعات الموجودة لا تُحذف لأن المهمات السابقة تشير إلى توهجاتها.
+        Returns:
+            عدد المجموعات الجديدة
+        """
+        size = size or self.size
+        difficulty = self.difficulty if difficulty is None else difficulty
+        existing = self.count_sets()
+        missing = size - existing
+
+        if missing <= 0:
+            return 0
+
+        sequences = FlareSequenceGenerator(phases=self.PHASES).generate(difficulty, count=missing)
+        now = timezone.now()
+        flares = []
+
+        for index, sequence in enumerate(sequences, start=existing):
+            for phase, (flare_id, class_type) in enumerate(
+                zip(self.flare_ids(index), sequence['class_types'])
+            ):
+                flares.append(SolarFlare(
+                    flare_id=flare_id,
+                    class_type=class_type,
+                    flare_class=class_type[0],
+                    intensity=float(class_type[1:]),
+                    begin_time=now - timedelta(hours=phase * 6),
+                    is_simulation=True
+                ))
+
+        try:
+            with transaction.atomic():
+                SolarFlare.objects.bulk_create(flares, batch_size=500)
+        except IntegrityError:
+            # بناء متزامن (طلب آخر أو الأمر) أنشأ نفس المعرفات قبلنا
+            return 0
+
+        bump_version(SolarFlare)
+        cache.delete(f'{self.CACHE_PREFIX}:size')
+
+        return missing
+
+    def current_set(self):
+        """المجموعة الحالية (من الكاش، بدون أي كتابة في قاعدة البيانات)"""
+        slot = int(time.time() // self.rotation)
+        key = f'{self.CACHE_PREFIX}:set:{slot}'
+        flares = cache.get(key)
+
+        if flares is None:
+            size = cache.get_or_set(f'{self.CACHE_PREFIX}:size', self.count_sets, self.rotation)
+
+            if size == 0:
+                # أول استخدام فقط: بناء المجموعة (الطلبات المتزامنة آمنة، انظر build)
+                self.build()
+                size = self.count_sets()
+                cache.set(f'{self.CACHE_PREFIX}:size', size, self.rotation)
+
+            if size == 0:
+                return []
+
+            ids = self.flare_ids(slot % size)
+            by_id = {
+                flare.flare_id: flare
+                for flare in SolarFlare.objects.filter(flare_id__in=ids)
+            }
+            flares = [by_id[flare_id] for flare_id in ids if flare_id in by_id]
+            cache.set(key, flares, self.rotation)
+
+        return flares
@@ -0,0 +1,167 @@
+import hashlib
+import heapq
+from functools import lru_cache
+
+from django.core.cache import cache
+
+from config.impacts import game_impact
+
+from .models import Mission
+from .utils import DefenseCalculator
+
+
+class StrategyService:
+    """
+    إيجاد أفضل تسلسل لاستراتيجيات الدفاع لمجموعة توهجات
+
+    بدلاً من تجربة 4^n تسلسل، نستخدم البرمجة الديناميكية مع memoization
+    على حالة الأنظمة (power, satellites, comms) بعد كل مرحلة.
+    """
+
+    # التسلسلات مرتبة حسب DefenseCalculator.calculate_mission_points (تقدير، انظر هناك)
+    SCORE_MODEL = 'estimated: earth_health * 25 // 100 - points_cost // 5 per phase; not the client game score'
+
+    CACHE_PREFIX = 'strategy-solver:v2'
+    CACHE_TIMEOUT = 60 * 60
+
+    def __init__(self, class_types, initial_systems=None, resolution=1):
+        self.class_types = [c or 'B' for c in class_types]
+        self.initial_systems = {
+            'power_grid': 100,
+            'satellites': 100,
+            'communications': 100,
+            **(initial_systems or {})
+        }
+        # resolution > 1 يدمج الحالات المتقاربة (حل تقريبي أسرع)
+        self.resolution = max(1, int(resolution))
+        self.impacts = [game_impact(c[0]) for c in self.class_types]
+        self.strategies = [choice for choice, _ in Mission.DEFENSE_STRATEGIES]
+
+    @classmethod
+    def for_flares(cls, flares, **kwargs):
+        """إنشاء الخدمة من كائنات SolarFlare"""
+        return cls([flare.class_type for flare in flares], **kwargs)
+
+    def cache_key(self, top):
+        """مفتاح الكاش: hash لفئات التوهجات والحالة الابتدائية"""
+        systems = self.initial_systems
+        raw = '|'.join([
+            ','.join(c[0] for c in self.class_types),
+            f"{systems['power_grid']},{systems['satellites']},{systems['communications']}",
+            str(self.resolution),
+            str(top),
+        ])
+        digest = hashlib.sha1(raw.encode()).hexdigest()
+        return f'{self.CACHE_PREFIX}:{digest}'
+
+    def solve(self, top=3):
+        """
+        إرجاع أفضل تسلسل مع البدائل القريبة منه (مع كاش)
+
+        الكاش يحفظ التسلسلات فقط (تعتمد على فئة التوهج)، وتفاصيل المراحل تُبنى
+        لكل طلب من class_types الخاصة به.
+        """
+        top = max(1, int(top))
+        key = self.cache_key(top)
+        result = cache.get(key)
+
+        if result is None:
+            result = self._solve(top)
+            cache.set(key, result, self.CACHE_TIMEOUT)
+
+        sequences = [self.replay(sequence) for sequence in result['sequences']]
+
+        return {
+            'flares': self.class_types,
+            'optimal': sequences[0] if sequences else None,
+            'alternatives': sequences[1:],
+            'states_explored': result['states_explored'],
+            'sequences_total': result['sequences_total'],
+            'score_model': self.SCORE_MODEL,
+        }
+
+    def _quantize(self, value):
+        return value - value % self.resolution
+
+    def _solve(self, top):
+        impacts = self.impacts
+        phases = len(impacts)
+
+        @lru_cache(maxsize=None)
+        def best(phase, power_grid, satellites, communications):
+            """أفضل top تسلسلات من هذه المرحلة والحالة"""
+            if phase == phases:
+                return ((0, ()),)
+
+            systems = {
+                'power_grid': power_grid,
+                'satellites': satellites,
+                'communications': communications,
+            }
+            candidates = []
+
+            for choice in self.strategies:
+                outcome = DefenseCalculator.calculate_defense_impact(
+                    choice, impacts[phase], systems
+                )
+                points = DefenseCalculator.calculate_mission_points(outcome)
+
+                for score, sequence in best(
+                    phase + 1,
+                    self._quantize(outcome['power_grid']),
+                    self._quantize(outcome['satellites']),
+                    self._quantize(outcome['communications']),
+                ):
+                    candidates.append((score + points, (choice,) + sequence))
+
+            return tuple(heapq.nlargest(top, candidates, key=lambda c: c[0]))
+
+        systems = self.initial_systems
+        ranked = best(
+            0,
+            self._quantize(systems['power_grid']),
+            self._quantize(systems['satellites']),
+            self._quantize(systems['communications']),
+        )
+
+        return {
+            'sequences': [sequence for _, sequence in ranked],
+            'states_explored': best.cache_info().currsize,
+            'sequences_total': len(self.strategies) ** phases,
+        }
+
+    def replay(self, sequence):
+        """تطبيق تسلسل استراتيجيات وإرجاع تفاصيل كل مرحلة"""
+        strategy_names = dict(Mission.DEFENSE_STRATEGIES)
+        systems = dict(self.initial_systems)
+        score = 0
+        phases = []
+
+        for phase_number, (choice, impact, class_type) in enumerate(
+            zip(sequence, self.impacts, self.class_types), start=1
+        ):
+            outcome = DefenseCalculator.calculate_defense_impact(choice, impact, systems)
+            points = DefenseCalculator.calculate_mission_points(outcome)
+            score += points
+            systems = {
+                'power_grid': outcome['power_grid'],
+                'satellites': outcome['satellites'],
+                'communications': outcome['communications'],
+            }
+            phases.append({
+                'phase_number': phase_number,
+                'class_type': class_type,
+                'defense_choice': choice,
+                'defense_strategy_name': strategy_names[choice],
+                'power_grid_after': outcome['power_grid'],
+                'satellites_after': outcome['satellites'],
+                'communications_after': outcome['communications'],
+                'earth_health_after': outcome['earth_health'],
+                'points_earned': points,
+            })
+
+        return {
+            'score': score,
+            'strategies': list(sequence),
+            'phases': phases,
+        }
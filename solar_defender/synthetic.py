@@ -0,0 +1,201 @@
+"""
+توليد بيانات تجريبية واقعية بأي حجم (أمر generate_synthetic_data ومجموعة
+القياس endpoints)
+
+- التوهجات موزعة على آخر days يوماً بنسب قريبة من الواقع (B و C الأكثر، X نادرة)
+  في التطبيقين، و 10% من توهجات اللعبة محاكاة
+- لكل لاعب عدة جلسات، 80% منها مكتملة بـ 7 مهمات على توهجات عشوائية
+- تقرير طقس لكل ساعة بأقوى توهج حقيقي
+الإدخال على دفعات (bulk_create) فلا تُحمَّل ملايين الكائنات في الذاكرة.
+"""
+import random
+from datetime import timedelta
+from itertools import islice
+
+from django.db import transaction
+from django.utils import timezone
+
+from config.caching import bump_version
+from config.impacts import risk_profile
+from weather_api.models import SolarFlare as WeatherSolarFlare, SpaceWeatherReport
+
+from .models import GameSession, Mission, Player, SolarFlare
+from .services import LeaderboardService
+
+FLARE_CLASS_WEIGHTS = {'A': 5, 'B': 35, 'C': 45, 'M': 13, 'X': 2}
+PHASES = 7
+COMPLETED_RATIO = 0.8
+SIMULATION_RATIO = 0.1
+
+
+def scale_counts(rows):
+    """الأعداد لكل جدول لحجم rows (عدد التوهجات في كل تطبيق)"""
+    return {
+        'flares': rows,
+        'players': max(1, rows // 20),
+        'sessions': max(1, rows // 10),
+        'reports': max(1, min(rows // 100, 365 * 24)),
+    }
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def flare_ids_exist(prefix):
+    """هل وُلِّدت بيانات بهذه البادئة من قبل (flare_id فريد في التطبيقين)"""
+    id_range = {'flare_id__gte': f'{prefix}-', 'flare_id__lt': f'{prefix}.'}
+    return SolarFlare.objects.filter(**id_range).exists() or WeatherSolarFlare.objects.filter(**id_range).exists()
+
+
+class SyntheticDataGenerator:
+    def __init__(self, seed=0, days=365, batch_size=5000, prefix='SYN'):
+        self.rng = random.Random(seed)
+        self.days = days
+        self.batch_size = batch_size
+        self.prefix = prefix
+        self.now = timezone.now()
+
+    def flare_shape(self):
+        """(class_type, flare_class, intensity, begin_time)"""
+        flare_class = self.rng.choices(list(FLARE_CLASS_WEIGHTS), weights=FLARE_CLASS_WEIGHTS.values())[0]
+        intensity = round(self.rng.uniform(1.0, 9.9), 1)
+        begin_time = self.now - timedelta(seconds=self.rng.uniform(0, self.days * 86400))
+        return f'{flare_class}{intensity}', flare_class, intensity, begin_time
+
+    def game_flares(self, count):
+        for i in range(count):
+            class_type, flare_class, intensity, begin_time = self.flare_shape()
+            yield SolarFlare(
+                flare_id=f'{self.prefix}-{i}',
+                class_type=class_type,
+                flare_class=flare_class,
+                intensity=intensity,
+                begin_time=begin_time,
+                is_simulation=self.rng.random() < SIMULATION_RATIO,
+            )
+
+    def weather_flares(self, count):
+        for i in range(count):
+            class_type, flare_class, intensity, begin_time = self.flare_shape()
+            peak_time = begin_time + timedelta(minutes=self.rng.randint(5, 30))
+            impact = risk_profile(class_type)
+            yield WeatherSolarFlare(
+                flare_id=f'{self.prefix}-{i}',
+                class_type=class_type,
+                flare_class=flare_class,
+                intensity=intensity,
+                begin_time=begin_time,
+                peak_time=peak_time,
+                end_time=peak_time + timedelta(minutes=self.rng.randint(10, 60)),
+                risk_level=impact['risk'],
+                risk_color=impact['color'],
+                impact_effects=list(impact['effects']),
+            )
+
+    def create(self, model, objects):
+        """bulk_create على دفعات، ترجع الـ ids"""
+        ids = []
+        for batch in batched(objects, self.batch_size):
+            with transaction.atomic():
+                ids.extend(obj.pk for obj in model.objects.bulk_create(batch))
+        return ids
+
+    def session_plan(self, sessions, players):
+        """(رقم اللاعب، مكتملة؟، نقاط كل مرحلة) لكل جلسة"""
+        plan = []
+        for _ in range(sessions):
+            completed = self.rng.random() < COMPLETED_RATIO
+            phases = PHASES if completed else self.rng.randint(0, PHASES - 1)
+            points = [self.rng.randint(0, 14) for _ in range(phases)]
+            plan.append((self.rng.randrange(players), completed, points))
+        return plan
+
+    def create_players(self, count, plan):
+        totals = [0] * count
+        games = [0] * count
+        for player, completed, points in plan:
+            if completed:
+                totals[player] += sum(points)
+                games[player] += 1
+
+        return self.create(Player, (
+            Player(name=f'Synthetic Pilot {i}', total_score=totals[i], games_played=games[i])
+            for i in range(count)
+        ))
+
+    def create_sessions(self, plan, player_ids, flare_ids):
+        """الجلسات ومهماتها، دفعة جلسات ثم مهماتها"""
+        sessions = missions = 0
+
+        for batch in batched(plan, self.batch_size):
+            objects = []
+            for player, completed, points in batch:
+                session = GameSession(player_id=player_ids[player], score=sum(points), completed=completed)
+                if completed:
+                    session.rank = session.calculate_rank()
+                    session.completed_at = self.now - timedelta(seconds=self.rng.uniform(0, self.days * 86400))
+                objects.append(session)
+
+            with transaction.atomic():
+                created = GameSession.objects.bulk_create(objects)
+                mission_objects = []
+                for session, (_, _, points) in zip(created, batch):
+                    health = 100
+                    for phase, earned in enumerate(points, start=1):
+                        health = max(0, health - self.rng.randint(0, 12))
+                        mission_objects.append(Mission(
+                            session_id=session.pk,
+                            flare_id=self.rng.choice(flare_ids),
+                            defense_choice=self.rng.randint(1, 4),
+                            phase_number=phase,
+                            power_grid_after=max(0, health - self.rng.randint(0, 10)),
+                            satellites_after=max(0, health - self.rng.randint(0, 10)),
+                            communications_after=max(0, health - self.rng.randint(0, 10)),
+                            earth_health_after=health,
+                            points_earned=earned,
+                        ))
+                Mission.objects.bulk_create(mission_objects, batch_size=self.batch_size)
+
+            sessions += len(created)
+            missions += len(mission_objects)
+
+        return sessions, missions
+
+    def reports(self, count, weather_flare_ids):
+        for hour in range(count):
+            yield SpaceWeatherReport(
+                report_date=self.now - timedelta(hours=hour),
+                total_flares=self.rng.randint(0, 40),
+                strongest_flare_id=self.rng.choice(weather_flare_ids) if weather_flare_ids else None,
+                risk_percentage=round(self.rng.uniform(0, 100), 1),
+                prediction_confidence=round(self.rng.uniform(85, 99), 1),
+            )
+
+    def generate(self, flares, players, sessions, reports):
+        """إنشاء كل البيانات، ترجع عدد الصفوف لكل جدول"""
+        flare_ids = self.create(SolarFlare, self.game_flares(flares))
+        weather_flare_ids = self.create(WeatherSolarFlare, self.weather_flares(flares))
+
+        plan = self.session_plan(sessions, players)
+        player_ids = self.create_players(players, plan)
+        session_count, mission_count = self.create_sessions(plan, player_ids, flare_ids)
+        report_ids = self.create(SpaceWeatherReport, self.reports(reports, weather_flare_ids))
+
+        leaderboard = LeaderboardService().rebuild()
+
+        # bulk_create لا يرسل post_save
+        for model in (SolarFlare, WeatherSolarFlare, Player, GameSession, Mission, SpaceWeatherReport):
+            bump_version(model)
+
+        return {
+            'solar_defender.SolarFlare': len(flare_ids),
+            'weather_api.SolarFlare': len(weather_flare_ids),
+            'Player': len(player_ids),
+            'GameSession': session_count,
+            'Mission': mission_count,
+            'SpaceWeatherReport': len(report_ids),
+            'Leaderboard': len(leaderboard),
+        }
@@ -1,3 +1,601 @@
-from django.test import TestCase
+import asyncio
+import io
+import json
+import os
+import tempfile
+from datetime import timedelta
+from itertools import product
+from unittest import mock
 
-# Create your tests here.
+import msgpack
+import numpy as np
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection, connections
+from django.db.models import Count
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from config import db_routers
+from config.caching import query_cache
+from config.metrics import CHART_RENDER_SECONDS, LEADERBOARD_REBUILD_SECONDS
+from config.query_plans import full_scans, temp_sorts
+from weather_api.models import SolarFlare as WeatherSolarFlare
+
+from .benchmarks import compare_results
+from .fake_donki import FakeDonki, FakeDonkiServer, load_fixtures
+from .loadtest import ASGIClient, LoadStats, WSGIClient, percentile
+from .models import ArchivedSolarFlare, GameSession, Leaderboard, Mission, Player, SolarFlare
+from .serializers import (
+    LeaderboardFastSerializer, LeaderboardSerializer,
+    SolarFlareFastSerializer, SolarFlareSerializer
+)
+from .services import LeaderboardService, NASAService
+from .simulation_service import FlareSequenceGenerator, SimulationFlarePool
+from .strategy_service import StrategyService
+from .utils import DefenseCalculator
+
+
+class StrategyServiceTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_matches_brute_force(self):
+        classes = ['B3.2', 'C1.5', 'M2.1', 'X1.3', 'C5.6']
+        solver = StrategyService(classes)
+        result = solver.solve(top=3)
+
+        scores = sorted(
+            (solver.replay(sequence)['score'] for sequence in product(range(1, 5), repeat=len(classes))),
+            reverse=True
+        )
+
+        self.assertEqual(result['optimal']['score'], scores[0])
+        self.assertEqual(
+            [alt['score'] for alt in result['alternatives']],
+            scores[1:3]
+        )
+        self.assertEqual(result['sequences_total'], 4 ** len(classes))
+        self.assertLess(result['states_explored'], result['sequences_total'])
+
+    def test_result_is_cached_per_sequence(self):
+        solver = StrategyService(['M2.1', 'X1.3'])
+        first = solver.solve()
+        self.assertIsNotNone(cache.get(solver.cache_key(3)))
+        second = StrategyService(['M9.9', 'X5.0']).solve()['optimal']
+        self.assertEqual(second['strategies'], first['optimal']['strategies'])
+        # المراحل تُبنى من توهجات الطلب نفسه وليس من الطلب الذي ملأ الكاش
+        self.assertEqual([phase['class_type'] for phase in second['phases']], ['M9.9', 'X5.0'])
+
+    def test_optimal_endpoint(self):
+        flares = [
+            SolarFlare.objects.create(
+                flare_id=f'TEST-{i}', class_type=c, flare_class=c[0],
+                intensity=float(c[1:]), begin_time='2024-01-01T00:00:00Z'
+            )
+            for i, c in enumerate(['C1.5', 'X1.3', 'M2.1'])
+        ]
+        ids = ','.join(str(f.id) for f in flares)
+
+        response = self.client.get(f'/api_game/strategy/optimal/?flare_ids={ids}&top=2')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['flares'], ['C1.5', 'X1.3', 'M2.1'])
+        self.assertEqual(len(response.json()['optimal']['phases']), 3)
+        self.assertEqual(len(response.json()['alternatives']), 1)
+        self.assertEqual(response.json()['score_model'], StrategyService.SCORE_MODEL)
+
+    def test_optimal_endpoint_limits_anonymous_requests(self):
+        classes = ','.join(['B1.0'] * 11)
+
+        response = self.client.get(f'/api_game/strategy/optimal/?classes={classes}')
+        self.assertEqual(response.status_code, 400)
+
+        self.client.force_login(User.objects.create_user('solver'))
+        response = self.client.get(f'/api_game/strategy/optimal/?classes={classes}&top=1')
+        self.assertEqual(response.status_code, 200)
+
+    def test_optimal_endpoint_rejects_unknown_flares(self):
+        response = self.client.get('/api_game/strategy/optimal/?flare_ids=999')
+        self.assertEqual(response.status_code, 404)
+
+
+class FlareSequenceGeneratorTests(TestCase):
+    def test_difficulty_increases_with_flare_class(self):
+        generator = FlareSequenceGenerator(playthroughs=500, seed=7)
+        classes = len(generator.FLARE_CLASSES)
+        sequences = np.repeat(np.arange(classes)[:, np.newaxis], generator.phases, axis=1)
+
+        estimates = generator.estimate_difficulty(sequences)
+
+        self.assertTrue(np.all(np.diff(estimates) > 0))
+        self.assertTrue(np.all((estimates >= 0) & (estimates <= 1)))
+
+    def test_batch_calculator_matches_scalar(self):
+        impact = SolarFlare(flare_class='M').calculate_impact()
+        systems = {'power_grid': 60, 'satellites': 90, 'communications': 30}
+
+        for choice in range(1, 5):
+            scalar = DefenseCalculator.calculate_defense_impact(choice, impact, systems)
+            batch = DefenseCalculator.calculate_defense_impact_batch(
+                np.array([choice]),
+                np.array([[impact['power'], impact['satellites'], impact['comm']]]),
+                np.array([60]), np.array([90]), np.array([30])
+            )
+            self.assertEqual(
+                {key: int(value[0]) for key, value in batch.items()},
+                scalar
+            )
+
+    def test_generate_hits_target_difficulty(self):
+        generator = FlareSequenceGenerator(playthroughs=500, tolerance=0.05, seed=3)
+
+        sequences = generator.generate(0.5, count=20)
+
+        self.assertEqual(len(sequences), 20)
+        for sequence in sequences:
+            self.assertEqual(len(sequence['class_types']), 7)
+            self.assertAlmostEqual(sequence['difficulty'], 0.5, delta=0.05)
+
+    def test_unreachable_difficulty_is_clamped(self):
+        generator = FlareSequenceGenerator(playthroughs=500, seed=5)
+        lowest, highest = generator.difficulty_range()
+
+        for difficulty, bound in [(0.0, lowest), (1.0, highest)]:
+            sequence, = generator.generate(difficulty, max_batches=20)
+            self.assertAlmostEqual(sequence['difficulty'], bound, delta=generator.tolerance)
+
+
+@override_settings(SIMULATION_POOL_SIZE=3, SIMULATION_POOL_ROTATION_SECONDS=60)
+class SimulationFlarePoolTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_build_is_incremental(self):
+        pool = SimulationFlarePool()
+
+        self.assertEqual(pool.build(), 3)
+        self.assertEqual(pool.build(), 0)
+        self.assertEqual(pool.build(size=5), 2)
+        self.assertEqual(SolarFlare.objects.filter(is_simulation=True).count(), 5 * 7)
+
+    def test_concurrent_build_is_ignored(self):
+        pool = SimulationFlarePool()
+        pool.build()
+
+        # طلب آخر بنى المجموعة بين العدّ والإضافة
+        with mock.patch.object(pool, 'count_sets', return_value=0):
+            self.assertEqual(pool.build(), 0)
+        self.assertEqual(pool.count_sets(), 3)
+
+    def test_empty_pool_returns_no_flares(self):
+        with mock.patch.object(SimulationFlarePool, 'build', return_value=0):
+            self.assertEqual(SimulationFlarePool().current_set(), [])
+
+    def test_recent_serves_pool_without_writes(self):
+        self.client.get('/api_game/flares/recent/')
+        flare_count = SolarFlare.objects.count()
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api_game/flares/recent/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 7)
+        self.assertEqual(SolarFlare.objects.count(), flare_count)
+        self.assertFalse([q for q in queries if q['sql'].startswith(('INSERT', 'UPDATE', 'DELETE'))])
+
+    def test_current_set_rotates(self):
+        pool = SimulationFlarePool()
+        pool.build()
+
+        with mock.patch('solar_defender.simulation_service.time.time', return_value=0):
+            first = [flare.flare_id for flare in pool.current_set()]
+        with mock.patch('solar_defender.simulation_service.time.time', return_value=60):
+            second = [flare.flare_id for flare in pool.current_set()]
+
+        self.assertEqual(first, pool.flare_ids(0))
+        self.assertEqual(second, pool.flare_ids(1))
+
+
+class ImpactRegistryTests(TestCase):
+    def test_impacts_are_shared_between_rows(self):
+        flares = [SolarFlare(flare_class='X'), SolarFlare(flare_class='X'), SolarFlare(flare_class='Q')]
+
+        data = SolarFlareSerializer(flares, many=True).data
+
+        self.assertIs(data[0]['impact'], data[1]['impact'])
+        self.assertIs(data[2]['impact'], SolarFlare(flare_class='B').calculate_impact())
+        self.assertEqual(data[0]['impact']['power'], 50)
+
+
+class FastSerializerTests(TestCase):
+    def setUp(self):
+        for i, class_type in enumerate(['B3.2', 'X1.3', 'M2.1', 'Q1.0']):
+            SolarFlare.objects.create(
+                flare_id=f'FAST-{i}', class_type=class_type, flare_class=class_type[0],
+                intensity=float(class_type[1:]), begin_time=timezone.now() - timedelta(hours=i),
+                is_simulation=bool(i % 2)
+            )
+        for i, score in enumerate([90, 60, 30, 10]):
+            player = Player.objects.create(name=f'Player {i}')
+            session = GameSession.objects.create(player=player, score=score)
+            session.rank = session.calculate_rank() if i < 3 else ''
+            session.save()
+            Leaderboard.objects.create(player=player, session=session, rank_position=i + 1)
+
+    def test_solar_flare_output_is_identical(self):
+        queryset = SolarFlare.objects.all()
+        self.assertEqual(
+            SolarFlareFastSerializer.many(queryset),
+            SolarFlareSerializer(queryset, many=True).data
+        )
+
+    def test_leaderboard_output_is_identical(self):
+        queryset = Leaderboard.objects.all()
+        self.assertEqual(
+            LeaderboardFastSerializer.many(queryset),
+            LeaderboardSerializer(queryset, many=True).data
+        )
+
+    def test_list_endpoints_are_identical(self):
+        for url in ['/api_game/flares/', '/api_game/flares/?page=1',
+                    '/api_game/leaderboard/', '/api_game/leaderboard/top/']:
+            fast = self.client.get(url)
+            with self.settings(FAST_LIST_SERIALIZERS=False):
+                slow = self.client.get(url)
+
+            self.assertEqual(fast.status_code, 200, url)
+            self.assertEqual(fast.json(), slow.json(), url)
+
+    def test_leaderboard_fast_path_avoids_per_row_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get('/api_game/leaderboard/')
+        self.assertEqual(len(queries), 2)
+
+
+class MessagePackTests(TestCase):
+    def setUp(self):
+        player = Player.objects.create(name='Ahmed')
+        self.session = GameSession.objects.create(
+            player=player, score=60, rank='COMMANDER', completed=True, completed_at=timezone.now()
+        )
+        for i, class_type in enumerate(['C1.5', 'M2.1', 'X1.3']):
+            flare = SolarFlare.objects.create(
+                flare_id=f'MSGPACK-{i}', class_type=class_type, flare_class=class_type[0],
+                intensity=float(class_type[1:]), begin_time=timezone.now()
+            )
+            Mission.objects.create(
+                session=self.session, flare=flare, defense_choice=i + 1, phase_number=i + 1,
+                power_grid_after=80, satellites_after=80, communications_after=80,
+                earth_health_after=80, points_earned=20
+            )
+
+    def test_chart_is_raw_png_in_msgpack_and_data_uri_in_json(self):
+        url = f'/api_game/charts/session/{self.session.id}/systems_status/'
+        renders = CHART_RENDER_SECONDS.count(chart='systems_status')
+
+        packed = self.client.get(url, HTTP_ACCEPT='application/msgpack')
+        as_json = self.client.get(url, HTTP_ACCEPT='application/json')
+        self.assertEqual(CHART_RENDER_SECONDS.count(chart='systems_status'), renders + 2)
+
+        self.assertEqual(packed['Content-Type'], 'application/msgpack')
+        chart = msgpack.unpackb(packed.content, raw=False)['chart']
+        self.assertIsInstance(chart, bytes)
+        self.assertTrue(chart.startswith(b'\x89PNG'))
+        self.assertTrue(as_json.json()['chart'].startswith('data:image/png;base64,'))
+        self.assertLess(len(packed.content), len(as_json.content))
+
+    def test_session_charts_not_served_stale(self):
+        url = f'/api_game/charts/session/{self.session.id}/'
+        GameSession.objects.filter(pk=self.session.pk).update(completed=False)
+        self.assertEqual(self.client.get(url).status_code, 400)
+
+        # اكتمال الجلسة جزء من مفتاح الدمج، والـ 400 لا يُشارك
+        GameSession.objects.filter(pk=self.session.pk).update(completed=True)
+        response = self.client.get(url, HTTP_ACCEPT='application/msgpack')
+
+        charts = msgpack.unpackb(response.content, raw=False)['charts']
+        self.assertTrue(charts['systems_status'].startswith(b'\x89PNG'))
+
+    def test_format_override_and_nested_data(self):
+        response = self.client.get('/api_game/flares/?format=msgpack')
+
+        data = msgpack.unpackb(response.content, raw=False)
+        self.assertEqual(data['count'], 3)
+        self.assertEqual(data['results'][0]['impact']['power'], 50)
+
+    def test_msgpack_request_body(self):
+        response = self.client.post(
+            '/api_game/players/', msgpack.packb({'name': 'Mona'}),
+            content_type='application/msgpack', HTTP_ACCEPT='application/msgpack'
+        )
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(msgpack.unpackb(response.content)['name'], 'Mona')
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        for i, score in enumerate([90, 60]):
+            player = Player.objects.create(name=f'Player {i}')
+            session = GameSession.objects.create(player=player, score=score, completed=True)
+            Leaderboard.objects.create(player=player, session=session, rank_position=i + 1)
+
+    def test_top_players_not_modified(self):
+        first = self.client.get('/api_game/leaderboard/top/')
+        self.assertTrue(first.has_header('ETag'))
+
+        with mock.patch.object(LeaderboardFastSerializer, 'many', side_effect=AssertionError):
+            second = self.client.get('/api_game/leaderboard/top/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, 304)
+        self.assertEqual(second.content, b'')
+
+    def test_rename_changes_etag(self):
+        etag = self.client.get('/api_game/leaderboard/top/')['ETag']
+        Player.objects.filter(name='Player 1').update(name='Renamed')
+
+        response = self.client.get('/api_game/leaderboard/top/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()[1]['player_name'], 'Renamed')
+
+
+class LeaderboardServiceTests(TestCase):
+    def test_rebuild_ranks_completed_sessions(self):
+        for i, (score, completed) in enumerate([(50, True), (90, True), (99, False)]):
+            player = Player.objects.create(name=f'Player {i}')
+            GameSession.objects.create(player=player, score=score, completed=completed)
+        rebuilds = LEADERBOARD_REBUILD_SECONDS.count()
+
+        LeaderboardService().rebuild()
+        call_command('update_leaderboard', stdout=io.StringIO())
+
+        ranking = Leaderboard.objects.order_by('rank_position').values_list('session__score', flat=True)
+        self.assertEqual(list(ranking), [90, 50])
+        self.assertEqual(LEADERBOARD_REBUILD_SECONDS.count(), rebuilds + 2)
+
+
+class SyntheticDataTests(TestCase):
+    def test_generates_consistent_dataset(self):
+        call_command('generate_synthetic_data', rows=200, stdout=io.StringIO())
+
+        self.assertEqual(SolarFlare.objects.count(), 200)
+        self.assertEqual(WeatherSolarFlare.objects.count(), 200)
+        self.assertEqual(Player.objects.count(), 10)
+        self.assertEqual(GameSession.objects.count(), 20)
+
+        # الجلسات المكتملة لها 7 مهمات ومجموع نقاطها هو الـ score
+        for session in GameSession.objects.filter(completed=True).annotate(missions_count=Count('missions')):
+            self.assertEqual(session.missions_count, 7)
+            self.assertEqual(session.score, sum(session.missions.values_list('points_earned', flat=True)))
+        self.assertEqual(Leaderboard.objects.count(), GameSession.objects.filter(completed=True).count())
+
+        with self.assertRaises(CommandError):
+            call_command('generate_synthetic_data', rows=10, stdout=io.StringIO())
+
+    def test_compare_results_flags_regressions(self):
+        baseline = [
+            {'suite': 'endpoints', 'case': 'global_stats', 'rows': 1000, 'median_ms': 10.0, 'queries': 5},
+            {'suite': 'sqlite', 'case': 'tuned', 'writes_per_s': 300.0},
+        ]
+        results = [
+            {'suite': 'endpoints', 'case': 'global_stats', 'rows': 1000, 'median_ms': 13.0, 'queries': 9},
+            {'suite': 'endpoints', 'case': 'global_stats', 'rows': 5000, 'median_ms': 90.0},
+            {'suite': 'sqlite', 'case': 'tuned', 'writes_per_s': 290.0},
+        ]
+
+        regressions = compare_results(results, baseline, threshold=0.2)
+        self.assertEqual([(key, metric) for key, metric, *_ in regressions], [
+            (('endpoints', 'global_stats', 1000), 'median_ms'),
+        ])
+
+
+class FakeDonkiTests(TestCase):
+    def test_filters_by_date_and_injects_failures(self):
+        donki = FakeDonki(rate_limit=2, seed=1)
+        days = sorted(record['beginTime'][:10] for record in donki.records)
+
+        status, headers, body = donki.respond('/DONKI/FLR', {'startDate': days[-1], 'endDate': days[-1]})
+        self.assertEqual(status, 200)
+        self.assertTrue(all(record['beginTime'].startswith(days[-1]) for record in json.loads(body)))
+        self.assertEqual(headers['X-RateLimit-Remaining'], '1')
+
+        donki.respond('/DONKI/FLR', {})
+        status, headers, _ = donki.respond('/DONKI/FLR', {})
+        self.assertEqual((status, headers['Retry-After']), (429, '60'))
+
+        failing = FakeDonki(error_rate=1.0)
+        self.assertEqual(failing.respond('/DONKI/FLR', {})[0], 500)
+
+    def test_services_ingest_from_local_server(self):
+        server = FakeDonkiServer(FakeDonki(records=load_fixtures()))
+        server.start()
+        try:
+            with override_settings(NASA_DONKI_URL=server.url):
+                flares = NASAService().fetch_and_save_flares()
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        self.assertEqual(len(flares), 7)
+        self.assertFalse(any(flare.is_simulation for flare in flares))
+        self.assertTrue(flares[0].flare_id.endswith('-FLR-001'))
+
+
+class LoadTestTests(TestCase):
+    def test_percentiles(self):
+        stats = LoadStats()
+        for ms in range(1, 101):
+            stats.record('step', ms / 1000, ok=ms != 100)
+        stats.finish()
+
+        row = stats.summary()['steps'][0]
+        self.assertEqual((row['p50_ms'], row['p95_ms'], row['p99_ms'], row['errors']), (50, 95, 99, 1))
+        self.assertEqual(percentile([], 0.5), None)
+
+    def test_wsgi_and_asgi_entry_points(self):
+        from config.asgi import application as asgi_application
+        from config.wsgi import application as wsgi_application
+
+        self.assertEqual(WSGIClient(wsgi_application).request('GET', '/api/health/live/'), {'status': 'alive'})
+        self.assertEqual(
+            asyncio.run(ASGIClient(asgi_application).request('GET', '/api/health/live/')), {'status': 'alive'}
+        )
+
+
+class GlobalStatsCacheTests(TestCase):
+    def setUp(self):
+        query_cache.clear()
+
+    def test_new_player_invalidates_global_stats(self):
+        self.assertEqual(self.client.get('/api_game/stats/global_stats/').json()['total_players'], 0)
+        Player.objects.create(name='Nour')
+        self.assertEqual(self.client.get('/api_game/stats/global_stats/').json()['total_players'], 1)
+
+
+class QueryPlanTests(TestCase):
+    """الاستعلامات الساخنة يجب أن تستخدم index وليس مسحاً كاملاً للجدول"""
+
+    def test_hot_queries_use_indexes(self):
+        player = Player.objects.create(name='Plan')
+        queries = {
+            'flare_id lookup': SolarFlare.objects.filter(flare_id='FLR-1'),
+            'pool flares': SimulationFlarePool().pool_flares(),
+            'pool set': SolarFlare.objects.filter(flare_id__in=SimulationFlarePool().flare_ids(0)),
+            'flares by class': SolarFlare.objects.values('flare_class').annotate(
+                count=Count('id')
+            ).order_by('flare_class'),
+            'completed sessions': GameSession.objects.filter(completed=True),
+            'player missions': Mission.objects.filter(session__player=player),
+        }
+        for name, queryset in queries.items():
+            self.assertEqual(full_scans(queryset), [], name)
+
+    def test_ordered_lists_use_index_order(self):
+        session = GameSession.objects.create(player=Player.objects.create(name='Plan'))
+        queries = {
+            'recent real flares': SolarFlare.objects.filter(
+                begin_time__gte=timezone.now() - timedelta(days=7), is_simulation=False
+            ).order_by('-begin_time')[:7],
+            'latest flares': SolarFlare.objects.order_by('-begin_time')[:7],
+            'top sessions': GameSession.objects.filter(completed=True).order_by('-score')[:100],
+            'session missions': Mission.objects.filter(session=session),
+            'leaderboard top': Leaderboard.objects.all()[:10],
+        }
+        for name, queryset in queries.items():
+            self.assertEqual(full_scans(queryset), [], name)
+            self.assertEqual(temp_sorts(queryset), [], name)
+
+
+class ReadReplicaRoutingTests(TestCase):
+    """
+    replica بديلة: قاعدة SQLite منفصلة بنفس الـ schema لا تصلها الكتابات
+    أبداً (كأنها متأخرة في النسخ)، فأي قراءة منها لا ترى بيانات الاختبار.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        connections.settings['replica_1'] = {
+            **connections['default'].settings_dict,
+            'NAME': os.path.join(tempfile.mkdtemp(), 'replica.sqlite3'),
+        }
+        call_command('migrate', database='replica_1', verbosity=0)
+
+    @classmethod
+    def tearDownClass(cls):
+        connections['replica_1'].close()
+        del connections.settings['replica_1']
+        super().tearDownClass()
+
+    def setUp(self):
+        query_cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('commander'))
+        self.player = Player.objects.create(name='Replica')
+        self.session = GameSession.objects.create(player=self.player, score=70)
+        self.flare = SolarFlare.objects.create(
+            flare_id='REPLICA-1', class_type='M2.1', flare_class='M',
+            intensity=2.1, begin_time=timezone.now()
+        )
+
+    def test_reads_outside_requests_use_primary(self):
+        with self.settings(DATABASE_REPLICAS=['replica_1']):
+            self.assertEqual(Player.objects.count(), 1)
+
+    def test_get_requests_read_from_replica(self):
+        with self.settings(DATABASE_REPLICAS=['replica_1']):
+            response = self.client.get('/api_game/players/')
+        self.assertEqual(response.json()['count'], 0)
+        self.assertNotIn('db_primary_pin', response.cookies)
+
+    def test_read_your_writes_after_mission_creation(self):
+        with self.settings(DATABASE_REPLICAS=['replica_1']):
+            response = self.client.post('/api_game/missions/', {
+                'session': self.session.id, 'flare': self.flare.id, 'defense_choice': 2,
+                'phase_number': 1, 'power_grid_after': 90, 'satellites_after': 80,
+                'communications_after': 85, 'earth_health_after': 88, 'points_earned': 15,
+            }, format='json')
+            self.assertEqual(response.status_code, 201)
+            self.assertIn('db_primary_pin', response.cookies)
+
+            session = self.client.get(f'/api_game/sessions/{self.session.id}/').json()
+        self.assertEqual(session['missions_count'], 1)
+        self.assertEqual(session['earth_health'], 88)
+
+    def test_read_your_writes_after_complete(self):
+        with self.settings(DATABASE_REPLICAS=['replica_1']):
+            response = self.client.post(f'/api_game/sessions/{self.session.id}/complete/')
+            self.assertEqual(response.status_code, 200)
+
+            pinned = self.client.get('/api_game/leaderboard/top/')
+            self.client.cookies.pop('db_primary_pin')
+            unpinned = self.client.get('/api_game/leaderboard/top/')
+
+        self.assertEqual([row['player_name'] for row in pinned.json()], ['Replica'])
+        self.assertEqual(unpinned.json(), [])
+
+    def test_writes_inside_get_switch_reads_to_primary(self):
+        token = db_routers.begin_request(use_primary=False)
+        try:
+            with self.settings(DATABASE_REPLICAS=['replica_1']):
+                router = db_routers.ReplicaRouter()
+                self.assertEqual(router.db_for_read(Player), 'replica_1')
+                self.assertEqual(router.db_for_write(Player), 'default')
+                self.assertEqual(router.db_for_read(Player), 'default')
+        finally:
+            self.assertTrue(db_routers.end_request(token))
+
+
+class FlareArchiveTests(TestCase):
+    def test_archive_keeps_referenced_and_simulation_flares(self):
+        old = timezone.now() - timedelta(days=200)
+        flares = [
+            SolarFlare.objects.create(
+                flare_id=f'OLD-{i}', class_type='C1.0', flare_class='C', intensity=1.0,
+                begin_time=old, is_simulation=(i == 2)
+            )
+            for i in range(3)
+        ]
+        session = GameSession.objects.create(player=Player.objects.create(name='Archivist'))
+        Mission.objects.create(
+            session=session, flare=flares[1], defense_choice=1, phase_number=1, power_grid_after=90,
+            satellites_after=90, communications_after=90, earth_health_after=90, points_earned=10
+        )
+
+        call_command('archive_flares', stdout=io.StringIO())
+
+        self.assertEqual(list(ArchivedSolarFlare.objects.values_list('flare_id', flat=True)), ['OLD-0'])
+        self.assertEqual(SolarFlare.objects.count(), 2)
+
+        recent = self.client.get('/api_game/flares/recent/?days=365').json()
+        self.assertIn('OLD-0', [flare['flare_id'] for flare in recent])
+
+        # NASA ترجع التوهج المؤرشف مرة أخرى
+        with mock.patch.object(NASAService, 'fetch_flares', return_value=[{
+            'flare_id': 'OLD-0', 'class_type': 'C1.0', 'flare_class': 'C', 'intensity': 1.0, 'begin_time': old,
+        }]):
+            self.assertEqual(NASAService().fetch_and_save_flares(), [])
+        self.assertFalse(SolarFlare.objects.filter(flare_id='OLD-0').exists())
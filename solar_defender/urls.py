@@ -2,7 +2,8 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import (
     PlayerViewSet, GameSessionViewSet, SolarFlareViewSet,
-    MissionViewSet, LeaderboardViewSet, StatsViewSet, ChartViewSet
+    MissionViewSet, LeaderboardViewSet, StatsViewSet, ChartViewSet,
+    StrategyViewSet
 )
 from .views import UnifiedDataView
 
@@ -15,12 +16,11 @@ router.register(r'missions', MissionViewSet, basename='mission')
 router.register(r'leaderboard', LeaderboardViewSet, basename='leaderboard')
 router.register(r'stats', StatsViewSet, basename='stats')
 router.register(r'charts', ChartViewSet, basename='charts')
+router.register(r'strategy', StrategyViewSet, basename='strategy')
 
 
 urlpatterns = [
     path('', include(router.urls)),
-]
-
-urlpatterns = [
     path('unified/', UnifiedDataView.as_view(), name='unified-data'),
 ]
+
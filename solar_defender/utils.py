@@ -1,3 +1,6 @@
+import numpy as np
+
+
 class DefenseCalculator:
     """حساب تأثير استراتيجيات الدفاع"""
     
@@ -52,4 +55,59 @@ class DefenseCalculator:
             'communications': communications,
             'earth_health': earth_health,
             'points_cost': points_cost
-        }
\ No newline at end of file
+        }
+    
+    @staticmethod
+    def calculate_mission_points(result):
+        """
+        حساب نقاط المهمة من نتيجة الدفاع
+        
+        صحة الأرض تعطي حتى 25 نقطة، وتُخصم تكلفة الاستراتيجية. هذا تقدير الخادم
+        (لحل الاستراتيجيات وصعوبة المحاكاة)، وليس نقاط اللعبة: نقاط الجلسة يرسلها
+        العميل (session_score) ولا يحسبها الخادم.
+        """
+        return max(0, result['earth_health'] * 25 // 100 - result['points_cost'] // 5)
+    
+    # (power, satellites, comm, points_cost) لكل استراتيجية بنفس ترتيب الدوال أعلاه
+    STRATEGY_EFFECTS = {
+        1: (0, 15, 0, 10),
+        2: (20, 0, 0, 15),
+        3: (0, 0, 12, 8),
+        4: (10, 8, 10, 20),
+    }
+    
+    @staticmethod
+    def calculate_defense_impact_batch(defense_choices, impacts, power_grid, satellites, communications):
+        """
+        نسخة vectorized من calculate_defense_impact باستخدام numpy
+        
+        Args:
+            defense_choices: مصفوفة أرقام الاستراتيجيات (1-4)
+            impacts: مصفوفة (..., 3) بقيم power, satellites, comm للتوهج
+            power_grid, satellites, communications: مصفوفات القيم الحالية (<= 100)
+        
+        Returns:
+            dict بنفس مفاتيح calculate_defense_impact لكن بقيم مصفوفات
+        """
+        effects = np.array(
+            [(0, 0, 0, 0)] + [DefenseCalculator.STRATEGY_EFFECTS[i] for i in range(1, 5)]
+        )
+        bonus = effects[np.asarray(defense_choices)]
+        impacts = np.asarray(impacts)
+        
+        power_grid = np.clip(power_grid - impacts[..., 0] + bonus[..., 0], 0, 100)
+        satellites = np.clip(satellites - impacts[..., 1] + bonus[..., 1], 0, 100)
+        communications = np.clip(communications - impacts[..., 2] + bonus[..., 2], 0, 100)
+        
+        return {
+            'power_grid': power_grid,
+            'satellites': satellites,
+            'communications': communications,
+            'earth_health': (power_grid + satellites + communications) // 3,
+            'points_cost': bonus[..., 3]
+        }
+    
+    @staticmethod
+    def calculate_mission_points_batch(result):
+        """نسخة vectorized من calculate_mission_points"""
+        return np.maximum(0, result['earth_health'] * 25 // 100 - result['points_cost'] // 5)
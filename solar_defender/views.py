@@ -1,21 +1,30 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework.permissions import IsAuthenticated, IsAdminUser, AllowAny
 from django.http import HttpResponse
 from django.db.models import Avg, Count, Max, Q
 from .visualization_service import VisualizationService
 from django.utils import timezone
+from django.utils.decorators import method_decorator
 from datetime import timedelta
+from config.caching import versioned_cache
+from config.conditional import conditional
+from config.fast_serializers import FastListMixin, fast_serializers_enabled
+from config.singleflight import coalesce
+from weather_api import jobs
 
-from .models import Player, GameSession, SolarFlare, Mission, Leaderboard
+from .models import Player, GameSession, SolarFlare, Mission, Leaderboard, flares_since
 from .serializers import (
     PlayerSerializer, PlayerCreateSerializer, GameSessionSerializer,
     GameSessionCreateSerializer, GameSessionUpdateSerializer,
     SolarFlareSerializer, MissionSerializer, MissionCreateSerializer,
-    LeaderboardSerializer, GameStatsSerializer, PlayerStatsSerializer
+    LeaderboardSerializer, GameStatsSerializer, PlayerStatsSerializer,
+    SolarFlareFastSerializer, LeaderboardFastSerializer
 )
-from .services import NASAService
+from .services import LeaderboardService
+from .simulation_service import SimulationFlarePool
+from .strategy_service import StrategyService
 
 class PlayerViewSet(viewsets.ModelViewSet):
     queryset = Player.objects.all()
@@ -129,68 +138,45 @@ class GameSessionViewSet(viewsets.ModelViewSet):
         player.save()
         
         # تحديث لوحة المتصدرين
-        self._update_leaderboard(session)
+        LeaderboardService().rebuild()
         
         serializer = self.get_serializer(session)
         return Response(serializer.data)
-    
-    def _update_leaderboard(self, session):
-        """تحديث لوحة المتصدرين"""
-        # الحصول على أفضل 100 جلسة
-        top_sessions = GameSession.objects.filter(
-            completed=True
-        ).order_by('-score')[:100]
-        
-        # حذف الإدخالات القديمة
-        Leaderboard.objects.all().delete()
-        
-        # إنشاء إدخالات جديدة
-        leaderboard_entries = []
-        for position, session in enumerate(top_sessions, start=1):
-            leaderboard_entries.append(
-                Leaderboard(
-                    player=session.player,
-                    session=session,
-                    rank_position=position
-                )
-            )
-        
-        Leaderboard.objects.bulk_create(leaderboard_entries)
 
-class SolarFlareViewSet(viewsets.ReadOnlyModelViewSet):
+class SolarFlareViewSet(FastListMixin, viewsets.ReadOnlyModelViewSet):
     queryset = SolarFlare.objects.all()
     serializer_class = SolarFlareSerializer
+    fast_serializer_class = SolarFlareFastSerializer
     permission_classes = [AllowAny]
     
-    @action(detail=False, methods=['get'])
+    def get_queryset(self):
+        # كل التوهجات بما فيها المؤرشفة
+        return flares_since()
+    
+    @action(detail=False, methods=['post'], permission_classes=[IsAdminUser])
     def fetch_nasa_data(self, request):
-        """جلب بيانات جديدة من NASA"""
-        nasa_service = NASAService()
-        flares = nasa_service.fetch_and_save_flares()
-        
-        serializer = self.get_serializer(flares, many=True)
-        return Response({
-            'count': len(flares),
-            'flares': serializer.data
-        })
+        """جدولة جلب بيانات جديدة من NASA (للـ staff، انظر weather_api.jobs)"""
+        return jobs.enqueue_response({'source': 'solar_defender'})
     
     @action(detail=False, methods=['get'])
     def recent(self, request):
         """الحصول على أحدث 7 توهجات"""
         days = int(request.query_params.get('days', 7))
         
-        recent_flares = SolarFlare.objects.filter(
-            begin_time__gte=timezone.now() - timedelta(days=days)
+        start = timezone.now() - timedelta(days=days)
+        recent_flares = flares_since(start).filter(
+            begin_time__gte=start,
+            is_simulation=False
         ).order_by('-begin_time')[:7]
         
-        # إذا لم يكن هناك توهجات حقيقية، استخدم المحاكاة
+        # إذا لم يكن هناك توهجات حقيقية، استخدم مجموعة المحاكاة الجاهزة
         if not recent_flares.exists():
-            nasa_service = NASAService()
-            recent_flares = nasa_service.create_simulation_flares()
+            recent_flares = SimulationFlarePool().current_set()
         
         serializer = self.get_serializer(recent_flares, many=True)
         return Response(serializer.data)
 
+
 class MissionViewSet(viewsets.ModelViewSet):
     queryset = Mission.objects.all()
     
@@ -226,14 +212,26 @@ class MissionViewSet(viewsets.ModelViewSet):
             status=status.HTTP_201_CREATED
         )
 
-class LeaderboardViewSet(viewsets.ReadOnlyModelViewSet):
+def top_players_fingerprint(request):
+    """صفوف أفضل 10 (10 صفوف فقط، بدون serialization)"""
+    return list(Leaderboard.objects.values_list(
+        'id', 'updated_at', 'player__name', 'session__score', 'session__rank'
+    )[:10])
+
+
+class LeaderboardViewSet(FastListMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Leaderboard.objects.all()
     serializer_class = LeaderboardSerializer
+    fast_serializer_class = LeaderboardFastSerializer
     permission_classes = [AllowAny]
     
+    @method_decorator(conditional(top_players_fingerprint))
     @action(detail=False, methods=['get'])
     def top(self, request):
         """أفضل 10 لاعبين"""
+        if fast_serializers_enabled():
+            return Response(LeaderboardFastSerializer.many(self.queryset[:10]))
+        
         top_players = self.queryset[:10]
         serializer = self.get_serializer(top_players, many=True)
         return Response(serializer.data)
@@ -241,6 +239,9 @@ class LeaderboardViewSet(viewsets.ReadOnlyModelViewSet):
 class StatsViewSet(viewsets.ViewSet):
     permission_classes = [AllowAny]
     
+    @method_decorator(versioned_cache(
+        'solar_defender.global_stats', [GameSession, Player, Mission, SolarFlare]
+    ))
     @action(detail=False, methods=['get'])
     def global_stats(self, request):
         """إحصائيات عامة للعبة"""
@@ -276,10 +277,20 @@ class StatsViewSet(viewsets.ViewSet):
         return Response(stats)
     
 
+def session_charts_key(request, session_id=None):
+    # من القاعدة وليس من إصدارات الـ cache ليكون نفس المفتاح في كل الـ workers:
+    # الرسوم لا تتغير بعد اكتمال الجلسة، فاكتمالها يكفي كإصدار
+    if not str(session_id).isdigit():
+        return None
+    completed = GameSession.objects.filter(pk=session_id).values_list('completed', flat=True).first()
+    return ('solar_defender.session_charts', session_id, completed)
+
+
 class ChartViewSet(viewsets.ViewSet):
     """ViewSet لتوليد الرسوم البيانية"""
     permission_classes = [AllowAny]
     
+    @method_decorator(coalesce(session_charts_key))
     @action(detail=False, methods=['get'], url_path='session/(?P<session_id>[^/.]+)')
     def session_charts(self, request, session_id=None):
         """
@@ -453,7 +464,101 @@ class ChartViewSet(viewsets.ViewSet):
                 {"error": str(e)},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
-        
+
+
+class StrategyViewSet(viewsets.ViewSet):
+    """ViewSet لحساب أفضل استراتيجيات الدفاع"""
+    permission_classes = [AllowAny]
+
+    # الحل قد يستغرق ثواني مع 20 توهج، فالحدود أقل للطلبات بدون تسجيل دخول
+    MAX_FLARES = 20
+    MAX_TOP = 20
+    ANONYMOUS_MAX_FLARES = 10
+    ANONYMOUS_MAX_TOP = 5
+
+    def limits(self, request):
+        """(أقصى عدد توهجات، أقصى top) حسب المستخدم"""
+        if request.user.is_authenticated:
+            return self.MAX_FLARES, self.MAX_TOP
+        return self.ANONYMOUS_MAX_FLARES, self.ANONYMOUS_MAX_TOP
+
+    @action(detail=False, methods=['get'])
+    def optimal(self, request):
+        """
+        أفضل تسلسل استراتيجيات لمجموعة توهجات
+
+        GET /api_game/strategy/optimal/?session_id=1
+        GET /api_game/strategy/optimal/?flare_ids=1,2,3
+        GET /api_game/strategy/optimal/?classes=B3.2,C1.5,M2.1
+
+        Optional: top (عدد التسلسلات، افتراضي 3), resolution
+        بدون تسجيل دخول: حتى 10 توهجات و top حتى 5
+
+        الترتيب حسب تقدير الخادم للنقاط (DefenseCalculator.calculate_mission_points)
+        وليس نقاط اللعبة (session_score يرسلها العميل)، انظر score_model في الاستجابة.
+        """
+        params = request.query_params
+        max_flares, max_top = self.limits(request)
+
+        try:
+            top = min(int(params.get('top', 3)), max_top)
+            resolution = int(params.get('resolution', 1))
+        except ValueError:
+            return Response(
+                {"error": "top and resolution must be integers"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if params.get('classes'):
+            class_types = [c.strip().upper() for c in params['classes'].split(',') if c.strip()]
+        elif params.get('flare_ids'):
+            try:
+                ids = [int(i) for i in params['flare_ids'].split(',') if i.strip()]
+            except ValueError:
+                return Response(
+                    {"error": "flare_ids must be a comma separated list of integers"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            flares = SolarFlare.objects.in_bulk(ids)
+            missing = [i for i in ids if i not in flares]
+            if missing:
+                return Response(
+                    {"error": f"Flares not found: {missing}"},
+                    status=status.HTTP_404_NOT_FOUND
+                )
+            class_types = [flares[i].class_type for i in ids]
+        elif params.get('session_id'):
+            try:
+                session = GameSession.objects.get(id=params['session_id'])
+            except (GameSession.DoesNotExist, ValueError):
+                return Response(
+                    {"error": "Session not found"},
+                    status=status.HTTP_404_NOT_FOUND
+                )
+            class_types = list(
+                session.missions.order_by('phase_number')
+                .values_list('flare__class_type', flat=True)
+            )
+        else:
+            class_types = list(
+                SolarFlare.objects.order_by('-begin_time')
+                .values_list('class_type', flat=True)[:7]
+            )
+
+        if not class_types:
+            return Response(
+                {"error": "No flares to solve for"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if len(class_types) > max_flares:
+            return Response(
+                {"error": f"A maximum of {max_flares} flares is supported"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        solver = StrategyService(class_types, resolution=resolution)
+        return Response(solver.solve(top=top))
 
 
 from rest_framework.views import APIView
@@ -5,10 +5,19 @@ import numpy as np
 import pandas as pd
 from matplotlib.patches import Circle, Wedge, Rectangle
 from io import BytesIO
-import base64
 from django.core.files.base import ContentFile
+from config.renderers import DataURI
+from config.metrics import CHART_RENDER_SECONDS
+from config.timing import timed
 from .models import GameSession, Mission
 
+
+def chart(method):
+    """توقيت رسم (Server-Timing + metric حسب نوع الرسم)"""
+    name = method.__name__.replace('create_', '', 1)
+    return timed('chart')(CHART_RENDER_SECONDS.time(chart=name)(method))
+
+
 class VisualizationService:
     def __init__(self, session):
         self.session = session
@@ -43,6 +52,7 @@ class VisualizationService:
         
         return charts
     
+    @chart
     def create_flare_distribution(self):
         """توزيع التوهجات الشمسية - Pie Chart"""
         flares = [mission.flare for mission in self.missions]
@@ -77,6 +87,7 @@ class VisualizationService:
         
         return self._fig_to_base64(fig)
     
+    @chart
     def create_intensity_timeline(self):
         """الجدول الزمني للشدة"""
         flares = [mission.flare for mission in self.missions]
@@ -117,6 +128,7 @@ class VisualizationService:
         
         return self._fig_to_base64(fig)
     
+    @chart
     def create_systems_status(self):
         """حالة أنظمة الأرض"""
         fig, ax = plt.subplots(figsize=(8, 6), facecolor='#0a0a0a')
@@ -156,6 +168,7 @@ class VisualizationService:
         
         return self._fig_to_base64(fig)
     
+    @chart
     def create_impact_comparison(self):
         """مقارنة التأثيرات"""
         fig, ax = plt.subplots(figsize=(8, 6), facecolor='#0a0a0a')
@@ -193,6 +206,7 @@ class VisualizationService:
         
         return self._fig_to_base64(fig)
     
+    @chart
     def create_performance_gauge(self):
         """مقياس الأداء"""
         fig, ax = plt.subplots(figsize=(6, 6), facecolor='#0a0a0a')
@@ -238,6 +252,7 @@ class VisualizationService:
         
         return self._fig_to_base64(fig)
     
+    @chart
     def create_earth_impact_map(self):
         """خريطة تأثير الأرض"""
         fig, ax = plt.subplots(figsize=(10, 8), facecolor='#0a0a0a')
@@ -288,6 +303,7 @@ class VisualizationService:
         
         return self._fig_to_base64(fig)
     
+    @chart
     def create_mission_log(self):
         """سجل المهمات"""
         fig, ax = plt.subplots(figsize=(8, 6), facecolor='#0a0a0a')
@@ -320,10 +336,8 @@ class VisualizationService:
         return self._fig_to_base64(fig)
     
     def _fig_to_base64(self, fig):
-        """تحويل Figure إلى Base64"""
+        """تحويل Figure إلى Base64 (بايتات خام عند الإرسال بـ MessagePack)"""
         buffer = BytesIO()
         fig.savefig(buffer, format='png', dpi=150, facecolor='#0a0a0a', bbox_inches='tight')
-        buffer.seek(0)
-        image_base64 = base64.b64encode(buffer.read()).decode()
         plt.close(fig)
-        return f"data:image/png;base64,{image_base64}"
\ No newline at end of file
+        return DataURI(buffer.getvalue(), 'image/png')
\ No newline at end of file
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import SolarFlare, SpaceWeatherReport
+from .models import IngestionJob, ScheduledRun, SolarFlare, SpaceWeatherReport
 
 
 @admin.register(SolarFlare)
@@ -50,4 +50,33 @@ class SpaceWeatherReportAdmin(admin.ModelAdmin):
         ('التحليل', {
             'fields': ('risk_percentage', 'prediction_confidence')
         }),
+        ('المدخلات', {
+            'fields': ('window_start', 'window_end', 'risk_sum', 'source_watermark', 'inputs')
+        }),
     )
+
+
+@admin.register(IngestionJob)
+class IngestionJobAdmin(admin.ModelAdmin):
+    """واجهة إدارة مهام الجلب من NASA"""
+    
+    list_display = [
+        'id', 'source', 'status', 'attempts',
+        'created_at', 'started_at', 'finished_at'
+    ]
+    list_filter = ['source', 'status']
+    ordering = ['-created_at']
+    readonly_fields = [
+        'dedupe_key', 'attempts', 'result', 'error',
+        'created_at', 'started_at', 'finished_at'
+    ]
+
+
+@admin.register(ScheduledRun)
+class ScheduledRunAdmin(admin.ModelAdmin):
+    """سجل تشغيل المهام المجدولة"""
+    
+    list_display = ['task', 'status', 'owner', 'started_at', 'finished_at']
+    list_filter = ['task', 'status']
+    ordering = ['-started_at']
+    readonly_fields = ['task', 'owner', 'status', 'result', 'error', 'started_at', 'finished_at']
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class WeatherApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'weather_api'
+
+    def ready(self):
+        from config.caching import track_data_version
+        from .models import SolarFlare, SpaceWeatherReport
+
+        track_data_version(SolarFlare, SpaceWeatherReport)
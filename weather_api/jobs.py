@@ -0,0 +1,253 @@
+"""
+مهام الجلب من NASA في الخلفية (بدون broker خارجي)
+
+- enqueue: مهمة جديدة، أو المهمة المتطابقة الموجودة في الانتظار / التنفيذ
+- من الـ API: POST للـ staff فقط، وبعد INGESTION_MIN_INTERVAL من آخر نجاح (enqueue_response)
+- التنفيذ حسب INGESTION_EXECUTOR:
+  - thread: ThreadPoolExecutor داخل عملية الويب (INGESTION_WORKERS) بعد الـ commit
+  - worker: المهمة تبقى في الانتظار حتى يأخذها أمر ingestion_worker (عملية منفصلة)
+- claim: compare-and-swap على status (UPDATE ... WHERE status='queued') فلا تُنفذ
+  مهمة مرتين حتى مع عدة workers، مع SQLite و PostgreSQL
+- المهام العالقة (عملية ماتت) تُعلَّم فاشلة بعد INGESTION_JOB_TIMEOUT حتى لا تمنع
+  مهاماً جديدة بنفس المفتاح
+"""
+import logging
+import math
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import F, Q
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from config.metrics import INGESTION_JOBS
+
+from .models import IngestionJob
+from .serializers import IngestionJobSerializer
+from .services import NASASpaceWeatherService
+
+logger = logging.getLogger(__name__)
+
+
+# ====================================================================
+# الجلب
+# ====================================================================
+
+def ingest_weather_api(job):
+    """جلب + حفظ + تقرير (ما كان يفعله GET /api/fetch-nasa-data/)"""
+    service = NASASpaceWeatherService()
+    start_date = job.start_date.isoformat() if job.start_date else None
+    end_date = job.end_date.isoformat() if job.end_date else None
+
+    flares = service.save_flares_to_db(service.fetch_solar_flares(start_date, end_date))
+    report = service.generate_report()
+    return {'flares_count': len(flares), 'report_id': report.pk, 'nasa': service.nasa_ok}
+
+
+def ingest_solar_defender(job):
+    from solar_defender.services import NASAService
+
+    service = NASAService()
+    flares = service.fetch_and_save_flares()
+    return {'flares_count': len(flares), 'nasa': service.nasa_ok}
+
+
+INGESTERS = {
+    'weather_api': ingest_weather_api,
+    'solar_defender': ingest_solar_defender,
+}
+
+
+# ====================================================================
+# الطابور
+# ====================================================================
+
+def dedupe_key(source, start_date=None, end_date=None):
+    return f'{source}:{start_date or ""}:{end_date or ""}'
+
+
+def expire_stale():
+    """تعليم المهام الأقدم من INGESTION_JOB_TIMEOUT فاشلة، ترجع عددها"""
+    cutoff = timezone.now() - timedelta(seconds=getattr(settings, 'INGESTION_JOB_TIMEOUT', 600))
+    stale = IngestionJob.objects.filter(
+        Q(status=IngestionJob.RUNNING, started_at__lt=cutoff)
+        | Q(status=IngestionJob.QUEUED, created_at__lt=cutoff)
+    )
+    return stale.update(status=IngestionJob.FAILED, error='timed out', finished_at=timezone.now())
+
+
+def enqueue(source='weather_api', start_date=None, end_date=None):
+    """(المهمة، أُنشئت؟) - المهمة المتطابقة التي لم تنتهِ تُرجع بدلاً من مهمة جديدة"""
+    key = dedupe_key(source, start_date, end_date)
+    expire_stale()
+
+    for attempt in range(3):
+        try:
+            with transaction.atomic():
+                job = IngestionJob.objects.create(
+                    source=source, start_date=start_date, end_date=end_date, dedupe_key=key
+                )
+        except IntegrityError:
+            job = IngestionJob.objects.filter(dedupe_key=key, status__in=IngestionJob.IN_FLIGHT).first()
+            if job is not None:
+                return job, False
+            # انتهت المهمة بين الـ INSERT والقراءة: محاولة أخرى
+            if attempt == 2:
+                raise
+            continue
+
+        INGESTION_JOBS.inc(source=source, status=IngestionJob.QUEUED)
+        transaction.on_commit(lambda: dispatch(job.pk))
+        return job, True
+
+
+def last_succeeded(source):
+    return IngestionJob.objects.filter(
+        source=source, status=IngestionJob.SUCCEEDED
+    ).order_by('-finished_at').first()
+
+
+def retry_after(source):
+    """ثوانٍ متبقية قبل السماح بمهمة جديدة من الـ API (INGESTION_MIN_INTERVAL بعد آخر نجاح)"""
+    last = last_succeeded(source)
+    if last is None:
+        return 0
+    interval = timedelta(seconds=getattr(settings, 'INGESTION_MIN_INTERVAL', 300))
+    return max(0, math.ceil((last.finished_at + interval - timezone.now()).total_seconds()))
+
+
+def enqueue_response(params):
+    """
+    استجابة 202 لـ enqueue (للـ views): المهمة + deduplicated + رابط حالتها
+
+    إزالة التكرار تدمج المهام المتزامنة فقط، فطلبات متتالية تنتظر
+    INGESTION_MIN_INTERVAL بعد آخر مهمة ناجحة لنفس المصدر (429 + Retry-After).
+    """
+    wait = retry_after(params.get('source', 'weather_api'))
+    if wait:
+        return Response(
+            {'detail': 'Ingestion ran recently.', 'retry_after': wait},
+            status=status.HTTP_429_TOO_MANY_REQUESTS,
+            headers={'Retry-After': str(wait)},
+        )
+
+    job, created = enqueue(**params)
+    location = reverse('ingestion-job-detail', args=[job.pk])
+    return Response(
+        dict(IngestionJobSerializer(job).data, deduplicated=not created, status_url=location),
+        status=status.HTTP_202_ACCEPTED,
+        headers={'Location': location},
+    )
+
+
+def claim(job_id=None):
+    """أخذ مهمة محددة أو أقدم مهمة في الانتظار (None إذا لا يوجد أو سبقنا worker آخر)"""
+    queued = IngestionJob.objects.filter(status=IngestionJob.QUEUED)
+    if job_id is None:
+        job_id = queued.order_by('created_at').values_list('pk', flat=True).first()
+        if job_id is None:
+            return None
+
+    claimed = queued.filter(pk=job_id).update(
+        status=IngestionJob.RUNNING, started_at=timezone.now(), attempts=F('attempts') + 1
+    )
+    return IngestionJob.objects.get(pk=job_id) if claimed else None
+
+
+def finish(job, status, result=None, error=''):
+    job.status = status
+    job.result = result
+    job.error = error
+    job.nasa_ok = bool(result and result.get('nasa'))
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'result', 'error', 'nasa_ok', 'finished_at'])
+    INGESTION_JOBS.inc(source=job.source, status=status)
+
+
+def run_job(job_id=None):
+    """تنفيذ مهمة (أو أقدم مهمة في الانتظار)، ترجع المهمة أو None"""
+    job = claim(job_id)
+    if job is None:
+        return None
+
+    try:
+        result = INGESTERS[job.source](job)
+    except Exception as e:
+        logger.exception('Ingestion job %s failed', job.pk)
+        finish(job, IngestionJob.FAILED, error=f'{type(e).__name__}: {e}')
+    else:
+        finish(job, IngestionJob.SUCCEEDED, result=result)
+    prune()
+    return job
+
+
+def prune():
+    """حذف المهام المنتهية الأقدم من INGESTION_JOB_HISTORY_DAYS (مثل Scheduler.prune)"""
+    cutoff = timezone.now() - timedelta(days=getattr(settings, 'INGESTION_JOB_HISTORY_DAYS', 30))
+    IngestionJob.objects.filter(
+        status__in=[IngestionJob.SUCCEEDED, IngestionJob.FAILED], finished_at__lt=cutoff
+    ).delete()
+
+
+def ingestion_age(*sources):
+    """
+    عمر أحدث جلب ناجح من NASA بالثواني من أي مصدر (None إذا لا يوجد)
+
+    من القاعدة (آخر مهمة نجحت ووصلت فيها NASA فعلاً) وليس من الـ cache، فتراه
+    كل العمليات: الويب والـ worker والـ scheduler.
+    """
+    finished_at = IngestionJob.objects.filter(
+        status=IngestionJob.SUCCEEDED, source__in=sources, nasa_ok=True
+    ).order_by('-finished_at').values_list('finished_at', flat=True).first()
+    if finished_at is None:
+        return None
+    return max(0.0, (timezone.now() - finished_at).total_seconds())
+
+
+def run_pending():
+    """تنفيذ كل المهام في الانتظار (أمر ingestion_worker)، ترجع عددها"""
+    expire_stale()
+    count = 0
+    while IngestionJob.objects.filter(status=IngestionJob.QUEUED).exists():
+        if run_job() is not None:
+            count += 1
+    return count
+
+
+# ====================================================================
+# الـ thread pool
+# ====================================================================
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'INGESTION_WORKERS', 2),
+                thread_name_prefix='ingestion',
+            )
+        return _executor
+
+
+def _run_in_pool(job_id):
+    close_old_connections()
+    try:
+        run_job(job_id)
+    finally:
+        # مثل نهاية طلب HTTP: إغلاق الاتصالات المنتهية حسب CONN_MAX_AGE
+        close_old_connections()
+
+
+def dispatch(job_id):
+    """بعد الـ commit: تنفيذ في الـ thread pool، أو تركها لأمر ingestion_worker"""
+    if getattr(settings, 'INGESTION_EXECUTOR', 'thread') == 'thread':
+        executor().submit(_run_in_pool, job_id)
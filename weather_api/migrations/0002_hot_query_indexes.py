@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-19 07:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('weather_api', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='solarflare',
+            index=models.Index(fields=['-begin_time'], name='wa_flare_begin'),
+        ),
+        migrations.AddIndex(
+            model_name='solarflare',
+            index=models.Index(fields=['flare_class', '-begin_time'], name='wa_flare_class_begin'),
+        ),
+        migrations.AddIndex(
+            model_name='solarflare',
+            index=models.Index(fields=['risk_level', '-begin_time'], name='wa_flare_risk_begin'),
+        ),
+        migrations.AddIndex(
+            model_name='solarflare',
+            index=models.Index(fields=['-intensity'], name='wa_flare_intensity'),
+        ),
+        migrations.AddIndex(
+            model_name='spaceweatherreport',
+            index=models.Index(fields=['-report_date'], name='wa_report_date'),
+        ),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 4.2.7 on 2026-10-19 07:17
+
+from django.db import migrations, models
+
+from config.archive import history_view_sql
+
+# أعمدة الـ view (مشتركة بين الجدول الساخن والأرشيف)
+COLUMNS = [
+    'id', 'flare_id', 'class_type', 'flare_class', 'intensity', 'begin_time', 'peak_time',
+    'end_time', 'risk_level', 'risk_color', 'impact_effects', 'created_at', 'updated_at',
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('weather_api', '0002_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SolarFlareHistory',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('flare_id', models.CharField(max_length=100)),
+                ('class_type', models.CharField(max_length=10)),
+                ('flare_class', models.CharField(choices=[('A', 'Class A'), ('B', 'Class B'), ('C', 'Class C'), ('M', 'Class M'), ('X', 'Class X')], max_length=1)),
+                ('intensity', models.FloatField()),
+                ('begin_time', models.DateTimeField()),
+                ('peak_time', models.DateTimeField(blank=True, null=True)),
+                ('end_time', models.DateTimeField(blank=True, null=True)),
+                ('risk_level', models.CharField(max_length=20)),
+                ('risk_color', models.CharField(max_length=7)),
+                ('impact_effects', models.JSONField(default=list)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+            ],
+            options={
+                'db_table': 'weather_api_solarflare_history',
+                'ordering': ['-begin_time'],
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedSolarFlare',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('flare_id', models.CharField(max_length=100, unique=True)),
+                ('class_type', models.CharField(max_length=10)),
+                ('flare_class', models.CharField(choices=[('A', 'Class A'), ('B', 'Class B'), ('C', 'Class C'), ('M', 'Class M'), ('X', 'Class X')], max_length=1)),
+                ('intensity', models.FloatField()),
+                ('begin_time', models.DateTimeField()),
+                ('peak_time', models.DateTimeField(blank=True, null=True)),
+                ('end_time', models.DateTimeField(blank=True, null=True)),
+                ('risk_level', models.CharField(max_length=20)),
+                ('risk_color', models.CharField(max_length=7)),
+                ('impact_effects', models.JSONField(default=list)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['-begin_time'],
+                'indexes': [models.Index(fields=['-begin_time'], name='wa_archive_begin'), models.Index(fields=['flare_class', '-begin_time'], name='wa_archive_class_begin'), models.Index(fields=['risk_level', '-begin_time'], name='wa_archive_risk_begin')],
+            },
+        ),
+        migrations.RunSQL(
+            history_view_sql(
+                'weather_api_solarflare_history', 'weather_api_solarflare', 'weather_api_archivedsolarflare', COLUMNS
+            ),
+            'DROP VIEW weather_api_solarflare_history',
+        ),
+    ]
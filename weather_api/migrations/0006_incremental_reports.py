@@ -0,0 +1,42 @@
+# Generated by Django 4.2.7 on 2026-10-19 07:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('weather_api', '0005_scheduler'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='spaceweatherreport',
+            name='inputs',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='spaceweatherreport',
+            name='risk_sum',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='spaceweatherreport',
+            name='source_watermark',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='spaceweatherreport',
+            name='window_end',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='spaceweatherreport',
+            name='window_start',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='solarflare',
+            index=models.Index(fields=['updated_at'], name='wa_flare_updated'),
+        ),
+    ]
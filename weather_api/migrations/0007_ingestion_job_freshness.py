@@ -0,0 +1,29 @@
+# Generated by Django 4.2.7 on 2026-10-19 08:19
+
+from django.db import migrations, models
+
+
+def backfill_nasa_ok(apps, schema_editor):
+    """المهام الناجحة السابقة سجلت NASA في result['nasa'] فقط"""
+    IngestionJob = apps.get_model('weather_api', 'IngestionJob')
+    IngestionJob.objects.filter(status='succeeded', result__nasa=True).update(nasa_ok=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('weather_api', '0006_incremental_reports'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ingestionjob',
+            name='nasa_ok',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddIndex(
+            model_name='ingestionjob',
+            index=models.Index(fields=['status', 'source', 'finished_at'], name='wa_job_status_source_done'),
+        ),
+        migrations.RunPython(backfill_nasa_ok, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 from django.utils import timezone
+from config.archive import partition
 
 class SolarFlare(models.Model):
     """موديل لتخزين بيانات الانفجارات الشمسية"""
@@ -30,6 +31,15 @@ class SolarFlare(models.Model):
     
     class Meta:
         ordering = ['-begin_time']
+        indexes = [
+            # نوافذ "آخر N يوم" مرتبة حسب الوقت، ومعها العدّ حسب الفئة والخطورة
+            models.Index(fields=['-begin_time'], name='wa_flare_begin'),
+            models.Index(fields=['flare_class', '-begin_time'], name='wa_flare_class_begin'),
+            models.Index(fields=['risk_level', '-begin_time'], name='wa_flare_risk_begin'),
+            models.Index(fields=['-intensity'], name='wa_flare_intensity'),
+            # التوهجات الجديدة / المعدلة منذ آخر تقرير (weather_api.reports)
+            models.Index(fields=['updated_at'], name='wa_flare_updated'),
+        ]
         verbose_name = 'Solar Flare'
         verbose_name_plural = 'Solar Flares'
     
@@ -52,8 +62,188 @@ class SpaceWeatherReport(models.Model):
     risk_percentage = models.FloatField(default=0.0)
     prediction_confidence = models.FloatField(default=92.7)
     
+    # مدخلات التقرير (لإعادة إنتاجه، وأساس التقرير التدريجي التالي)
+    window_start = models.DateTimeField(null=True, blank=True)
+    window_end = models.DateTimeField(null=True, blank=True)
+    risk_sum = models.IntegerField(default=0)
+    source_watermark = models.DateTimeField(null=True, blank=True)
+    inputs = models.JSONField(default=dict, blank=True)
+    
     class Meta:
         ordering = ['-report_date']
+        indexes = [
+            models.Index(fields=['-report_date'], name='wa_report_date'),
+        ]
+    
+    def __str__(self):
+        return f"Report {self.report_date.strftime('%Y-%m-%d %H:%M')}"
+
+
+class ArchivedSolarFlare(models.Model):
+    """توهجات قديمة نُقلت من SolarFlare بأمر archive_flares (نفس الأعمدة ونفس الـ id)"""
+    
+    id = models.BigIntegerField(primary_key=True)
+    flare_id = models.CharField(max_length=100, unique=True)
+    class_type = models.CharField(max_length=10)
+    flare_class = models.CharField(max_length=1, choices=SolarFlare.FLARE_CLASSES)
+    intensity = models.FloatField()
+    begin_time = models.DateTimeField()
+    peak_time = models.DateTimeField(null=True, blank=True)
+    end_time = models.DateTimeField(null=True, blank=True)
+    risk_level = models.CharField(max_length=20)
+    risk_color = models.CharField(max_length=7)
+    impact_effects = models.JSONField(default=list)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['-begin_time']
+        indexes = [
+            models.Index(fields=['-begin_time'], name='wa_archive_begin'),
+            models.Index(fields=['flare_class', '-begin_time'], name='wa_archive_class_begin'),
+            models.Index(fields=['risk_level', '-begin_time'], name='wa_archive_risk_begin'),
+        ]
+
+
+class SolarFlareHistory(models.Model):
+    """
+    كل التوهجات: SolarFlare + ArchivedSolarFlare (database view بـ UNION ALL، للقراءة فقط)
+    
+    عند تغيير أعمدة SolarFlare يجب إعادة إنشاء الـ view في migration.
+    """
+    
+    id = models.BigIntegerField(primary_key=True)
+    flare_id = models.CharField(max_length=100)
+    class_type = models.CharField(max_length=10)
+    flare_class = models.CharField(max_length=1, choices=SolarFlare.FLARE_CLASSES)
+    intensity = models.FloatField()
+    begin_time = models.DateTimeField()
+    peak_time = models.DateTimeField(null=True, blank=True)
+    end_time = models.DateTimeField(null=True, blank=True)
+    risk_level = models.CharField(max_length=20)
+    risk_color = models.CharField(max_length=7)
+    impact_effects = models.JSONField(default=list)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    
+    class Meta:
+        managed = False
+        db_table = 'weather_api_solarflare_history'
+        ordering = ['-begin_time']
     
     def __str__(self):
-        return f"Report {self.report_date.strftime('%Y-%m-%d %H:%M')}"
\ No newline at end of file
+        return f"{self.flare_id} - {self.class_type}"
+
+
+class IngestionJob(models.Model):
+    """
+    جلب من NASA كمهمة في الخلفية (انظر weather_api.jobs)
+    
+    مهمة واحدة فقط في الانتظار أو التنفيذ لكل dedupe_key (unique index جزئي)،
+    فالطلبات المتطابقة المتزامنة ترجع نفس المهمة.
+    """
+    
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+    STATUSES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (SUCCEEDED, 'Succeeded'),
+        (FAILED, 'Failed'),
+    ]
+    IN_FLIGHT = [QUEUED, RUNNING]
+    
+    SOURCES = [
+        ('weather_api', 'Weather API (flares + report)'),
+        ('solar_defender', 'Solar Defender game flares'),
+    ]
+    
+    source = models.CharField(max_length=20, choices=SOURCES, default='weather_api')
+    start_date = models.DateField(null=True, blank=True)
+    end_date = models.DateField(null=True, blank=True)
+    dedupe_key = models.CharField(max_length=100)
+    
+    status = models.CharField(max_length=10, choices=STATUSES, default=QUEUED)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    # NASA ردت فعلاً (وليس البيانات التجريبية)، انظر jobs.ingestion_age
+    nasa_ok = models.BooleanField(default=False)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['dedupe_key'],
+                condition=models.Q(status__in=['queued', 'running']),
+                name='wa_job_in_flight_dedupe',
+            ),
+        ]
+        indexes = [
+            # الـ worker يأخذ أقدم مهمة في الانتظار
+            models.Index(fields=['status', 'created_at'], name='wa_job_status_created'),
+            # آخر مهمة ناجحة لكل مصدر (health / readiness و INGESTION_MIN_INTERVAL)
+            models.Index(fields=['status', 'source', 'finished_at'], name='wa_job_status_source_done'),
+        ]
+    
+    def __str__(self):
+        return f"{self.source} job {self.pk} ({self.status})"
+
+
+class SchedulerLock(models.Model):
+    """
+    قفل لمهمة مجدولة (انظر weather_api.scheduler)
+    
+    صف لكل مهمة؛ يأخذه node واحد حتى ينتهي التنفيذ أو حتى expires_at إذا مات.
+    """
+    
+    name = models.CharField(max_length=50, primary_key=True)
+    owner = models.CharField(max_length=100)
+    acquired_at = models.DateTimeField()
+    expires_at = models.DateTimeField()
+    
+    def __str__(self):
+        return f"{self.name} ({self.owner})"
+
+
+class ScheduledRun(models.Model):
+    """سجل تشغيل مهمة مجدولة"""
+    
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+    STATUSES = [
+        (RUNNING, 'Running'),
+        (SUCCEEDED, 'Succeeded'),
+        (FAILED, 'Failed'),
+    ]
+    
+    task = models.CharField(max_length=50)
+    owner = models.CharField(max_length=100)
+    status = models.CharField(max_length=10, choices=STATUSES, default=RUNNING)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    started_at = models.DateTimeField()
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-started_at']
+        indexes = [
+            # آخر تشغيل لكل مهمة (موعد التشغيل التالي)
+            models.Index(fields=['task', '-started_at'], name='wa_run_task_started'),
+        ]
+    
+    def __str__(self):
+        return f"{self.task} {self.started_at:%Y-%m-%d %H:%M} ({self.status})"
+
+
+def flares_since(start=None):
+    """التوهجات من start (الجدول الساخن فقط إذا لم تصل الفترة إلى الأرشيف)"""
+    return partition(SolarFlare, ArchivedSolarFlare, SolarFlareHistory, start)
@@ -0,0 +1,182 @@
+"""
+توليد SpaceWeatherReport تدريجياً من التقرير السابق
+
+النافذة: التوهجات التي بدأت خلال آخر REPORT_WINDOW_DAYS يوماً. كل تقرير يحفظ
+عدد التوهجات لكل فئة (inputs['counts']) و risk_sum وأقوى توهج و source_watermark
+(أكبر updated_at رآه)، فالتقرير التالي يحتاج فقط:
+
+- التوهجات الجديدة منذ الـ watermark (index على updated_at)
+- التوهجات التي خرجت من بداية النافذة منذ التقرير السابق (index على begin_time)
+- أقوى توهج يُعاد حسابه فقط إذا خرج السابق من النافذة
+
+إعادة الحساب الكاملة (بـ aggregate في القاعدة) عندما لا يصلح الحساب التدريجي:
+لا يوجد تقرير سابق بهذه الحقول، أو انتهت نافذته كلها، أو تعدّل توهج قديم (قيمته
+السابقة غير معروفة)، أو ظهر عدد سالب (حذف)، أو بعد REPORT_FULL_REBUILD_EVERY
+تقرير تدريجي متتالٍ. التقرير يُعاد إنتاجه من window_start و source_watermark و inputs.
+
+الـ watermark لا يتجاوز الآن - REPORT_WATERMARK_LAG: updated_at يُحسب قبل الـ
+commit، فتوهج من transaction تنتهي بعد التقرير قد يكون أقدم من الـ watermark
+ولا يُرى أبداً. التوهجات الأحدث من ذلك تُحسب في التقرير التالي، إلا ما كتبه
+المستدعي نفسه (committed: أكبر updated_at حفظه، مثل مهمة الجلب قبل تقريرها).
+
+التقارير التدريجية تقريبية بين إعادتي حساب كاملتين: توهج حُذف أو أُرشف
+(config.archive) داخل النافذة يبقى محسوباً، وكذلك توهج من transaction استغرقت
+أكثر من REPORT_WATERMARK_LAG، حتى إعادة الحساب الكاملة التالية
+(REPORT_FULL_REBUILD_EVERY).
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Count, Max
+from django.utils import timezone
+
+from .models import SolarFlare, SpaceWeatherReport
+
+FLARE_CLASSES = [flare_class for flare_class, _ in SolarFlare.FLARE_CLASSES]
+# وزن الخطورة لكل فئة في نسبة الخطر (الباقي 1)
+RISK_WEIGHTS = {'X': 3, 'M': 2}
+
+
+def risk_sum(counts):
+    return sum(RISK_WEIGHTS.get(flare_class, 1) * count for flare_class, count in counts.items())
+
+
+def risk_percentage(counts):
+    total_flares = sum(counts.values())
+    if not total_flares:
+        return 0.0
+    return (risk_sum(counts) / (total_flares * 3)) * 100
+
+
+def window_days():
+    return getattr(settings, 'REPORT_WINDOW_DAYS', 7)
+
+
+def watermark_lag():
+    return timedelta(seconds=getattr(settings, 'REPORT_WATERMARK_LAG', 60))
+
+
+def current_watermark(committed=None):
+    """
+    أكبر updated_at، بحد أقصى الآن - REPORT_WATERMARK_LAG (None إذا لا توجد توهجات)
+
+    committed: أكبر updated_at كتبه المستدعي وانتهت كتابته، فيُحسب دائماً.
+    """
+    watermark = SolarFlare.objects.aggregate(watermark=Max('updated_at'))['watermark']
+    if watermark is None:
+        return None
+    limit = timezone.now() - watermark_lag()
+    if committed is not None:
+        limit = max(limit, committed)
+    return min(watermark, limit)
+
+
+def strongest_in(window_start, watermark):
+    return SolarFlare.objects.filter(
+        begin_time__gte=window_start, updated_at__lte=watermark
+    ).order_by('-intensity').first()
+
+
+class IncrementalUnavailable(Exception):
+    """الحساب التدريجي غير ممكن، نعيد الحساب كاملاً"""
+
+
+def full_inputs(window_start, watermark):
+    """(counts، أقوى توهج) لكل التوهجات في النافذة حتى الـ watermark"""
+    if watermark is None:
+        return {}, None
+    in_window = SolarFlare.objects.filter(begin_time__gte=window_start, updated_at__lte=watermark)
+    counts = dict(in_window.order_by().values_list('flare_class').annotate(count=Count('id')))
+    strongest = strongest_in(window_start, watermark) if counts else None
+    return counts, strongest
+
+
+def incremental_inputs(previous, window_start, watermark):
+    """(counts، أقوى توهج، عدد الإضافات، عدد الخارجين) من التقرير السابق"""
+    counts = dict(previous.inputs['counts'])
+    strongest = previous.strongest_flare
+
+    added = []
+    if previous.source_watermark is None or watermark > previous.source_watermark:
+        changed = SolarFlare.objects.filter(updated_at__lte=watermark)
+        if previous.source_watermark is not None:
+            changed = changed.filter(updated_at__gt=previous.source_watermark)
+            # توهج قديم تعدّل: لا نعرف فئته السابقة
+            if changed.filter(created_at__lte=previous.source_watermark).exists():
+                raise IncrementalUnavailable('modified flares')
+        added = list(changed.filter(begin_time__gte=window_start).order_by())
+
+    expired = []
+    if window_start > previous.window_start and previous.source_watermark is not None:
+        expired = SolarFlare.objects.filter(
+            begin_time__gte=previous.window_start,
+            begin_time__lt=window_start,
+            updated_at__lte=previous.source_watermark,
+        ).order_by().values_list('flare_class', flat=True)
+        expired = list(expired)
+
+    for flare in added:
+        counts[flare.flare_class] = counts.get(flare.flare_class, 0) + 1
+    for flare_class in expired:
+        counts[flare_class] = counts.get(flare_class, 0) - 1
+    if any(count < 0 for count in counts.values()):
+        raise IncrementalUnavailable('negative counts')
+    counts = {flare_class: count for flare_class, count in counts.items() if count}
+
+    if strongest is not None and strongest.begin_time < window_start:
+        strongest = None
+    for flare in added:
+        if strongest is None or flare.intensity > strongest.intensity:
+            strongest = flare
+    if strongest is None and counts:
+        # الأقوى السابق خرج من النافذة (أو حُذف)
+        strongest = strongest_in(window_start, watermark)
+
+    return counts, strongest, len(added), len(expired)
+
+
+def latest_report():
+    return SpaceWeatherReport.objects.order_by('-report_date', '-id').select_related('strongest_flare').first()
+
+
+def generate_report(now=None, committed=None):
+    """تقرير جديد (تدريجي من آخر تقرير إذا أمكن)، committed كما في current_watermark"""
+    now = now or timezone.now()
+    window_start = now - timedelta(days=window_days())
+    watermark = current_watermark(committed)
+    previous = latest_report()
+    rebuild_every = getattr(settings, 'REPORT_FULL_REBUILD_EVERY', 24)
+
+    inputs = {'window_days': window_days()}
+    try:
+        if previous is None or previous.window_start is None or 'counts' not in previous.inputs:
+            raise IncrementalUnavailable('no base report')
+        if watermark is None:
+            raise IncrementalUnavailable('no flares')
+        if previous.window_end <= window_start:
+            raise IncrementalUnavailable('base window expired')
+        if previous.inputs.get('chain', 0) >= rebuild_every:
+            raise IncrementalUnavailable('periodic rebuild')
+
+        counts, strongest, added, expired = incremental_inputs(previous, window_start, watermark)
+        inputs.update(
+            mode='incremental', base_report=previous.pk, chain=previous.inputs.get('chain', 0) + 1,
+            added=added, expired=expired,
+        )
+    except IncrementalUnavailable as reason:
+        counts, strongest = full_inputs(window_start, watermark)
+        inputs.update(mode='full', reason=str(reason), chain=0)
+
+    inputs['counts'] = {flare_class: counts[flare_class] for flare_class in FLARE_CLASSES if counts.get(flare_class)}
+
+    return SpaceWeatherReport.objects.create(
+        report_date=now,
+        window_start=window_start,
+        window_end=now,
+        total_flares=sum(counts.values()),
+        strongest_flare=strongest,
+        risk_sum=risk_sum(counts),
+        risk_percentage=risk_percentage(counts),
+        source_watermark=watermark,
+        inputs=inputs,
+    )
@@ -0,0 +1,180 @@
+"""
+جدولة المهام الدورية داخل المشروع (أمر run_scheduler) بدلاً من cron خارجي
+
+- كل مهمة لها interval و jitter بالثواني في SCHEDULER_TASKS (interval 0 = معطلة)
+- موعد التشغيل التالي من آخر ScheduledRun في القاعدة (مشترك بين كل الـ nodes)
+  + interval + إزاحة عشوائية حتى jitter لكل node، فلا تتسابق الـ nodes في نفس اللحظة
+- قفل في القاعدة (SchedulerLock) لكل مهمة: node واحد ينفذها، ويُعاد فحص الموعد
+  بعد أخذ القفل. القفل ينتهي بعد SCHEDULER_LOCK_TIMEOUT إذا مات الـ node
+- كل تشغيل يُسجل في ScheduledRun (النتيجة أو الخطأ)، ويُحذف الأقدم من
+  SCHEDULER_HISTORY_DAYS
+"""
+import logging
+import os
+import random
+import socket
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import jobs
+from .models import SchedulerLock, ScheduledRun
+from .services import NASASpaceWeatherService
+
+logger = logging.getLogger(__name__)
+
+
+# ====================================================================
+# المهام
+# ====================================================================
+
+def ingest_nasa():
+    """جدولة الجلب للتطبيقين (تُنفذ حسب INGESTION_EXECUTOR، انظر weather_api.jobs)"""
+    return {
+        source: jobs.enqueue(source)[0].pk
+        for source in ('weather_api', 'solar_defender')
+    }
+
+
+def update_leaderboard():
+    from solar_defender.services import LeaderboardService
+
+    return {'entries': len(LeaderboardService().rebuild())}
+
+
+def generate_report():
+    return {'report_id': NASASpaceWeatherService().generate_report().pk}
+
+
+TASKS = {
+    'ingest_nasa': ingest_nasa,
+    'update_leaderboard': update_leaderboard,
+    'generate_report': generate_report,
+}
+
+DEFAULT_SCHEDULE = {
+    'ingest_nasa': {'interval': 3600, 'jitter': 300},
+    'update_leaderboard': {'interval': 300, 'jitter': 30},
+    'generate_report': {'interval': 3600, 'jitter': 120},
+}
+
+
+def schedule():
+    """{مهمة: {'interval', 'jitter'}} للمهام المفعلة"""
+    configured = getattr(settings, 'SCHEDULER_TASKS', DEFAULT_SCHEDULE)
+    return {
+        name: {'interval': options['interval'], 'jitter': options.get('jitter', 0)}
+        for name, options in configured.items()
+        if name in TASKS and options.get('interval')
+    }
+
+
+# ====================================================================
+# الأقفال
+# ====================================================================
+
+def acquire(name, owner, timeout=None):
+    """أخذ قفل المهمة (True) إذا كان حراً أو منتهياً أو لنفس الـ owner"""
+    timeout = timeout or getattr(settings, 'SCHEDULER_LOCK_TIMEOUT', 900)
+    now = timezone.now()
+    expires_at = now + timedelta(seconds=timeout)
+
+    taken = SchedulerLock.objects.filter(name=name).filter(Q(expires_at__lte=now) | Q(owner=owner)).update(
+        owner=owner, acquired_at=now, expires_at=expires_at
+    )
+    if taken:
+        return True
+
+    try:
+        with transaction.atomic():
+            SchedulerLock.objects.create(name=name, owner=owner, acquired_at=now, expires_at=expires_at)
+    except IntegrityError:
+        return False
+    return True
+
+
+def release(name, owner):
+    SchedulerLock.objects.filter(name=name, owner=owner).delete()
+
+
+# ====================================================================
+# التشغيل
+# ====================================================================
+
+class Scheduler:
+    def __init__(self, owner=None, seed=None):
+        self.owner = owner or f'{socket.gethostname()}:{os.getpid()}'
+        self.rng = random.Random(seed)
+        self.offsets = {}
+
+    def last_run(self, name):
+        return ScheduledRun.objects.filter(task=name).values_list('started_at', flat=True).first()
+
+    def offset(self, name, jitter):
+        """الإزاحة العشوائية للتشغيل التالي (ثابتة حتى يتم التشغيل)"""
+        if name not in self.offsets:
+            self.offsets[name] = self.rng.uniform(0, jitter)
+        return self.offsets[name]
+
+    def next_due(self, name, options, now=None):
+        """موعد التشغيل التالي (now إذا لم تُشغل من قبل)"""
+        last = self.last_run(name)
+        if last is None:
+            return now or timezone.now()
+        return last + timedelta(seconds=options['interval'] + self.offset(name, options['jitter']))
+
+    def run(self, name, force=False):
+        """تنفيذ مهمة تحت القفل، ترجع ScheduledRun أو None إذا كان القفل مأخوذاً أو لم يحن الموعد"""
+        if not acquire(name, self.owner):
+            return None
+
+        try:
+            options = schedule().get(name)
+            # node آخر ربما نفذها قبل أن نأخذ القفل
+            last = self.last_run(name)
+            if not force and options and last and last + timedelta(seconds=options['interval']) > timezone.now():
+                return None
+
+            run = ScheduledRun.objects.create(task=name, owner=self.owner, started_at=timezone.now())
+            try:
+                run.result = TASKS[name]()
+                run.status = ScheduledRun.SUCCEEDED
+            except Exception as e:
+                logger.exception('Scheduled task %s failed', name)
+                run.status = ScheduledRun.FAILED
+                run.error = f'{type(e).__name__}: {e}'
+            run.finished_at = timezone.now()
+            run.save(update_fields=['status', 'result', 'error', 'finished_at'])
+
+            self.offsets.pop(name, None)
+            self.prune(name)
+            return run
+        finally:
+            release(name, self.owner)
+
+    def prune(self, name):
+        cutoff = timezone.now() - timedelta(days=getattr(settings, 'SCHEDULER_HISTORY_DAYS', 30))
+        ScheduledRun.objects.filter(task=name, started_at__lt=cutoff).delete()
+
+    def run_due(self):
+        """تنفيذ كل المهام التي حان موعدها، ترجع التشغيلات"""
+        now = timezone.now()
+        runs = []
+        for name, options in schedule().items():
+            if self.next_due(name, options, now) <= now:
+                run = self.run(name)
+                if run is not None:
+                    runs.append(run)
+        return runs
+
+    def seconds_until_next(self, maximum=60):
+        """مدة الانتظار حتى أقرب موعد"""
+        now = timezone.now()
+        waits = [
+            (self.next_due(name, options, now) - now).total_seconds()
+            for name, options in schedule().items()
+        ]
+        return min([maximum] + [max(0.0, wait) for wait in waits])
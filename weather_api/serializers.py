@@ -1,7 +1,9 @@
 from rest_framework import serializers
-from .models import SolarFlare, SpaceWeatherReport
+from config.fast_serializers import ValuesSerializer, datetime_field
+from config.timing import TimedSerializerMixin
+from .models import IngestionJob, SolarFlare, SpaceWeatherReport
 
-class SolarFlareSerializer(serializers.ModelSerializer):
+class SolarFlareSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Serializer للانفجارات الشمسية"""
     
     class Meta:
@@ -15,7 +17,7 @@ class SolarFlareSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'updated_at']
 
 
-class SpaceWeatherReportSerializer(serializers.ModelSerializer):
+class SpaceWeatherReportSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Serializer للتقارير"""
     
     strongest_flare = SolarFlareSerializer(read_only=True)
@@ -25,7 +27,7 @@ class SpaceWeatherReportSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'report_date', 'total_flares', 
             'strongest_flare', 'risk_percentage', 
-            'prediction_confidence'
+            'prediction_confidence', 'window_start', 'window_end', 'risk_sum'
         ]
 
 
@@ -36,4 +38,44 @@ class SolarFlareStatsSerializer(serializers.Serializer):
     flares_by_class = serializers.DictField()
     average_intensity = serializers.FloatField()
     risk_distribution = serializers.DictField()
-    timeline_data = serializers.ListField()
\ No newline at end of file
+    timeline_data = serializers.ListField()
+
+class SolarFlareFastSerializer(ValuesSerializer):
+    """نسخة سريعة (values_list) من SolarFlareSerializer للقراءة فقط"""
+    
+    fields = (
+        ('id', 'id', None),
+        ('flare_id', 'flare_id', None),
+        ('class_type', 'class_type', None),
+        ('flare_class', 'flare_class', None),
+        ('intensity', 'intensity', float),
+        ('begin_time', 'begin_time', datetime_field),
+        ('peak_time', 'peak_time', datetime_field),
+        ('end_time', 'end_time', datetime_field),
+        ('risk_level', 'risk_level', None),
+        ('risk_color', 'risk_color', None),
+        ('impact_effects', 'impact_effects', None),
+        ('created_at', 'created_at', datetime_field),
+        ('updated_at', 'updated_at', datetime_field),
+    )
+
+
+class IngestionJobSerializer(serializers.ModelSerializer):
+    """Serializer لمهام الجلب من NASA"""
+    
+    class Meta:
+        model = IngestionJob
+        fields = [
+            'id', 'source', 'start_date', 'end_date', 'status', 'attempts',
+            'result', 'error', 'nasa_ok', 'created_at', 'started_at', 'finished_at'
+        ]
+        read_only_fields = [
+            'id', 'status', 'attempts', 'result', 'error', 'nasa_ok',
+            'created_at', 'started_at', 'finished_at'
+        ]
+    
+    def validate(self, attrs):
+        start_date, end_date = attrs.get('start_date'), attrs.get('end_date')
+        if start_date and end_date and start_date > end_date:
+            raise serializers.ValidationError({'end_date': 'end_date must not be before start_date'})
+        return attrs
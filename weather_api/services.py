@@ -1,45 +1,76 @@
 import requests
 from datetime import datetime, timedelta
+from django.conf import settings
+from django.db import IntegrityError, transaction
 from django.utils import timezone
-from .models import SolarFlare, SpaceWeatherReport
+from django.utils.dateparse import parse_datetime
+from config.impacts import risk_profile
+from config.metrics import INGESTION_ROWS, INGESTION_SECONDS, NASA_FETCH_ERRORS, NASA_FETCH_SECONDS
+from config.timing import timed
+from . import reports
+from .models import ArchivedSolarFlare, SolarFlare
 import logging
 
 logger = logging.getLogger(__name__)
 
+NASA_TIMEOUT = 10
+
+
+def parse_time(value):
+    """نص ISO من NASA -> datetime (أو القيمة كما هي إذا لم تُفهم)"""
+    if isinstance(value, str):
+        return parse_datetime(value) or value
+    return value
+
 
 class NASASpaceWeatherService:
     """خدمة للتعامل مع NASA API"""
     
     def __init__(self):
-        self.api_key = 'DEMO_KEY'  # استبدلها بمفتاح حقيقي
-        self.base_url = 'https://api.nasa.gov/DONKI/FLR'
+        self.api_key = getattr(settings, 'NASA_API_KEY', 'DEMO_KEY')
+        self.base_url = getattr(settings, 'NASA_DONKI_URL', 'https://api.nasa.gov/DONKI/FLR')
+        # True بعد استجابة ناجحة من NASA (وليس البيانات التجريبية)، انظر jobs.ingestion_age
+        self.nasa_ok = False
+        # أكبر updated_at حفظته save_flares_to_db (التقرير التالي يحسبه رغم REPORT_WATERMARK_LAG)
+        self.high_water_mark = None
     
-    def fetch_solar_flares(self, start_date=None, end_date=None):
-        """جلب الانفجارات الشمسية من NASA"""
-        
+    def request_params(self, start_date=None, end_date=None):
         if not start_date:
             start_date = (timezone.now() - timedelta(days=30)).strftime('%Y-%m-%d')
         if not end_date:
             end_date = timezone.now().strftime('%Y-%m-%d')
         
-        params = {
+        return {
             'startDate': start_date,
             'endDate': end_date,
             'api_key': self.api_key
         }
+    
+    def handle_response(self, response):
+        """استجابة requests -> بيانات التوهجات"""
+        if response.status_code == 200:
+            self.nasa_ok = True
+            return response.json()
+        
+        NASA_FETCH_ERRORS.inc(service='weather_api', reason=response.status_code)
+        logger.warning(f"NASA API returned status {response.status_code}")
+        return self.generate_sample_data()
+    
+    def handle_error(self, error):
+        NASA_FETCH_ERRORS.inc(service='weather_api', reason=type(error).__name__)
+        logger.error(f"Error fetching NASA data: {error}")
+        return self.generate_sample_data()
+    
+    def fetch_solar_flares(self, start_date=None, end_date=None):
+        """جلب الانفجارات الشمسية من NASA"""
+        params = self.request_params(start_date, end_date)
         
         try:
-            response = requests.get(self.base_url, params=params, timeout=10)
-            
-            if response.status_code == 200:
-                return response.json()
-            else:
-                logger.warning(f"NASA API returned status {response.status_code}")
-                return self.generate_sample_data()
-                
+            with timed('nasa'), NASA_FETCH_SECONDS.time(service='weather_api'):
+                response = requests.get(self.base_url, params=params, timeout=NASA_TIMEOUT)
+            return self.handle_response(response)
         except Exception as e:
-            logger.error(f"Error fetching NASA data: {e}")
-            return self.generate_sample_data()
+            return self.handle_error(e)
     
     def generate_sample_data(self):
         """توليد بيانات تجريبية"""
@@ -60,96 +91,94 @@ class NASASpaceWeatherService:
     
     def calculate_impact(self, class_type):
         """حساب التأثير بناءً على نوع الانفجار"""
-        
-        flare_class = class_type[0] if class_type else 'B'
-        
-        impact_map = {
-            'A': {
-                'risk': 'LOW',
-                'color': '#00FF00',
-                'effects': ['Minimal impact']
-            },
-            'B': {
-                'risk': 'LOW-MEDIUM',
-                'color': '#7CFC00',
-                'effects': ['Radio static']
-            },
-            'C': {
-                'risk': 'MEDIUM',
-                'color': '#FFD700',
-                'effects': ['GPS errors', 'Radio blackouts']
-            },
-            'M': {
-                'risk': 'HIGH',
-                'color': '#FF8C00',
-                'effects': ['Power grid fluctuations', 'Astronaut risk']
-            },
-            'X': {
-                'risk': 'EXTREME',
-                'color': '#FF0000',
-                'effects': ['Satellite damage', 'Global blackouts']
-            }
+        return risk_profile(class_type)
+    
+    def flare_fields(self, flare):
+        """(flare_id، قيم الحقول) من سجل NASA"""
+        class_type = flare.get('classType', 'B1.0')
+        flare_class = class_type[0]
+        intensity = float(class_type[1:]) if len(class_type) > 1 else 1.0
+        
+        impact = self.calculate_impact(class_type)
+        
+        return flare.get('flareID', f'UNKNOWN-{timezone.now().timestamp()}'), {
+            'class_type': class_type,
+            'flare_class': flare_class,
+            'intensity': intensity,
+            'begin_time': parse_time(flare.get('beginTime')),
+            'peak_time': parse_time(flare.get('peakTime')),
+            'end_time': parse_time(flare.get('endTime')),
+            'risk_level': impact['risk'],
+            'risk_color': impact['color'],
+            'impact_effects': list(impact['effects']),
         }
-        
-        return impact_map.get(flare_class, impact_map['B'])
     
+    def apply_changes(self, flare_obj, defaults):
+        """تحديث الحقول التي تغيرت فقط، ترجع True إذا تغير شيء"""
+        changed = False
+        for field, value in defaults.items():
+            if getattr(flare_obj, field) != value:
+                setattr(flare_obj, field, value)
+                changed = True
+        return changed
+    
+    def archived(self, flare_ids):
+        """
+        flare_id للتوهجات المؤرشفة من هذه القائمة
+
+        NASA ترجع أحياناً توهجات قديمة أُرشفت (config.archive): لا تُدخل مرة أخرى
+        في الجدول الساخن، وإلا تظهر مرتين في SolarFlareHistory ويفشل الأرشيف التالي.
+        """
+        return ArchivedSolarFlare.objects.filter(flare_id__in=flare_ids).order_by().values_list('flare_id', flat=True)
+    
+    def create_flare(self, flare_id, defaults):
+        """
+        INSERT توهج جديد
+
+        عملية أخرى (worker أو طلب آخر) قد تُدخل نفس flare_id بعد in_bulk: الـ unique
+        index يرفض الثاني، فنقرأ الموجود ونطبق التغييرات عليه بدلاً من خطأ 500.
+        """
+        try:
+            with transaction.atomic():
+                return SolarFlare.objects.create(flare_id=flare_id, **defaults)
+        except IntegrityError:
+            flare_obj = SolarFlare.objects.get(flare_id=flare_id)
+            if self.apply_changes(flare_obj, defaults):
+                flare_obj.save()
+            return flare_obj
+    
+    @INGESTION_SECONDS.time(source='weather_api')
     def save_flares_to_db(self, flares_data):
-        """حفظ الانفجارات في قاعدة البيانات"""
+        """
+        حفظ الانفجارات في قاعدة البيانات
         
+        التوهج الموجود لا يُكتب إذا لم تتغير قيمه، فيبقى updated_at كما هو
+        (التقارير التدريجية تعتمد عليه، انظر weather_api.reports).
+        """
+        
+        records = [self.flare_fields(flare) for flare in flares_data]
+        flare_ids = [flare_id for flare_id, _ in records]
+        archived = set(self.archived(flare_ids))
+        existing = SolarFlare.objects.in_bulk(flare_ids, field_name='flare_id')
         saved_flares = []
         
-        for flare in flares_data:
-            class_type = flare.get('classType', 'B1.0')
-            flare_class = class_type[0]
-            intensity = float(class_type[1:]) if len(class_type) > 1 else 1.0
-            
-            impact = self.calculate_impact(class_type)
-            
-            flare_obj, created = SolarFlare.objects.update_or_create(
-                flare_id=flare.get('flareID', f'UNKNOWN-{timezone.now().timestamp()}'),
-                defaults={
-                    'class_type': class_type,
-                    'flare_class': flare_class,
-                    'intensity': intensity,
-                    'begin_time': flare.get('beginTime'),
-                    'peak_time': flare.get('peakTime'),
-                    'end_time': flare.get('endTime'),
-                    'risk_level': impact['risk'],
-                    'risk_color': impact['color'],
-                    'impact_effects': impact['effects'],
-                }
-            )
-            
+        for flare_id, defaults in records:
+            if flare_id in archived:
+                continue
+            flare_obj = existing.get(flare_id)
+            if flare_obj is None:
+                flare_obj = existing[flare_id] = self.create_flare(flare_id, defaults)
+            elif self.apply_changes(flare_obj, defaults):
+                flare_obj.save()
             saved_flares.append(flare_obj)
         
+        written = [flare_obj.updated_at for flare_obj in saved_flares]
+        if self.high_water_mark is not None:
+            written.append(self.high_water_mark)
+        self.high_water_mark = max(written, default=None)
+        INGESTION_ROWS.inc(len(saved_flares), source='weather_api')
         return saved_flares
     
     def generate_report(self):
-        """توليد تقرير شامل"""
-        
-        recent_flares = SolarFlare.objects.filter(
-            begin_time__gte=timezone.now() - timedelta(days=7)
-        )
-        
-        total_flares = recent_flares.count()
-        
-        if total_flares > 0:
-            strongest = recent_flares.order_by('-intensity').first()
-            
-            risk_sum = sum(
-                3 if f.flare_class == 'X' else
-                2 if f.flare_class == 'M' else 1
-                for f in recent_flares
-            )
-            risk_percentage = (risk_sum / (total_flares * 3)) * 100
-        else:
-            strongest = None
-            risk_percentage = 0.0
-        
-        report = SpaceWeatherReport.objects.create(
-            total_flares=total_flares,
-            strongest_flare=strongest,
-            risk_percentage=risk_percentage
-        )
-        
-        return report
\ No newline at end of file
+        """توليد تقرير شامل (تدريجياً من التقرير السابق، انظر weather_api.reports)"""
+        return reports.generate_report(committed=self.high_water_mark)
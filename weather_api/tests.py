@@ -1,3 +1,1129 @@
-from django.test import TestCase
+import json
+from datetime import date, datetime, timedelta
+from decimal import Decimal
 
-# Create your tests here.
+import fcntl
+import gzip
+import hashlib
+import io
+import multiprocessing
+import os
+import pickle
+import tempfile
+import threading
+import time
+import zlib
+from unittest import mock
+
+import numpy as np
+from django.contrib.auth.models import User
+from django.core.handlers.asgi import ASGIHandler
+from django.http import HttpResponse, StreamingHttpResponse
+from django.core.cache import cache
+from django.db import OperationalError, connection, connections, transaction
+from django.core.management import call_command
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework import serializers
+from rest_framework.authtoken.models import Token
+from rest_framework.renderers import JSONRenderer
+
+from config import health, middleware, profiling, singleflight
+from config.caching import QueryCache, check_shared_cache, query_cache
+from config.impacts import FLARE_RISKS
+from config.query_plans import full_scans, temp_sorts
+from config.singleflight import single_flight
+from config.metrics import Counter, Histogram, Registry, check_metrics_token
+from config.middleware import CompressionMiddleware
+from config.timing import collect, timed
+from config.renderers import DataURI, FastJSONRenderer
+
+from solar_defender.services import NASAService as SolarNASAService
+
+from . import jobs, reports, scheduler, views
+from .models import ArchivedSolarFlare, IngestionJob, ScheduledRun, SchedulerLock, SolarFlare, SolarFlareHistory, SpaceWeatherReport, flares_since
+from .serializers import IngestionJobSerializer, SolarFlareFastSerializer, SolarFlareSerializer
+from .services import NASASpaceWeatherService
+from .views import get_category_color, get_risk_by_category, predict_impacts_with_flair
+
+
+class ImpactRegistryTests(TestCase):
+    def test_lookups_share_registry_entries(self):
+        service = NASASpaceWeatherService()
+
+        self.assertIs(service.calculate_impact('M2.1'), FLARE_RISKS['M'])
+        self.assertIs(service.calculate_impact(''), FLARE_RISKS['B'])
+        self.assertIs(predict_impacts_with_flair('X1.0'), predict_impacts_with_flair('X9.9'))
+        self.assertEqual(predict_impacts_with_flair('C1.0')['icon'], '📡')
+        self.assertEqual(get_category_color('M'), '#FF8C00')
+        self.assertEqual(get_risk_by_category('Z'), 'UNKNOWN')
+
+    def test_registry_entries_are_read_only(self):
+        entry = FLARE_RISKS['X']
+
+        with self.assertRaises(TypeError):
+            entry['risk'] = 'LOW'
+        with self.assertRaises(TypeError):
+            entry.update(color='#000000')
+        with self.assertRaises(AttributeError):
+            entry['effects'].append('None')
+
+        # يبقى dict عادي للكاش و JSON
+        self.assertEqual(pickle.loads(pickle.dumps(entry)), entry)
+        self.assertEqual(json.loads(FastJSONRenderer().render(entry))['risk'], 'EXTREME')
+
+    def test_saved_flares_store_effects_as_list(self):
+        service = NASASpaceWeatherService()
+
+        flare, = service.save_flares_to_db([{
+            'flareID': 'TEST-1',
+            'classType': 'X1.5',
+            'beginTime': '2024-01-01T00:00:00Z',
+        }])
+        flare.refresh_from_db()
+
+        self.assertEqual(flare.risk_level, 'EXTREME')
+        self.assertEqual(flare.impact_effects, ['Satellite damage', 'Global blackouts'])
+
+
+class FastSerializerTests(TestCase):
+    def setUp(self):
+        NASASpaceWeatherService().save_flares_to_db([
+            {
+                'flareID': f'FAST-{i}',
+                'classType': class_type,
+                'beginTime': (timezone.now() - timedelta(hours=i)).isoformat(),
+                'peakTime': (timezone.now() - timedelta(hours=i)).isoformat() if i % 2 else None,
+            }
+            for i, class_type in enumerate(['A1.0', 'C2.5', 'M1.0', 'X1.5', 'B7.2', 'C8.1'])
+        ])
+
+    def test_output_is_identical(self):
+        queryset = SolarFlare.objects.all()
+        self.assertEqual(
+            SolarFlareFastSerializer.many(queryset),
+            SolarFlareSerializer(queryset, many=True).data
+        )
+
+    def test_endpoints_are_identical(self):
+        for url in ['/api/flares/', '/api/flares/?class=c', '/api/flares/?page_size=2&page=2',
+                    '/api/flares/recent/?limit=3', '/api/flares/by_class/']:
+            fast = self.client.get(url)
+            with self.settings(FAST_LIST_SERIALIZERS=False):
+                slow = self.client.get(url)
+
+            self.assertEqual(fast.status_code, 200, url)
+            self.assertEqual(fast.json(), slow.json(), url)
+
+
+class FastJSONRendererTests(TestCase):
+    def test_matches_drf_json_renderer(self):
+        data = {
+            'when': timezone.now(),
+            'naive': datetime(2024, 1, 2, 3, 4, 5, 678901),
+            'day': date(2024, 1, 2),
+            'amount': Decimal('1.50'),
+            'numpy_scalar': np.float64(2.5),
+            'numpy_int': np.int64(7),
+            'numpy_array': np.linspace(0, 1, 3),
+            'lazy': gettext_lazy('Solar Flare'),
+            'text': 'انفجار شمسي 💥  ',
+            'nested': [{'a': 1, 2: 'int key'}, (1, 2)],
+        }
+
+        fast = FastJSONRenderer().render(data)
+        default = JSONRenderer().render(data)
+
+        self.assertEqual(json.loads(fast), json.loads(default))
+        self.assertIn(b'\\u2028', fast)
+
+    def test_indent_falls_back_to_default_renderer(self):
+        rendered = FastJSONRenderer().render({'a': 1}, 'application/json; indent=4')
+        self.assertEqual(rendered, b'{\n    "a": 1\n}')
+
+    def test_visualization_endpoint_renders(self):
+        NASASpaceWeatherService().save_flares_to_db(NASASpaceWeatherService().generate_sample_data())
+
+        response = self.client.get('/api/full-visualization-data/', HTTP_ACCEPT='application/json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['totalFlares'], 5)
+
+
+@override_settings(TIMING_SAMPLE_RATE=1.0)
+class ServerTimingTests(TestCase):
+    def sections(self, response):
+        return {metric.split(';')[0]: metric for metric in response['Server-Timing'].split(', ')}
+
+    def test_sections_in_header_and_log(self):
+        NASASpaceWeatherService().save_flares_to_db(NASASpaceWeatherService().generate_sample_data())
+
+        with self.assertLogs('config.timing', 'INFO') as logs:
+            response = self.client.get('/api/flares/')
+
+        sections = self.sections(response)
+        self.assertEqual(set(sections), {'db', 'serialize', 'render', 'total'})
+        self.assertRegex(sections['db'], r'db;dur=[\d.]+;desc="\d+ queries"')
+
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['view'], 'flare-list')
+        self.assertEqual(record['status'], 200)
+        self.assertGreater(record['sections']['db']['count'], 0)
+
+    def test_nasa_http_time(self):
+        nasa_response = mock.Mock(status_code=200, json=lambda: [])
+        with mock.patch('solar_defender.services.requests.get', return_value=nasa_response), \
+                collect() as timings:
+            SolarNASAService().fetch_and_save_flares()
+
+        self.assertIn('nasa', timings.as_dict())
+
+    @override_settings(TIMING_SAMPLE_RATE=0)
+    def test_unsampled_requests_need_permission_to_force(self):
+        self.assertFalse(self.client.get('/api/health/').has_header('Server-Timing'))
+        self.assertFalse(self.client.get('/api/health/', HTTP_X_SERVER_TIMING='1').has_header('Server-Timing'))
+
+        with override_settings(DEBUG=True):
+            response = self.client.get('/api/health/', HTTP_X_SERVER_TIMING='1')
+        self.assertTrue(response.has_header('Server-Timing'))
+
+    @override_settings(TIMING_SAMPLE_RATE=0)
+    def test_force_permission_checked_before_collecting(self):
+        with mock.patch.object(middleware.timing, 'collect', side_effect=AssertionError('timings collected')):
+            self.assertEqual(self.client.get('/api/health/', HTTP_X_SERVER_TIMING='1').status_code, 200)
+
+        # staff عبر الـ session أو Token (قبل AuthenticationMiddleware)
+        staff = User.objects.create_user('ops', is_staff=True)
+        token = Token.objects.create(user=staff)
+        response = self.client.get('/api/health/', HTTP_X_SERVER_TIMING='1', HTTP_AUTHORIZATION=f'Token {token.key}')
+        self.assertTrue(response.has_header('Server-Timing'))
+        self.client.force_login(staff)
+        self.assertTrue(self.client.get('/api/health/', HTTP_X_SERVER_TIMING='1').has_header('Server-Timing'))
+
+    def test_only_read_serializers_are_timed(self):
+        class ThirdPartySerializer(serializers.Serializer):
+            name = serializers.CharField()
+
+        flares = [SolarFlare(flare_id='T-1', class_type='C1.0', flare_class='C', intensity=1.0, begin_time=timezone.now())]
+        with collect() as timings:
+            ThirdPartySerializer({'name': 'x'}).data
+            IngestionJobSerializer(IngestionJob(source='weather_api')).data
+        self.assertNotIn('serialize', timings.as_dict())
+
+        with collect() as timings:
+            SolarFlareSerializer(flares, many=True).data
+            SolarFlareSerializer(flares[0]).data
+        self.assertEqual(timings.as_dict()['serialize']['count'], 2)
+
+    def test_nested_sections_counted_once(self):
+        with collect() as timings:
+            with timed('serialize'):
+                with timed('serialize'):
+                    list(SolarFlare.objects.all())
+
+        self.assertEqual(timings.as_dict()['serialize']['count'], 1)
+        self.assertEqual(timings.as_dict()['db']['count'], 1)
+
+        # خارج collect() لا شيء يُسجَّل
+        with timed('serialize'):
+            pass
+        self.assertEqual(timings.as_dict()['serialize']['count'], 1)
+
+
+def _metrics_worker(registry, requests, directory):
+    with override_settings(METRICS_DIR=directory):
+        registry.metrics['test_requests_total'].inc(requests, route='flare-list')
+        registry.metrics['test_latency_seconds'].observe(0.02)
+        registry.flush()
+
+
+class MetricsTests(TestCase):
+    @override_settings(METRICS_TOKEN='scraper')
+    def scrape(self):
+        return self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer scraper').content.decode()
+
+    def test_route_latency_exposed(self):
+        self.client.get('/api/flares/')
+        body = self.scrape()
+
+        self.assertIn('# TYPE http_request_duration_seconds histogram', body)
+        self.assertRegex(body, r'http_request_duration_seconds_count\{route="flare-list",method="GET"\} [1-9]')
+        self.assertRegex(body, r'http_requests_total\{route="flare-list",method="GET",status="200"\} [1-9]')
+
+    def test_nasa_errors_and_ingestion_counted(self):
+        with mock.patch('weather_api.services.requests.get', side_effect=ConnectionError), \
+                self.assertLogs('weather_api.services', 'ERROR'):
+            jobs.run_job(jobs.enqueue()[0].pk)
+        body = self.scrape()
+
+        self.assertRegex(body, r'nasa_fetch_errors_total\{service="weather_api",reason="ConnectionError"\} [1-9]')
+        # البيانات التجريبية البديلة (5 توهجات) تُحسب كصفوف مستوردة
+        self.assertRegex(body, r'ingestion_rows_total\{source="weather_api"\} [1-9]')
+        self.assertIn('ingestion_duration_seconds_count{source="weather_api"}', body)
+
+    def test_workers_aggregate_through_directory(self):
+        directory = tempfile.mkdtemp()
+        registry = Registry()
+        Counter('test_requests_total', 'Requests', ['route'], registry=registry)
+        Histogram('test_latency_seconds', 'Latency', buckets=(0.01, 0.1), registry=registry)
+
+        context = multiprocessing.get_context('fork')
+        processes = [context.Process(target=_metrics_worker, args=(registry, n, directory)) for n in (2, 3)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join(10)
+
+        with override_settings(METRICS_DIR=directory):
+            registry.metrics['test_requests_total'].inc(route='flare-list')
+            body = registry.exposition()
+
+        self.assertIn('test_requests_total{route="flare-list"} 6', body)
+        self.assertIn('test_latency_seconds_bucket{le="0.1"} 2', body)
+        self.assertIn('test_latency_seconds_count 2', body)
+
+        # عملية جديدة بنفس pid تكمل من ملفها
+        with override_settings(METRICS_DIR=directory):
+            registry.reset_after_fork()
+            registry.flush()
+            body = registry.exposition()
+        self.assertIn('test_requests_total{route="flare-list"} 6', body)
+
+    @override_settings(METRICS_FLUSH_INTERVAL=0.01)
+    def test_updates_written_without_requests(self):
+        directory = tempfile.mkdtemp()
+        registry = Registry()
+        counter = Counter('test_jobs_total', 'Jobs', registry=registry)
+
+        with override_settings(METRICS_DIR=directory):
+            # مثل ingestion_worker: لا طلبات HTTP ولا flush صريح
+            counter.inc(3)
+            path = registry.path(directory)
+            for _ in range(200):
+                if os.path.exists(path):
+                    break
+                time.sleep(0.01)
+            with open(path) as handle:
+                self.assertEqual(json.load(handle)['test_jobs_total']['values'], [[[], 3]])
+
+            # آخر تحديث قبل الخروج
+            counter.inc()
+            registry.flush_at_exit()
+            with open(path) as handle:
+                self.assertEqual(json.load(handle)['test_jobs_total']['values'], [[[], 4]])
+
+    def test_scrape_restricted(self):
+        self.assertEqual(self.client.get('/metrics', REMOTE_ADDR='203.0.113.7').status_code, 403)
+
+        with override_settings(METRICS_ALLOWED_IPS=['10.0.0.0/8'], DEBUG=True):
+            self.assertEqual(self.client.get('/metrics', REMOTE_ADDR='10.1.2.3').status_code, 200)
+
+        # بدون token في الإنتاج: ولا حتى localhost (قد يكون reverse proxy)
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+        self.assertEqual([error.id for error in check_metrics_token(None)], ['config.E002'])
+
+        with override_settings(METRICS_TOKEN='s3cret'):
+            self.assertEqual(self.client.get('/metrics').status_code, 403)
+            response = self.client.get('/metrics', REMOTE_ADDR='203.0.113.7', HTTP_AUTHORIZATION='Bearer s3cret')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(check_metrics_token(None), [])
+
+
+class AsgiMiddlewareTests(TestCase):
+    @override_settings(DEBUG=True)
+    def test_asgi_middleware_chain_stays_async(self):
+        # أي middleware متزامنة تجعل Django يسجل "Synchronous handler adapted"
+        with self.assertNoLogs('django.request', 'DEBUG'):
+            ASGIHandler()
+
+    def test_middleware_must_define_both_paths(self):
+        class SyncOnly(middleware.SyncAsyncMiddleware):
+            def handle(self, request):
+                return self.get_response(request)
+
+        with self.assertRaises(TypeError):
+            SyncOnly(lambda request: HttpResponse())
+
+
+@override_settings(INGESTION_EXECUTOR='worker')
+class IngestionJobTests(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_user('ops', is_staff=True))
+
+    def nasa(self, records=()):
+        return mock.patch(
+            'weather_api.services.requests.get', return_value=mock.Mock(status_code=200, json=lambda: list(records))
+        )
+
+    def test_in_flight_jobs_deduplicated(self):
+        with self.nasa() as nasa_get:
+            first = self.client.post('/api/ingestion-jobs/', {'source': 'weather_api'}, content_type='application/json')
+            second = self.client.post('/api/fetch-nasa-data/')
+            other = self.client.post('/api/fetch-nasa-data/', {'start_date': '2026-01-01'})
+
+        nasa_get.assert_not_called()
+        self.assertEqual((first.status_code, second.status_code), (202, 202))
+        self.assertEqual(first.json()['id'], second.json()['id'])
+        self.assertEqual((first.json()['deduplicated'], second.json()['deduplicated']), (False, True))
+        self.assertNotEqual(other.json()['id'], first.json()['id'])
+        self.assertEqual(first['Location'], f'/api/ingestion-jobs/{first.json()["id"]}/')
+
+    def test_worker_runs_job_and_reports_status(self):
+        records = [{'flareID': 'JOB-1', 'classType': 'M2.0', 'beginTime': timezone.now().isoformat()}]
+        job_url = self.client.post('/api/ingestion-jobs/', {}, content_type='application/json').json()['status_url']
+
+        with self.nasa(records):
+            call_command('ingestion_worker', '--once', stdout=io.StringIO())
+
+        job = self.client.get(job_url).json()
+        self.assertEqual((job['status'], job['attempts'], job['result']['flares_count']), ('succeeded', 1, 1))
+        # تقرير المهمة يحسب ما جلبته للتو (رغم REPORT_WATERMARK_LAG الافتراضي)
+        report = SpaceWeatherReport.objects.get(pk=job['result']['report_id'])
+        self.assertEqual((report.total_flares, report.strongest_flare.flare_id), (1, 'JOB-1'))
+
+        # مهمة منتهية لا تُدمج مع مهمة جديدة، لكن الجديدة تنتظر INGESTION_MIN_INTERVAL
+        again = self.client.post('/api/ingestion-jobs/', {}, content_type='application/json')
+        self.assertEqual(again.status_code, 429)
+        self.assertGreater(int(again['Retry-After']), 0)
+        self.assertEqual(self.client.post('/api_game/flares/fetch_nasa_data/').status_code, 202)
+
+        with override_settings(INGESTION_MIN_INTERVAL=0):
+            again = self.client.post('/api/ingestion-jobs/', {}, content_type='application/json').json()
+        self.assertFalse(again['deduplicated'])
+
+    def test_ingestion_is_staff_only_and_post_only(self):
+        self.assertEqual(self.client.get('/api/fetch-nasa-data/').status_code, 405)
+        self.assertEqual(self.client.get('/api_game/flares/fetch_nasa_data/').status_code, 405)
+
+        job, _ = jobs.enqueue()
+        self.client.logout()
+        player = User.objects.create_user('player')
+        for client_user, denied in ((None, 401), (player, 403)):
+            if client_user:
+                self.client.force_login(client_user)
+            self.assertEqual(self.client.post('/api/fetch-nasa-data/').status_code, denied)
+            self.assertEqual(self.client.post('/api_game/flares/fetch_nasa_data/').status_code, denied)
+            self.assertEqual(self.client.post('/api/ingestion-jobs/', {}).status_code, denied)
+            self.assertEqual(self.client.get('/api/ingestion-jobs/').status_code, denied)
+            self.assertEqual(self.client.get(f'/api/ingestion-jobs/{job.pk}/').status_code, denied)
+        self.assertEqual(IngestionJob.objects.count(), 1)
+
+    def test_job_claimed_once_and_failures_recorded(self):
+        job, _ = jobs.enqueue('solar_defender')
+        with mock.patch.dict(jobs.INGESTERS, solar_defender=mock.Mock(side_effect=RuntimeError('boom'))), \
+                self.assertLogs('weather_api.jobs', 'ERROR'):
+            self.assertIsNotNone(jobs.run_job(job.pk))
+            self.assertIsNone(jobs.run_job(job.pk))
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.error, job.attempts), ('failed', 'RuntimeError: boom', 1))
+
+    def test_stale_jobs_expire(self):
+        job, _ = jobs.enqueue()
+        IngestionJob.objects.filter(pk=job.pk).update(created_at=timezone.now() - timedelta(hours=1))
+
+        new_job, created = jobs.enqueue()
+
+        self.assertTrue(created)
+        self.assertEqual(IngestionJob.objects.get(pk=job.pk).error, 'timed out')
+
+    def test_finished_jobs_pruned(self):
+        old, _ = jobs.enqueue('solar_defender')
+        jobs.finish(old, IngestionJob.FAILED, error='x')
+        IngestionJob.objects.filter(pk=old.pk).update(finished_at=timezone.now() - timedelta(days=31))
+        queued, _ = jobs.enqueue('solar_defender')
+
+        with self.nasa():
+            job = jobs.run_job(jobs.enqueue()[0].pk)
+
+        self.assertTrue(job.nasa_ok)
+        self.assertEqual(set(IngestionJob.objects.values_list('pk', flat=True)), {queued.pk, job.pk})
+
+    @override_settings(INGESTION_EXECUTOR='thread')
+    def test_thread_executor_dispatches_after_commit(self):
+        with mock.patch.object(jobs.executor(), 'submit') as submit:
+            with self.captureOnCommitCallbacks(execute=True):
+                job, _ = jobs.enqueue()
+                submit.assert_not_called()
+
+        submit.assert_called_once_with(jobs._run_in_pool, job.pk)
+
+    def test_invalid_range_rejected(self):
+        response = self.client.post('/api/fetch-nasa-data/', {'start_date': '2026-02-01', 'end_date': '2026-01-01'})
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(SCHEDULER_TASKS={'report': {'interval': 60, 'jitter': 30}, 'broken': {'interval': 60}})
+class SchedulerTests(TestCase):
+    def setUp(self):
+        tasks = mock.patch.dict(scheduler.TASKS, report=lambda: {'ok': True}, broken=mock.Mock(side_effect=ValueError('x')))
+        tasks.start()
+        self.addCleanup(tasks.stop)
+
+    def test_due_tasks_run_once_per_interval(self):
+        with self.assertLogs('weather_api.scheduler', 'ERROR'):
+            runs = scheduler.Scheduler('node-a').run_due()
+
+        self.assertEqual({run.task: run.status for run in runs}, {'report': 'succeeded', 'broken': 'failed'})
+        self.assertEqual(ScheduledRun.objects.get(task='report').result, {'ok': True})
+        self.assertEqual(ScheduledRun.objects.get(task='broken').error, 'ValueError: x')
+        self.assertFalse(SchedulerLock.objects.exists())
+
+        # node آخر يرى نفس السجل فلا يكرر التشغيل
+        self.assertEqual(scheduler.Scheduler('node-b').run_due(), [])
+
+    def test_next_run_after_interval_plus_jitter(self):
+        node = scheduler.Scheduler('node-a', seed=1)
+        run = node.run('report')
+        due = node.next_due('report', {'interval': 60, 'jitter': 30})
+
+        self.assertLessEqual(run.started_at + timedelta(seconds=60), due)
+        self.assertLessEqual(due, run.started_at + timedelta(seconds=90))
+
+        ScheduledRun.objects.update(started_at=timezone.now() - timedelta(seconds=91))
+        with override_settings(SCHEDULER_TASKS={'report': {'interval': 60, 'jitter': 30}}):
+            self.assertEqual([run.task for run in node.run_due()], ['report'])
+
+    def test_lock_prevents_overlap_until_expired(self):
+        self.assertTrue(scheduler.acquire('report', 'node-a', timeout=60))
+        self.assertFalse(scheduler.acquire('report', 'node-b', timeout=60))
+        self.assertIsNone(scheduler.Scheduler('node-b').run('report', force=True))
+
+        SchedulerLock.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(scheduler.Scheduler('node-b').run('report', force=True).status, 'succeeded')
+        self.assertFalse(SchedulerLock.objects.exists())
+
+    def test_command_runs_single_task(self):
+        out = io.StringIO()
+        call_command('run_scheduler', '--task', 'report', stdout=out)
+        call_command('run_scheduler', '--list', stdout=out)
+
+        self.assertIn("report finished", out.getvalue())
+        self.assertIn('broken               every 60s', out.getvalue())
+
+    @override_settings(SCHEDULER_TASKS=scheduler.DEFAULT_SCHEDULE, INGESTION_EXECUTOR='worker')
+    def test_builtin_tasks(self):
+        with mock.patch.dict(scheduler.TASKS, {name: getattr(scheduler, name) for name in scheduler.DEFAULT_SCHEDULE}):
+            runs = scheduler.Scheduler('node-a').run_due()
+
+        results = {run.task: run.result for run in runs}
+        self.assertEqual(set(results['ingest_nasa']), {'weather_api', 'solar_defender'})
+        self.assertEqual(IngestionJob.objects.filter(status='queued').count(), 2)
+        self.assertEqual(results['update_leaderboard'], {'entries': 0})
+        self.assertTrue(SpaceWeatherReport.objects.filter(pk=results['generate_report']['report_id']).exists())
+
+
+class HealthProbeTests(TestCase):
+    def test_liveness_does_no_io(self):
+        with self.assertNumQueries(0), mock.patch.object(health, 'cache') as health_cache:
+            response = self.client.get('/api/health/live/')
+        self.assertEqual(response.json(), {'status': 'alive'})
+        self.assertEqual(health_cache.method_calls, [])
+
+    def test_readiness(self):
+        response = self.client.get('/api/health/ready/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['ingestion_age_seconds'], None)
+
+        with override_settings(READINESS_MAX_INGESTION_AGE=600):
+            self.assertEqual(self.client.get('/api/health/ready/').status_code, 503)
+
+            # مهمة نجحت بالبيانات التجريبية (NASA لم ترد) لا تُحسب
+            nasa = mock.Mock(status_code=503)
+            with mock.patch('weather_api.services.requests.get', return_value=nasa):
+                jobs.run_job(jobs.enqueue('weather_api')[0].pk)
+            self.assertEqual(self.client.get('/api/health/ready/').status_code, 503)
+
+            # آخر جلب ناجح من القاعدة (مثلاً من عملية ingestion_worker) وليس من cache العملية
+            nasa = mock.Mock(status_code=200, json=lambda: [])
+            with mock.patch('solar_defender.services.requests.get', return_value=nasa):
+                jobs.run_job(jobs.enqueue('solar_defender')[0].pk)
+            cache.clear()
+            self.assertEqual(self.client.get('/api/health/ready/').json()['ingestion_fresh'], True)
+
+        with mock.patch.object(connection, 'cursor', side_effect=OperationalError):
+            response = self.client.get('/api/health/ready/')
+        self.assertEqual(response.status_code, 503)
+        self.assertFalse(response.json()['database'])
+
+    def test_detailed_status_counts_are_cached_until_write(self):
+        NASASpaceWeatherService().save_flares_to_db(NASASpaceWeatherService().generate_sample_data())
+        self.assertEqual(self.client.get('/api/health/').json()['total_flares'], 5)
+
+        # استعلام واحد فقط: عمر آخر جلب (jobs.ingestion_age)، بدون COUNT(*)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get('/api/health/').json()['total_flares'], 5)
+
+        SolarFlare.objects.filter(flare_class='X').delete()
+        self.assertEqual(self.client.get('/api/health/').json()['total_flares'], 4)
+
+
+class ProfilingTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        settings_override = override_settings(PROFILER_DIR=self.directory, PROFILER_INTERVAL_MS=1)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def slow_view(self, request):
+        deadline = time.perf_counter() + 0.05
+        while time.perf_counter() < deadline:
+            sum(range(1000))
+        return HttpResponse('ok')
+
+    @override_settings(PROFILER_SLOW_MS=20)
+    def test_slow_request_sampled_with_top_functions(self):
+        profiling.sampler().interval = 0.001
+        response = middleware.ProfilingMiddleware(self.slow_view)(RequestFactory().get('/api/report/'))
+
+        [entry] = profiling.read_index(self.directory)
+        self.assertEqual(response['X-Profile-Id'], entry['id'])
+        self.assertEqual((entry['mode'], entry['path'], entry['forced']), ('sample', '/api/report/', False))
+        self.assertGreaterEqual(entry['duration_ms'], 50)
+        self.assertTrue(entry['top'])
+
+        with open(os.path.join(self.directory, entry['files'][0])) as f:
+            stacks = f.read().splitlines()
+        self.assertTrue(any('slow_view' in line for line in stacks))
+        self.assertRegex(stacks[0], r'^\S+ \d+$')
+
+    def test_fast_requests_not_stored(self):
+        response = self.client.get('/api/health/live/')
+
+        self.assertFalse(response.has_header('X-Profile-Id'))
+        self.assertEqual(profiling.read_index(self.directory), [])
+
+    @override_settings(PROFILER_ENABLED=False)
+    def test_forced_cprofile_needs_permission(self):
+        # بدون صلاحية لا يعمل cProfile أصلاً (وليس فقط لا يُحفظ)
+        with mock.patch.object(profiling, 'cprofiled', side_effect=AssertionError('cProfile enabled')):
+            self.assertFalse(self.client.get('/api/health/', HTTP_X_PROFILE='cprofile').has_header('X-Profile-Id'))
+
+        with override_settings(DEBUG=True):
+            response = self.client.get('/api/health/', HTTP_X_PROFILE='cprofile')
+
+        [entry] = profiling.read_index(self.directory)
+        self.assertEqual(response['X-Profile-Id'], entry['id'])
+        self.assertEqual((entry['mode'], entry['view'], entry['forced']), ('cprofile', 'health-check', True))
+        self.assertEqual([name.rsplit('.', 1)[1] for name in entry['files']], ['folded', 'prof'])
+        self.assertTrue(os.path.exists(os.path.join(self.directory, entry['files'][1])))
+
+    @override_settings(PROFILER_ENABLED=False)
+    def test_staff_may_force_profile(self):
+        self.client.force_login(User.objects.create_user('ops', is_staff=True))
+
+        response = self.client.get('/api/health/', HTTP_X_PROFILE='sample')
+
+        self.assertTrue(response.has_header('X-Profile-Id'))
+
+    @override_settings(PROFILER_MAX_PROFILES=2)
+    def test_oldest_profiles_pruned(self):
+        meta = {'method': 'GET', 'path': '/api/flares/', 'view': 'flare-list', 'mode': 'sample', 'top': [('b', 1)]}
+        ids = [profiling.store(dict(meta, duration_ms=1000 + i), {'a;b': i + 1}) for i in range(3)]
+
+        self.assertEqual([entry['id'] for entry in profiling.read_index(self.directory)], ids[:0:-1])
+        self.assertEqual(len(os.listdir(self.directory)), 4)  # ملفان + index.json + index.lock
+
+        out = io.StringIO()
+        call_command('profiles', stdout=out)
+        self.assertIn(ids[2], out.getvalue())
+
+
+class CompressionMiddlewareTests(TestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.body = json.dumps([{'flare_class': 'X', 'intensity': i} for i in range(200)]).encode()
+
+    def process(self, response, accept='gzip, deflate, br, zstd'):
+        request = self.factory.get('/', HTTP_ACCEPT_ENCODING=accept)
+        return CompressionMiddleware(lambda r: response)(request)
+
+    def test_negotiates_best_available_codec(self):
+        NASASpaceWeatherService().save_flares_to_db(NASASpaceWeatherService().generate_sample_data())
+
+        response = self.client.get('/api/full-visualization-data/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(json.loads(gzip.decompress(response.content))['totalFlares'], 5)
+
+        response = self.client.get('/api/full-visualization-data/', HTTP_ACCEPT_ENCODING='gzip, br, zstd')
+        expected = 'zstd' if 'zstd' in middleware.CODECS else 'br' if 'br' in middleware.CODECS else 'gzip'
+        self.assertEqual(response['Content-Encoding'], expected)
+
+    def test_identity_when_not_accepted(self):
+        response = self.process(HttpResponse(self.body, content_type='application/json'), accept='gzip;q=0, identity')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(response.content, self.body)
+
+    def test_small_responses_are_not_compressed(self):
+        response = self.process(HttpResponse(b'{"status": "ok"}'))
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_html_is_not_compressed(self):
+        # BREACH: صفحات فيها CSRF token
+        response = self.process(HttpResponse(self.body, content_type='text/html; charset=utf-8'))
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(response.content, self.body)
+
+    def test_png_is_not_recompressed(self):
+        response = self.process(HttpResponse(self.body, content_type='image/png'))
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(response.content, self.body)
+
+    def test_streaming_response_is_compressed(self):
+        chunks = [self.body[i:i + 512] for i in range(0, len(self.body), 512)]
+        response = self.process(StreamingHttpResponse(iter(chunks), content_type='application/json'), accept='gzip')
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertFalse(response.has_header('Content-Length'))
+        self.assertEqual(zlib.decompress(b''.join(response.streaming_content), 31), self.body)
+
+    def test_strong_etag_is_weakened(self):
+        original = HttpResponse(self.body, content_type='application/json')
+        original['ETag'] = '"abc"'
+        response = self.process(original, accept='gzip')
+        self.assertEqual(response['ETag'], 'W/"abc"')
+
+    @override_settings(COMPRESSION_CPU_BUDGET=0.001)
+    def test_exhausted_cpu_budget_sends_identity(self):
+        handler = CompressionMiddleware(lambda r: HttpResponse(self.body, content_type='application/json'))
+        handler.budget.spend(10)
+
+        response = handler(self.factory.get('/', HTTP_ACCEPT_ENCODING='gzip'))
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(response.content, self.body)
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        self.service = NASASpaceWeatherService()
+        self.service.save_flares_to_db(self.service.generate_sample_data())
+        self.service.generate_report()
+
+    def test_not_modified_skips_view(self):
+        for url in ['/api/dashboard-summary/', '/api/statistics/?days=30', '/api/reports/latest/']:
+            first = self.client.get(url)
+            self.assertEqual(first.status_code, 200, url)
+
+            with mock.patch.object(views, 'SpaceWeatherReportSerializer', side_effect=AssertionError), \
+                    mock.patch.object(views, 'SolarFlareStatsSerializer', side_effect=AssertionError):
+                second = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+            self.assertEqual(second.status_code, 304, url)
+
+    def test_etag_depends_on_params_and_format(self):
+        etags = {
+            self.client.get('/api/statistics/?days=30')['ETag'],
+            self.client.get('/api/statistics/?days=7')['ETag'],
+            self.client.get('/api/statistics/?days=30', HTTP_ACCEPT='application/msgpack')['ETag'],
+        }
+        self.assertEqual(len(etags), 3)
+
+    def test_new_data_changes_etag(self):
+        etag = self.client.get('/api/dashboard-summary/')['ETag']
+        flare = SolarFlare.objects.filter(flare_class='X').first()
+        flare.risk_level = 'LOW'
+        flare.save()
+
+        response = self.client.get('/api/dashboard-summary/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_latest_report_last_modified(self):
+        first = self.client.get('/api/reports/latest/')
+        self.assertTrue(first.has_header('Last-Modified'))
+
+        response = self.client.get('/api/reports/latest/', HTTP_IF_MODIFIED_SINCE=first['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+
+
+class QueryCacheTests(TestCase):
+    def setUp(self):
+        query_cache.clear()
+        self.service = NASASpaceWeatherService()
+        self.service.save_flares_to_db(self.service.generate_sample_data())
+
+    def test_repeated_reads_hit_cache(self):
+        first = self.client.get('/api/full-visualization-data/?days=30')
+
+        with CaptureQueriesContext(connection) as queries:
+            second = self.client.get('/api/full-visualization-data/')
+        self.assertEqual(len(queries), 0)
+        self.assertEqual(second.json(), first.json())
+
+    def test_save_and_delete_invalidate(self):
+        self.assertEqual(self.client.get('/api/statistics/').json()['total_flares'], 5)
+
+        flare = SolarFlare.objects.get(flare_class='X')
+        flare.flare_class = 'M'
+        flare.save()
+        self.assertEqual(self.client.get('/api/statistics/').json()['flares_by_class']['X'], 0)
+
+        flare.delete()
+        self.assertEqual(self.client.get('/api/statistics/').json()['total_flares'], 4)
+
+    def test_dashboard_invalidated_by_new_report(self):
+        self.assertIsNone(self.client.get('/api/dashboard-summary/').json()['latest_report'])
+        self.service.generate_report()
+        self.assertIsNotNone(self.client.get('/api/dashboard-summary/').json()['latest_report'])
+
+    def test_lru_and_ttl_eviction(self):
+        lru = QueryCache(max_entries=2, ttl=60)
+        lru.set('a', 1)
+        lru.set('b', 2)
+        lru.get('a')
+        lru.set('c', 3)
+        self.assertEqual((lru.get('a'), lru.get('b'), lru.get('c')), (1, None, 3))
+
+        expired = QueryCache(ttl=-1)
+        expired.set('a', 1)
+        self.assertIsNone(expired.get('a'))
+
+    def test_deploy_check_requires_shared_cache(self):
+        self.assertEqual([error.id for error in check_shared_cache(None)], ['config.E001'])
+
+        with override_settings(CACHE_SINGLE_PROCESS=True):
+            self.assertEqual(check_shared_cache(None), [])
+        shared = {'default': {'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'cache'}}
+        with override_settings(CACHES=shared):
+            self.assertEqual(check_shared_cache(None), [])
+
+
+def _count_and_return(log_path, value):
+    with open(log_path, 'a') as f:
+        f.write('call\n')
+    time.sleep(0.3)
+    return value
+
+
+def _single_flight_worker(key, log_path, directory, results):
+    with override_settings(SINGLEFLIGHT_DIR=directory):
+        results.put(single_flight(key, lambda: _count_and_return(log_path, {'pid': os.getpid()})))
+
+
+class SingleFlightTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.log_path = os.path.join(self.directory, 'calls.log')
+
+    def calls(self):
+        with open(self.log_path) as f:
+            return len(f.readlines())
+
+    def test_concurrent_threads_share_one_call(self):
+        results = []
+        key = ('threads', time.time_ns())
+
+        def worker():
+            results.append(single_flight(key, lambda: _count_and_return(self.log_path, object())))
+
+        with self.settings(SINGLEFLIGHT_DIR=self.directory):
+            threads = [threading.Thread(target=worker) for _ in range(5)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(self.calls(), 1)
+        self.assertEqual(len({id(result) for result in results}), 1)
+
+    def test_concurrent_processes_share_one_call(self):
+        context = multiprocessing.get_context('fork')
+        results = context.Queue()
+        key = ('processes', time.time_ns())
+        processes = [
+            context.Process(target=_single_flight_worker, args=(key, self.log_path, self.directory, results))
+            for _ in range(3)
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join(10)
+
+        self.assertEqual(self.calls(), 1)
+        self.assertEqual(len({results.get(timeout=1)['pid'] for _ in processes}), 1)
+
+    def test_results_shared_as_json(self):
+        chart = DataURI(b'\x89PNG', 'image/png')
+        digest = hashlib.sha1(repr('json').encode()).hexdigest()
+        results = []
+
+        with self.settings(SINGLEFLIGHT_DIR=self.directory):
+            # عملية أخرى (الـ leader) تمسك القفل وتحسب، ونحن ننتظر
+            with open(os.path.join(self.directory, f'{digest}.lock'), 'a+b') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                waiter = threading.Thread(target=lambda: results.append(single_flight('json', lambda: 'computed')))
+                waiter.start()
+                time.sleep(0.1)
+                singleflight._write_result(
+                    os.path.join(self.directory, f'{digest}.json'), (200, {'chart': chart, 'sizes': [1, 2]})
+                )
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+            waiter.join(5)
+
+            # بعد انتهاء الحساب: ليست cache، الطلب التالي يحسب من جديد
+            self.assertEqual(single_flight('json', lambda: 'fresh'), 'fresh')
+
+        status_code, data = results[0]
+        self.assertEqual((status_code, data), (200, {'chart': chart, 'sizes': [1, 2]}))
+        self.assertEqual(data['chart'].data, b'\x89PNG')
+        self.assertFalse([name for name in os.listdir(self.directory) if name.endswith('.pickle')])
+
+    def test_only_shareable_results_written(self):
+        with self.settings(SINGLEFLIGHT_DIR=self.directory):
+            single_flight('rejected', lambda: (400, {'error': 'x'}), share=singleflight.successful)
+            single_flight('accepted', lambda: (200, {}), share=singleflight.successful)
+
+        self.assertEqual(len([name for name in os.listdir(self.directory) if name.endswith('.json')]), 1)
+
+    def test_shared_directory_must_be_private(self):
+        os.chmod(self.directory, 0o777)
+        self.addCleanup(os.chmod, self.directory, 0o700)
+
+        with self.settings(SINGLEFLIGHT_DIR=self.directory), self.assertLogs('config.singleflight', 'WARNING'):
+            self.assertEqual(single_flight('public', lambda: 'ok'), 'ok')
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_errors_are_not_cached(self):
+        def fail():
+            raise RuntimeError('boom')
+
+        with self.settings(SINGLEFLIGHT_DIR=self.directory):
+            with self.assertRaises(RuntimeError):
+                single_flight('errors', fail)
+            self.assertEqual(single_flight('errors', lambda: 'ok'), 'ok')
+
+
+class QueryPlanTests(TestCase):
+    """الاستعلامات الساخنة يجب أن تستخدم index وليس مسحاً كاملاً للجدول"""
+
+    def test_hot_queries_use_indexes(self):
+        week_ago = timezone.now() - timedelta(days=7)
+        window = SolarFlare.objects.filter(begin_time__gte=week_ago)
+        queries = {
+            'flare_id lookup': SolarFlare.objects.filter(flare_id='2024-01-01T00:00:00-FLR-001'),
+            'window': window,
+            'window by class': window.filter(flare_class='X'),
+            'window by risk': window.filter(risk_level='HIGH'),
+            'window high risk': window.filter(flare_class__in=['M', 'X']),
+            'window text risk': window.filter(risk_level__icontains='LOW'),
+            'window strongest': window.order_by('-intensity')[:1],
+            'window timeline': window.order_by('begin_time')[:20],
+            'latest report': SpaceWeatherReport.objects.all()[:1],
+            'history window by class': SolarFlareHistory.objects.filter(
+                begin_time__gte=week_ago, flare_class='X'
+            ),
+            'newest archived': ArchivedSolarFlare.objects.order_by('-begin_time')[:1],
+            'ingestion freshness': IngestionJob.objects.filter(
+                status='succeeded', source__in=views.INGESTION_SOURCES, nasa_ok=True
+            ).order_by('-finished_at')[:1],
+        }
+        for name, queryset in queries.items():
+            self.assertEqual(full_scans(queryset), [], name)
+
+    def test_ordered_lists_use_index_order(self):
+        queries = {
+            'recent': SolarFlare.objects.order_by('-begin_time')[:10],
+            'window recent': SolarFlare.objects.filter(
+                begin_time__gte=timezone.now() - timedelta(days=30)
+            ).order_by('-begin_time')[:50],
+            'by class': SolarFlare.objects.filter(flare_class='M').order_by('-begin_time')[:5],
+            'strongest overall': SolarFlare.objects.order_by('-intensity')[:1],
+            'latest report': SpaceWeatherReport.objects.all()[:1],
+        }
+        for name, queryset in queries.items():
+            self.assertEqual(full_scans(queryset), [], name)
+            self.assertEqual(temp_sorts(queryset), [], name)
+
+
+class SQLiteTuningTests(TestCase):
+    def test_pragmas_applied_on_new_connections(self):
+        alias = 'pragma-test'
+        connections.settings[alias] = {
+            **connection.settings_dict,
+            'NAME': os.path.join(tempfile.mkdtemp(), 'tuned.sqlite3'),
+            'PRAGMAS': {'journal_mode': 'wal', 'synchronous': 'normal', 'busy_timeout': 1234},
+            'TRANSACTION_MODE': 'IMMEDIATE',
+        }
+        try:
+            with connections[alias].cursor() as cursor:
+                values = [
+                    cursor.execute(f'PRAGMA {name}').fetchone()[0]
+                    for name in ['journal_mode', 'synchronous', 'busy_timeout']
+                ]
+            self.assertEqual(values, ['wal', 1, 1234])
+
+            with CaptureQueriesContext(connections[alias]) as queries:
+                with transaction.atomic(using=alias):
+                    pass
+            self.assertEqual(queries[0]['sql'], 'BEGIN IMMEDIATE')
+        finally:
+            connections[alias].close()
+            del connections.settings[alias]
+
+
+class FlareArchiveTests(TestCase):
+    def setUp(self):
+        query_cache.clear()
+        for i, days_ago in enumerate([1, 3, 200, 400]):
+            SolarFlare.objects.create(
+                flare_id=f'ARCHIVE-{i}', class_type='M2.0', flare_class='M', intensity=2.0,
+                begin_time=timezone.now() - timedelta(days=days_ago),
+                risk_level='HIGH', risk_color='#FF8C00', impact_effects=['Radio blackouts'],
+            )
+        SpaceWeatherReport.objects.create(strongest_flare=SolarFlare.objects.get(flare_id='ARCHIVE-3'))
+        call_command('archive_flares', stdout=io.StringIO())
+
+    def test_old_unreferenced_flares_move_to_archive(self):
+        self.assertEqual(
+            sorted(SolarFlare.objects.values_list('flare_id', flat=True)), ['ARCHIVE-0', 'ARCHIVE-1', 'ARCHIVE-3']
+        )
+        archived = ArchivedSolarFlare.objects.get()
+        self.assertEqual(archived.flare_id, 'ARCHIVE-2')
+        self.assertEqual(archived.impact_effects, ['Radio blackouts'])
+        self.assertEqual(SolarFlareHistory.objects.count(), 4)
+
+    def test_recent_windows_only_use_hot_table(self):
+        self.assertIs(flares_since(timezone.now() - timedelta(days=30)).model, SolarFlare)
+        self.assertIs(flares_since(timezone.now() - timedelta(days=365)).model, SolarFlareHistory)
+        self.assertIs(flares_since(None).model, SolarFlareHistory)
+        self.assertIs(flares_since('2020-01-01').model, SolarFlareHistory)
+
+    def test_windows_spanning_the_boundary_include_archive(self):
+        self.assertEqual(self.client.get('/api/statistics/?days=30').json()['total_flares'], 2)
+        self.assertEqual(self.client.get('/api/statistics/?days=300').json()['total_flares'], 3)
+        self.assertEqual(self.client.get('/api/flares/?days=300').json()['count'], 3)
+        self.assertEqual(self.client.get('/api/flares/').json()['count'], 4)
+
+        archived_id = ArchivedSolarFlare.objects.get().id
+        self.assertEqual(self.client.get(f'/api/flares/{archived_id}/').json()['flare_id'], 'ARCHIVE-2')
+
+    def test_ingesting_archived_flare_does_not_duplicate_it(self):
+        service = NASASpaceWeatherService()
+        begin_time = ArchivedSolarFlare.objects.get().begin_time.isoformat()
+
+        saved = service.save_flares_to_db([{'flareID': 'ARCHIVE-2', 'classType': 'M2.0', 'beginTime': begin_time}])
+
+        self.assertEqual(saved, [])
+        self.assertFalse(SolarFlare.objects.filter(flare_id='ARCHIVE-2').exists())
+        self.assertEqual(SolarFlareHistory.objects.filter(flare_id='ARCHIVE-2').count(), 1)
+
+    def test_archiving_a_flare_again_updates_the_archive(self):
+        # توهج أُدخل مرة أخرى في الجدول الساخن (قبل فحص الأرشيف في الجلب)
+        archived = ArchivedSolarFlare.objects.get()
+        SolarFlare.objects.create(
+            flare_id='ARCHIVE-2', class_type='X1.0', flare_class='X', intensity=1.0,
+            begin_time=archived.begin_time, risk_level='EXTREME', risk_color='#FF0000',
+        )
+
+        call_command('archive_flares', stdout=io.StringIO())
+
+        self.assertFalse(SolarFlare.objects.filter(flare_id='ARCHIVE-2').exists())
+        updated = ArchivedSolarFlare.objects.get()
+        self.assertEqual((updated.id, updated.class_type), (archived.id, 'X1.0'))
+
+
+class IncrementalReportTests(TestCase):
+    def setUp(self):
+        self.service = NASASpaceWeatherService()
+        self.now = timezone.now()
+
+    def ingest(self, *flares):
+        return self.service.save_flares_to_db([
+            {'flareID': flare_id, 'classType': class_type, 'beginTime': (self.now - timedelta(days=days_ago)).isoformat()}
+            for flare_id, class_type, days_ago in flares
+        ])
+
+    def report(self, now):
+        # مثل مهمة الجلب: ما حفظه هذا الـ service يُحسب رغم REPORT_WATERMARK_LAG
+        return reports.generate_report(now=now, committed=self.service.high_water_mark)
+
+    def assert_matches_full_rebuild(self, report):
+        counts, strongest = reports.full_inputs(report.window_start, report.source_watermark)
+        self.assertEqual(report.inputs['counts'], counts)
+        self.assertEqual(report.total_flares, sum(counts.values()))
+        self.assertEqual(report.risk_sum, reports.risk_sum(counts))
+        self.assertEqual(report.strongest_flare, strongest)
+
+    def test_first_report_full_then_incremental(self):
+        self.ingest(('INC-1', 'C2.0', 1), ('INC-2', 'M1.0', 2))
+        first = self.report(now=self.now)
+        self.assertEqual((first.inputs['mode'], first.inputs['reason']), ('full', 'no base report'))
+        self.assertEqual((first.total_flares, first.risk_sum), (2, 3))
+
+        self.ingest(('INC-3', 'X5.0', 0))
+        with self.assertNumQueries(6):
+            second = self.report(now=self.now + timedelta(minutes=5))
+
+        self.assertEqual(second.inputs['mode'], 'incremental')
+        self.assertEqual((second.inputs['base_report'], second.inputs['added']), (first.pk, 1))
+        self.assertEqual(second.inputs['counts'], {'C': 1, 'M': 1, 'X': 1})
+        self.assertEqual(second.strongest_flare.flare_id, 'INC-3')
+        self.assertAlmostEqual(second.risk_percentage, 6 / 9 * 100)
+        self.assert_matches_full_rebuild(second)
+
+    def test_expired_flares_leave_the_window(self):
+        self.ingest(('EXP-1', 'X1.0', 6), ('EXP-2', 'C1.0', 1))
+        self.report(now=self.now)
+
+        report = self.report(now=self.now + timedelta(days=2))
+
+        self.assertEqual((report.inputs['mode'], report.inputs['expired']), ('incremental', 1))
+        self.assertEqual(report.inputs['counts'], {'C': 1})
+        self.assertEqual(report.strongest_flare.flare_id, 'EXP-2')
+        self.assert_matches_full_rebuild(report)
+
+    def test_modified_flare_forces_full_rebuild(self):
+        self.ingest(('MOD-1', 'C1.0', 1))
+        self.report(now=self.now)
+        self.ingest(('MOD-1', 'X5.0', 1))
+
+        report = self.report(now=self.now + timedelta(minutes=5))
+
+        self.assertEqual((report.inputs['mode'], report.inputs['reason']), ('full', 'modified flares'))
+        self.assertEqual(report.inputs['counts'], {'X': 1})
+
+    @override_settings(REPORT_FULL_REBUILD_EVERY=2)
+    def test_periodic_full_rebuild(self):
+        self.ingest(('CHAIN-1', 'B1.0', 1))
+        modes = [self.report(now=self.now + timedelta(minutes=i)).inputs['mode'] for i in range(4)]
+        self.assertEqual(modes, ['full', 'incremental', 'incremental', 'full'])
+
+    def test_unchanged_flares_are_not_rewritten(self):
+        flare, = self.ingest(('SAME-1', 'M3.0', 1))
+        updated_at = flare.updated_at
+
+        # فحص الأرشيف + in_bulk، بدون أي UPDATE
+        with self.assertNumQueries(2):
+            self.ingest(('SAME-1', 'M3.0', 1))
+
+        self.assertEqual(SolarFlare.objects.get(flare_id='SAME-1').updated_at, updated_at)
+        self.assertEqual(self.report(now=self.now).inputs['counts'], {'M': 1})
+        self.assertEqual(self.report(now=self.now).inputs['added'], 0)
+
+    @override_settings(REPORT_WATERMARK_LAG=60)
+    def test_watermark_lags_behind_uncommitted_writes(self):
+        self.ingest(('LAG-1', 'C1.0', 1))
+        SolarFlare.objects.update(updated_at=self.now - timedelta(minutes=5))
+        self.ingest(('LAG-2', 'X1.0', 1))
+
+        # تقرير من عملية أخرى: LAG-2 أحدث من الآن - 60 ثانية، قد تكون معه transaction لم تنتهِ بعد
+        first = reports.generate_report(now=self.now)
+        self.assertEqual(first.inputs['counts'], {'C': 1})
+        self.assertLessEqual(first.source_watermark, timezone.now() - timedelta(seconds=60))
+
+        # العملية التي حفظت LAG-2 تحسبه في تقريرها
+        second = self.service.generate_report()
+        self.assertEqual((second.inputs['mode'], second.inputs['counts']), ('incremental', {'C': 1, 'X': 1}))
+
+    def test_concurrent_insert_of_same_flare(self):
+        self.ingest(('RACE-1', 'C1.0', 1))
+
+        # عملية أخرى أدخلت التوهج بعد in_bulk
+        with mock.patch.object(SolarFlare.objects, 'in_bulk', return_value={}):
+            flare, = self.ingest(('RACE-1', 'M2.0', 1))
+
+        self.assertEqual(SolarFlare.objects.get().class_type, 'M2.0')
+        self.assertEqual(flare.pk, SolarFlare.objects.get().pk)
@@ -6,6 +6,7 @@ from . import views
 router = DefaultRouter()
 router.register(r'flares', views.SolarFlareViewSet, basename='flare')
 router.register(r'reports', views.SpaceWeatherReportViewSet, basename='report')
+router.register(r'ingestion-jobs', views.IngestionJobViewSet, basename='ingestion-job')
 
 urlpatterns = [
     # ViewSets URLs (تلقائية)
@@ -16,6 +17,8 @@ urlpatterns = [
     path('full-visualization-data/', views.full_visualization_data, name='full-visualization-data'),
     path('statistics/', views.statistics, name='statistics'),
     path('health/', views.health_check, name='health-check'),
+    path('health/live/', views.liveness, name='health-live'),
+    path('health/ready/', views.readiness, name='health-ready'),
     path('dashboard-summary/', views.dashboard_summary, name='dashboard-summary'),
 ]
 
@@ -1,20 +1,57 @@
-from rest_framework import viewsets, status
-from rest_framework.decorators import action, api_view
+from rest_framework import mixins, viewsets, status
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.decorators import action, api_view, authentication_classes, permission_classes
+from rest_framework.permissions import AllowAny, IsAdminUser
 from rest_framework.response import Response
 from rest_framework.pagination import PageNumberPagination
 from django.utils import timezone
 from datetime import timedelta
+from django.conf import settings
 from django.db.models import Count, Avg, Q
 from django.db import models
 import numpy as np
-
-from .models import SolarFlare, SpaceWeatherReport
+from django.utils.decorators import method_decorator
+from config.archive import parse_start
+from config.caching import versioned_cache
+from config.conditional import conditional, queryset_fingerprint
+from config.fast_serializers import FastListMixin, fast_serializers_enabled
+from config.impacts import CATEGORY_COLORS, CATEGORY_RISKS, risk_profile_with_flair
+from config.health import database_ready, estimated_count
+
+from . import jobs
+from .models import IngestionJob, SolarFlare, SpaceWeatherReport, flares_since
 from .serializers import (
+    IngestionJobSerializer,
     SolarFlareSerializer, 
     SpaceWeatherReportSerializer,
-    SolarFlareStatsSerializer
+    SolarFlareStatsSerializer,
+    SolarFlareFastSerializer
 )
-from .services import NASASpaceWeatherService
+
+
+def latest_report_fingerprint(request=None):
+    """آخر تقرير + آخر تعديل على أقوى توهج فيه"""
+    return SpaceWeatherReport.objects.values_list(
+        'id', 'report_date', 'strongest_flare__updated_at'
+    ).first()
+
+
+def latest_report_modified(request):
+    return SpaceWeatherReport.objects.values_list('report_date', flat=True).first()
+
+
+def statistics_fingerprint(request):
+    days = int(request.GET.get('days', 30))
+    start_date = timezone.now() - timedelta(days=days)
+    return queryset_fingerprint(flares_since(start_date).filter(begin_time__gte=start_date))
+
+
+def dashboard_summary_fingerprint(request):
+    week_ago = timezone.now() - timedelta(days=7)
+    return (
+        queryset_fingerprint(flares_since(week_ago).filter(begin_time__gte=week_ago)),
+        latest_report_fingerprint(),
+    )
 
 
 class StandardResultsSetPagination(PageNumberPagination):
@@ -24,17 +61,22 @@ class StandardResultsSetPagination(PageNumberPagination):
     max_page_size = 100
 
 
-class SolarFlareViewSet(viewsets.ModelViewSet):
+class SolarFlareViewSet(FastListMixin, viewsets.ModelViewSet):
     """
     ViewSet للتعامل مع الانفجارات الشمسية
     """
     queryset = SolarFlare.objects.all()
     serializer_class = SolarFlareSerializer
+    fast_serializer_class = SolarFlareFastSerializer
     pagination_class = StandardResultsSetPagination
     
     def get_queryset(self):
         """تصفية البيانات حسب المعاملات"""
-        queryset = SolarFlare.objects.all()
+        # القراءة تشمل الأرشيف فقط إذا وصلت الفترة المطلوبة إليه، والتعديل على الجدول الساخن
+        if self.request.method in SAFE_METHODS:
+            queryset = flares_since(self.requested_start())
+        else:
+            queryset = SolarFlare.objects.all()
         
         # تصفية حسب نوع الانفجار
         flare_class = self.request.query_params.get('class', None)
@@ -67,10 +109,27 @@ class SolarFlareViewSet(viewsets.ModelViewSet):
         
         return queryset.order_by('-begin_time')
     
+    def requested_start(self):
+        """بداية الفترة المطلوبة من start_date و days (None إذا لم تُحدد)"""
+        starts = [parse_start(self.request.query_params.get('start_date'))]
+        
+        days = self.request.query_params.get('days', None)
+        if days:
+            try:
+                starts.append(timezone.now() - timedelta(days=int(days)))
+            except ValueError:
+                pass
+        
+        return max(filter(None, starts), default=None)
+    
     @action(detail=False, methods=['get'])
     def recent(self, request):
         """الحصول على آخر الانفجارات"""
         limit = int(request.query_params.get('limit', 10))
+        
+        if fast_serializers_enabled():
+            return Response(SolarFlareFastSerializer.many(self.get_queryset()[:limit]))
+        
         recent_flares = self.get_queryset()[:limit]
         serializer = self.get_serializer(recent_flares, many=True)
         return Response(serializer.data)
@@ -83,7 +142,10 @@ class SolarFlareViewSet(viewsets.ModelViewSet):
             flares = self.get_queryset().filter(flare_class=flare_class)
             flares_by_class[flare_class] = {
                 'count': flares.count(),
-                'flares': SolarFlareSerializer(flares[:5], many=True).data
+                'flares': (
+                    SolarFlareFastSerializer.many(flares[:5]) if fast_serializers_enabled()
+                    else SolarFlareSerializer(flares[:5], many=True).data
+                )
             }
         
         return Response(flares_by_class)
@@ -114,6 +176,7 @@ class SpaceWeatherReportViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = SpaceWeatherReportSerializer
     pagination_class = StandardResultsSetPagination
     
+    @method_decorator(conditional(latest_report_fingerprint, latest_report_modified))
     @action(detail=False, methods=['get'])
     def latest(self, request):
         """الحصول على آخر تقرير"""
@@ -128,38 +191,50 @@ class SpaceWeatherReportViewSet(viewsets.ReadOnlyModelViewSet):
         )
 
 
-@api_view(['GET'])
-def fetch_nasa_data(request):
-    """جلب البيانات من NASA وحفظها"""
-    start_date = request.query_params.get('start_date', None)
-    end_date = request.query_params.get('end_date', None)
-    
-    service = NASASpaceWeatherService()
-    
-    # جلب البيانات من NASA
-    flares_data = service.fetch_solar_flares(start_date, end_date)
+class IngestionJobViewSet(mixins.CreateModelMixin,
+                          mixins.RetrieveModelMixin,
+                          mixins.ListModelMixin,
+                          viewsets.GenericViewSet):
+    """
+    مهام الجلب من NASA (انظر weather_api.jobs)
     
-    # حفظ في قاعدة البيانات
-    saved_flares = service.save_flares_to_db(flares_data)
+    POST يرجع فوراً (202) بالمهمة الجديدة أو بالمهمة المتطابقة التي لم تنتهِ بعد
+    (deduplicated)، ونتيجتها من GET /api/ingestion-jobs/<id>/. للـ staff فقط: كل
+    مهمة طلب إلى NASA (بـ API key المشروع)، والنتيجة فيها نص الأخطاء.
+    """
     
-    # توليد تقرير
-    report = service.generate_report()
+    queryset = IngestionJob.objects.all()
+    serializer_class = IngestionJobSerializer
+    permission_classes = [IsAdminUser]
     
-    return Response({
-        'success': True,
-        'message': f'تم جلب وحفظ {len(saved_flares)} انفجار شمسي',
-        'flares_count': len(saved_flares),
-        'report': SpaceWeatherReportSerializer(report).data
-    })
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return jobs.enqueue_response(serializer.validated_data)
+
+
+def fetch_params(source, query):
+    return {'source': source, 'start_date': query.get('start_date'), 'end_date': query.get('end_date')}
+
+
+@api_view(['POST'])
+@permission_classes([IsAdminUser])
+def fetch_nasa_data(request):
+    """جدولة جلب البيانات من NASA (مثل POST /api/ingestion-jobs/ لهذا المصدر)"""
+    serializer = IngestionJobSerializer(data=fetch_params('weather_api', request.data))
+    serializer.is_valid(raise_exception=True)
+    return jobs.enqueue_response(serializer.validated_data)
 
 
 @api_view(['GET'])
+@conditional(statistics_fingerprint)
+@versioned_cache('weather_api.statistics', [SolarFlare], params={'days': 30})
 def statistics(request):
     """إحصائيات شاملة"""
     days = int(request.query_params.get('days', 30))
     start_date = timezone.now() - timedelta(days=days)
     
-    flares = SolarFlare.objects.filter(begin_time__gte=start_date)
+    flares = flares_since(start_date).filter(begin_time__gte=start_date)
     
     # إحصائيات حسب النوع
     flares_by_class = {}
@@ -201,22 +276,65 @@ def statistics(request):
     return Response(serializer.data)
 
 
+# مصادر الجلب من NASA (jobs.ingestion_age)
+INGESTION_SOURCES = ('weather_api', 'solar_defender')
+
+
+@api_view(['GET'])
+@authentication_classes([])
+@permission_classes([AllowAny])
+def liveness(request):
+    """العملية تعمل (بدون قاعدة بيانات أو cache)"""
+    return Response({'status': 'alive'})
+
+
+@api_view(['GET'])
+@authentication_classes([])
+@permission_classes([AllowAny])
+def readiness(request):
+    """
+    جاهزية استقبال الطلبات: الاتصال بالقاعدة + عمر آخر جلب من NASA
+
+    عمر الجلب يُفشل الفحص فقط إذا ضُبط READINESS_MAX_INGESTION_AGE، حتى لا
+    تخرج كل النسخ من الخدمة معاً عند تعطل NASA.
+    """
+    database = database_ready()
+    age = jobs.ingestion_age(*INGESTION_SOURCES) if database else None
+    max_age = getattr(settings, 'READINESS_MAX_INGESTION_AGE', 0)
+    fresh = None if not max_age else age is not None and age <= max_age
+
+    ready = database and fresh is not False
+    return Response(
+        {
+            'status': 'ready' if ready else 'not_ready',
+            'database': database,
+            'ingestion_age_seconds': None if age is None else round(age),
+            'ingestion_fresh': fresh,
+        },
+        status=status.HTTP_200_OK if ready else status.HTTP_503_SERVICE_UNAVAILABLE,
+    )
+
+
 @api_view(['GET'])
 def health_check(request):
-    """فحص صحة الـ API"""
+    """فحص صحة الـ API مع أعداد تقديرية (بدون COUNT(*) في كل فحص)"""
+    age = jobs.ingestion_age(*INGESTION_SOURCES)
     return Response({
         'status': 'healthy',
         'timestamp': timezone.now().isoformat(),
-        'total_flares': SolarFlare.objects.count(),
-        'total_reports': SpaceWeatherReport.objects.count()
+        'total_flares': estimated_count(SolarFlare),
+        'total_reports': estimated_count(SpaceWeatherReport),
+        'ingestion_age_seconds': None if age is None else round(age),
     })
 
 
 @api_view(['GET'])
+@conditional(dashboard_summary_fingerprint)
+@versioned_cache('weather_api.dashboard_summary', [SolarFlare, SpaceWeatherReport])
 def dashboard_summary(request):
     """ملخص شامل للوحة التحكم"""
     week_ago = timezone.now() - timedelta(days=7)
-    recent_flares = SolarFlare.objects.filter(begin_time__gte=week_ago)
+    recent_flares = flares_since(week_ago).filter(begin_time__gte=week_ago)
     
     strongest = recent_flares.order_by('-intensity').first()
     
@@ -248,6 +366,7 @@ def dashboard_summary(request):
 # ====================================================================
 
 @api_view(['GET'])
+@versioned_cache('weather_api.full_visualization_data', [SolarFlare], params={'days': 30})
 def full_visualization_data(request):
     """
     🚀 إرجاع كل البيانات بنفس تفاصيل الكود الأصلي
@@ -256,7 +375,7 @@ def full_visualization_data(request):
     days = int(request.query_params.get('days', 30))
     start_date = timezone.now() - timedelta(days=days)
     
-    flares = SolarFlare.objects.filter(begin_time__gte=start_date).order_by('-begin_time')
+    flares = flares_since(start_date).filter(begin_time__gte=start_date).order_by('-begin_time')
     
     # 1️⃣ معالجة البيانات الأساسية
     flares_data = []
@@ -402,15 +521,7 @@ def full_visualization_data(request):
 
 def predict_impacts_with_flair(flare_class):
     """Enhanced impact prediction"""
-    impact_levels = {
-        'A': {'risk': '🌱 LOW', 'color': '#00FF00', 'effects': ['Minimal impact'], 'icon': '🌤️'},
-        'B': {'risk': '💚 LOW-MEDIUM', 'color': '#7CFC00', 'effects': ['Radio static'], 'icon': '📻'},
-        'C': {'risk': '🟡 MEDIUM', 'color': '#FFD700', 'effects': ['GPS errors', 'Radio blackouts'], 'icon': '📡'},
-        'M': {'risk': '🟠 HIGH', 'color': '#FF8C00', 'effects': ['Power grid fluctuations', 'Astronaut risk'], 'icon': '⚡'},
-        'X': {'risk': '🔴 EXTREME', 'color': '#FF0000', 'effects': ['Satellite damage', 'Global blackouts'], 'icon': '💥'}
-    }
-    flare_category = flare_class[0] if flare_class else 'B'
-    return impact_levels.get(flare_category, impact_levels['B'])
+    return risk_profile_with_flair(flare_class)
 
 
 def calculate_detailed_impact_radar(flares):
@@ -553,11 +664,9 @@ def generate_defense_recommendations(flares):
 
 def get_category_color(category):
     """الحصول على اللون"""
-    colors = {'A': '#00FF00', 'B': '#7CFC00', 'C': '#FFD700', 'M': '#FF8C00', 'X': '#FF0000'}
-    return colors.get(category, '#FFFFFF')
+    return CATEGORY_COLORS.get(category, '#FFFFFF')
 
 
 def get_risk_by_category(category):
     """الحصول على مستوى الخطر"""
-    risks = {'A': 'LOW', 'B': 'LOW-MEDIUM', 'C': 'MEDIUM', 'M': 'HIGH', 'X': 'EXTREME'}
-    return risks.get(category, 'UNKNOWN')
\ No newline at end of file
+    return CATEGORY_RISKS.get(category, 'UNKNOWN')